@@ -0,0 +1,160 @@
+"""
+Cold-start benchmark of the pdf2md entry points
+
+MCP clients spawn one stdio server per session, so the time from process
+start until the server answers is paid on every session. Each measurement
+starts a fresh interpreter and reports the median and minimum over several
+runs:
+
+- import: "import pdf2md"
+- help: "python -m pdf2md --help"
+- ready: process start until the stdio server answers "initialize"
+- tools: process start until the server has listed its tools
+
+With --importtime the slowest imports of "import pdf2md.server" are listed
+as well, from python -X importtime.
+
+Usage:
+    uv run python benchmarks/bench_startup.py --runs 10
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+import statistics
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+
+def child_env(output_dir):
+    """Environment of the measured processes: the source tree first, no real API key"""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [SRC_DIR, env.get("PYTHONPATH")]))
+    env.setdefault("MINERU_API_KEY", "benchmark")
+    env["PDF2MD_JOB_DB"] = os.path.join(output_dir, ".pdf2md_jobs.db")
+    return env
+
+
+def time_command(args, env):
+    """Run a command to completion and return its wall time in seconds"""
+    started = time.perf_counter()
+    subprocess.run(args, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+    return time.perf_counter() - started
+
+
+def send(process, message):
+    process.stdin.write((json.dumps(message) + "\n").encode())
+    process.stdin.flush()
+
+
+def read_response(process, request_id):
+    """Read stdout lines until the response to a request arrives"""
+    while True:
+        line = process.stdout.readline()
+        if not line:
+            raise RuntimeError("Server exited before answering")
+        try:
+            message = json.loads(line)
+        except ValueError:
+            continue
+        if message.get("id") == request_id:
+            return message
+
+
+def time_stdio_server(env, output_dir):
+    """
+    Start the stdio server and time the initialize handshake and tool listing
+
+    Returns:
+        tuple: (seconds until initialize was answered, seconds until tools were listed)
+    """
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "pdf2md", "--output-dir", output_dir],
+        env=env, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+    )
+    try:
+        send(process, {"jsonrpc": "2.0", "id": 1, "method": "initialize", "params": {
+            "protocolVersion": "2025-03-26",
+            "capabilities": {},
+            "clientInfo": {"name": "bench_startup", "version": "0"}
+        }})
+        read_response(process, 1)
+        ready = time.perf_counter() - started
+        send(process, {"jsonrpc": "2.0", "method": "notifications/initialized"})
+        send(process, {"jsonrpc": "2.0", "id": 2, "method": "tools/list"})
+        tools = read_response(process, 2)
+        if not tools.get("result", {}).get("tools"):
+            raise RuntimeError(f"Unexpected tools/list response: {tools}")
+        return ready, time.perf_counter() - started
+    finally:
+        process.stdin.close()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+def slowest_imports(env, count):
+    """Return the imports with the highest cumulative time, in microseconds"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import pdf2md.server"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            rows.append((int(parts[1]), parts[2].rstrip()))
+    return sorted(rows, reverse=True)[:count]
+
+
+def summarize(samples):
+    return {
+        "median_ms": round(statistics.median(samples) * 1000, 1),
+        "min_ms": round(min(samples) * 1000, 1),
+        "runs": len(samples)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start benchmark of the pdf2md entry points")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh processes per measurement")
+    parser.add_argument("--importtime", type=int, default=0, metavar="N", help="Also list the N slowest imports")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    args = parser.parse_args()
+
+    output_dir = tempfile.mkdtemp(prefix="pdf2md-startup-")
+    env = child_env(output_dir)
+    samples = {"import": [], "help": [], "ready": [], "tools": []}
+    for _ in range(max(1, args.runs)):
+        samples["import"].append(time_command([sys.executable, "-c", "import pdf2md"], env))
+        samples["help"].append(time_command([sys.executable, "-m", "pdf2md", "--help"], env))
+        ready, tools = time_stdio_server(env, output_dir)
+        samples["ready"].append(ready)
+        samples["tools"].append(tools)
+
+    results = {name: summarize(values) for name, values in samples.items()}
+    imports = slowest_imports(env, args.importtime) if args.importtime else []
+
+    if args.json:
+        results["slowest_imports"] = [{"module": name.strip(), "cumulative_ms": round(us / 1000, 1)} for us, name in imports]
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'measurement':<12} {'median ms':>10} {'min ms':>10}")
+    for name, result in results.items():
+        print(f"{name:<12} {result['median_ms']:>10} {result['min_ms']:>10}")
+    if imports:
+        print()
+        print(f"{'cumulative ms':>14}  module")
+        for us, name in imports:
+            print(f"{us / 1000:>14.1f}  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""
+End-to-end throughput benchmark against the mock MinerU API
+
+Runs convert_pdf_file (or convert_pdf_url) against MockMinerU for every
+combination of batch size and concurrency, and reports per-call latency
+percentiles, documents per second, peak RSS, the number of requests made
+to each endpoint and (in JSON output) the time spent in each pipeline
+phase. Each scenario runs in a fresh interpreter so peak RSS and the
+shared client, scheduler and job store are not carried over.
+
+Usage:
+    uv run python benchmarks/bench_throughput.py --batch-sizes 1,10,50 --concurrency 1,4
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import contextlib
+import subprocess
+
+
+def percentile(values, fraction):
+    """Return the value below which the given fraction of values fall"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def peak_rss_mb():
+    """Return the peak resident set size of this process in MB, if available"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def sample_pdf(size, pages=1):
+    """
+    Build a minimal valid PDF with a text layer, padded to about size bytes
+
+    Every page draws a line of text from one shared content stream, which
+    is padded with a PDF comment to reach the requested size.
+    """
+    text = b"BT /F1 12 Tf 72 720 Td (Sample page) Tj ET\n"
+    page_ids = [5 + i for i in range(pages)]
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [" + b" ".join(b"%d 0 R" % n for n in page_ids) + b"] /Count %d >>" % pages,
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+        None,
+    ]
+    objects += [b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Resources << /Font << /F1 3 0 R >> >> "
+                b"/Contents 4 0 R >>"] * pages
+
+    def build(padding):
+        content = text + (b"%" + b" " * (padding - 2) + b"\n" if padding >= 2 else b"")
+        objects[3] = b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream"
+        out = bytearray(b"%PDF-1.4\n")
+        offsets = []
+        for number, obj in enumerate(objects, 1):
+            offsets.append(len(out))
+            out += b"%d 0 obj\n" % number + obj + b"\nendobj\n"
+        xref = len(out)
+        out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+        out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+        out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+        return bytes(out)
+
+    return build(max(0, size - len(build(0))))
+
+
+def write_sample_pdfs(directory, prefix, count, size, pages=1):
+    """Write valid sample PDF files of about size bytes and return their paths"""
+    paths = []
+    body = sample_pdf(size, pages)
+    for i in range(count):
+        path = os.path.join(directory, f"{prefix}_{i+1}.pdf")
+        with open(path, "wb") as f:
+            f.write(body)
+        paths.append(path)
+    return paths
+
+
+async def run_scenario(args):
+    """Run one batch size / concurrency combination in this process"""
+    work_dir = tempfile.mkdtemp(prefix="pdf2md-bench-")
+
+    # Settings are read when the server module is imported
+    os.environ["MINERU_API_KEY"] = "benchmark"
+    os.environ["PDF2MD_CACHE_ENABLED"] = "false"
+    os.environ["PDF2MD_JOB_DB"] = os.path.join(work_dir, "jobs.db")
+    os.environ["PDF2MD_POLL_MIN_INTERVAL"] = str(args.poll_interval)
+    os.environ["PDF2MD_POLL_MAX_REQUESTS_PER_SECOND"] = str(args.max_polls_per_second)
+
+    import httpx
+    from pdf2md import server
+    from mock_mineru import MockMinerU
+
+    mock = MockMinerU(
+        latency=args.latency,
+        processing_time=args.processing_time,
+        pages=args.pages,
+        failure_rate=args.failure_rate,
+        error_rate=args.error_rate,
+        archive_size=args.archive_kb * 1024,
+        seed=args.seed
+    )
+    server.set_output_dir(os.path.join(work_dir, "output"))
+    server._http_client = httpx.AsyncClient(
+        transport=mock.transport,
+        event_hooks={"request": [server._connection_stats.on_request]}
+    )
+
+    async def one_call(index):
+        started = time.perf_counter()
+        if args.mode == "url":
+            sources = [f"https://files.mock-mineru.test/doc_{index}_{i+1}.pdf" for i in range(args.batch_size)]
+            result = await server.convert_pdf_url("\n".join(sources), enable_ocr=False)
+        else:
+            paths = write_sample_pdfs(work_dir, f"doc_{index}", args.batch_size, args.pdf_kb * 1024, args.pages)
+            result = await server.convert_pdf_file("\n".join(paths), enable_ocr=False)
+        return time.perf_counter() - started, result
+
+    # Status output of the server is not part of the measurement
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        started = time.perf_counter()
+        calls = await asyncio.gather(*(one_call(i + 1) for i in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+    await server.close_http_client()
+
+    latencies = [latency for latency, _ in calls]
+    downloaded = sum(len(result.get("downloaded_files", [])) for _, result in calls)
+    return {
+        "mode": args.mode,
+        "batch_size": args.batch_size,
+        "concurrency": args.concurrency,
+        "documents": args.batch_size * args.concurrency,
+        "downloaded": downloaded,
+        "failed_calls": sum(1 for _, result in calls if not result.get("success")),
+        "elapsed_seconds": round(elapsed, 3),
+        "docs_per_second": round(downloaded / elapsed, 2) if elapsed else None,
+        "latency_p50": round(percentile(latencies, 0.50), 3),
+        "latency_p95": round(percentile(latencies, 0.95), 3),
+        "latency_p99": round(percentile(latencies, 0.99), 3),
+        "peak_rss_mb": peak_rss_mb(),
+        "mock": mock.stats(),
+        "phases": server.get_metrics()["phases"]
+    }
+
+
+def scenario_command(args, batch_size, concurrency):
+    command = [sys.executable, os.path.abspath(__file__), "--scenario", f"{batch_size},{concurrency}"]
+    for option in ("mode", "latency", "processing_time", "pages", "failure_rate", "error_rate",
+                   "archive_kb", "pdf_kb", "poll_interval", "max_polls_per_second", "seed"):
+        value = getattr(args, option)
+        if value is not None:
+            command += [f"--{option.replace('_', '-')}", str(value)]
+    return command
+
+
+def print_table(results):
+    columns = ("batch_size", "concurrency", "downloaded", "elapsed_seconds", "docs_per_second",
+               "latency_p50", "latency_p95", "latency_p99", "peak_rss_mb", "requests")
+    rows = [[str(result.get(column, result["mock"]["total_requests"] if column == "requests" else ""))
+             for column in columns] for result in results]
+    widths = [max(len(column), *(len(row[i]) for row in rows)) for i, column in enumerate(columns)]
+    print("  ".join(column.rjust(width) for column, width in zip(columns, widths)))
+    for row in rows:
+        print("  ".join(value.rjust(width) for value, width in zip(row, widths)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end throughput benchmark against a mock MinerU API")
+    parser.add_argument("--mode", choices=("file", "url"), default="file", help="Convert local files or URLs")
+    parser.add_argument("--batch-sizes", default="1,10,50", help="Comma-separated documents per call")
+    parser.add_argument("--concurrency", default="1,4", help="Comma-separated numbers of concurrent calls")
+    parser.add_argument("--latency", type=float, default=0.02, help="Seconds added to every mock request")
+    parser.add_argument("--processing-time", type=float, default=1.0, help="Seconds each mock task takes")
+    parser.add_argument("--pages", type=int, default=10, help="Pages per sample PDF and per converted document")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Share of tasks that fail")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with 503")
+    parser.add_argument("--archive-kb", type=int, default=256, help="Size of each result archive in KB")
+    parser.add_argument("--pdf-kb", type=int, default=256, help="Size of each uploaded PDF in KB")
+    parser.add_argument("--poll-interval", type=float, default=0.2, help="Shortest delay between status polls")
+    parser.add_argument("--max-polls-per-second", type=float, default=20.0, help="Global status request budget")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for mock failures")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    parser.add_argument("--scenario", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.scenario:
+        args.batch_size, args.concurrency = (int(value) for value in args.scenario.split(","))
+        print(json.dumps(asyncio.run(run_scenario(args))))
+        return
+
+    results = []
+    for batch_size in (int(value) for value in args.batch_sizes.split(",")):
+        for concurrency in (int(value) for value in args.concurrency.split(",")):
+            output = subprocess.run(
+                scenario_command(args, batch_size, concurrency),
+                capture_output=True, text=True, check=True
+            ).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+            if not args.json:
+                print(f"batch_size={batch_size} concurrency={concurrency}: "
+                      f"{results[-1]['docs_per_second']} docs/s", file=sys.stderr)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+In-process fake of the MinerU API
+
+Serves the four endpoints the server talks to (file-urls batch, URL batch,
+batch results and the upload/ZIP hosts) from an httpx.MockTransport, so
+conversions can be run end to end without network access or API quota.
+
+Tasks finish a fixed time after their batch is submitted (or after their
+upload for local files), with page progress reported while they run. The
+latency of every request, the share of tasks that fail, the share of
+requests answered with a transient 503 and the size of the result archives
+are configurable.
+"""
+import io
+import re
+import json
+import time
+import random
+import asyncio
+import zipfile
+import itertools
+import httpx
+
+UPLOAD_HOST = "upload.mock-mineru.test"
+CDN_HOST = "cdn.mock-mineru.test"
+
+
+class _ChunkedStream(httpx.AsyncByteStream):
+    """Response body sent in chunks, like a real download"""
+
+    def __init__(self, data, chunk_size=64 * 1024):
+        self.data = data
+        self.chunk_size = chunk_size
+
+    async def __aiter__(self):
+        for start in range(0, len(self.data), self.chunk_size):
+            yield self.data[start:start + self.chunk_size]
+            await asyncio.sleep(0)
+
+
+class MockMinerU:
+    """
+    Fake MinerU API backed by an httpx.MockTransport
+
+    Args:
+        latency: Seconds added to every request
+        processing_time: Seconds a task takes to convert once it can start
+        pages: Page count reported for every task
+        failure_rate: Share of tasks that end in the failed state
+        error_rate: Share of upload, status and download requests answered with 503
+        archive_size: Approximate size of each result archive in bytes
+        seed: Seed for the random failures
+    """
+
+    def __init__(self, latency=0.0, processing_time=1.0, pages=10, failure_rate=0.0,
+                 error_rate=0.0, archive_size=64 * 1024, seed=None):
+        self.latency = latency
+        self.processing_time = processing_time
+        self.pages = pages
+        self.failure_rate = failure_rate
+        self.error_rate = error_rate
+        self.archive_size = archive_size
+        self.random = random.Random(seed)
+
+        self.requests = {}
+        self.bytes_uploaded = 0
+        self.bytes_downloaded = 0
+        self._batches = {}
+        self._ids = itertools.count(1)
+        self._archive = None
+
+    @property
+    def transport(self):
+        """Transport to pass to httpx.AsyncClient"""
+        return httpx.MockTransport(self.handle)
+
+    def stats(self):
+        """Return request counts per endpoint and bytes transferred"""
+        return {
+            "requests": dict(self.requests),
+            "total_requests": sum(self.requests.values()),
+            "bytes_uploaded": self.bytes_uploaded,
+            "bytes_downloaded": self.bytes_downloaded
+        }
+
+    async def handle(self, request):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        url = request.url
+        path = url.path
+        if request.method == "POST" and path.endswith("/file-urls/batch"):
+            return self._count("file_urls", self._create_batch(request, upload=True))
+        if request.method == "POST" and path.endswith("/extract/task/batch"):
+            return self._count("batch", self._create_batch(request, upload=False))
+        if request.method == "PUT" and url.host == UPLOAD_HOST:
+            self._count("upload", None)
+            body = await request.aread()
+            if self._transient_error():
+                return httpx.Response(503)
+            self.bytes_uploaded += len(body)
+            return self._upload(path)
+        match = re.search(r"/extract-results/batch/([\w-]+)$", path)
+        if request.method == "GET" and match:
+            self._count("batch_results", None)
+            if self._transient_error():
+                return httpx.Response(503)
+            return self._batch_results(match.group(1))
+        if request.method == "GET" and url.host == CDN_HOST:
+            self._count("download", None)
+            if self._transient_error():
+                return httpx.Response(503)
+            return self._download(request)
+        return self._count("unknown", httpx.Response(404))
+
+    def _count(self, endpoint, response):
+        self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+        return response
+
+    def _transient_error(self):
+        return self.error_rate and self.random.random() < self.error_rate
+
+    def _create_batch(self, request, upload):
+        body = json.loads(request.content)
+        batch_id = f"mock-{next(self._ids)}"
+        now = time.monotonic()
+        tasks = []
+        for i, f in enumerate(body.get("files", [])):
+            name = f.get("name") or f.get("url", "").rsplit("/", 1)[-1] or f"file_{i+1}.pdf"
+            tasks.append({
+                "file_name": name,
+                "data_id": f.get("data_id"),
+                # Local files only start converting once they are uploaded
+                "started": None if upload else now,
+                "fails": self.random.random() < self.failure_rate
+            })
+        self._batches[batch_id] = tasks
+
+        data = {"batch_id": batch_id}
+        if upload:
+            data["file_urls"] = [f"https://{UPLOAD_HOST}/{batch_id}/{i}" for i in range(len(tasks))]
+        return httpx.Response(200, json={"code": 0, "msg": "ok", "data": data})
+
+    def _upload(self, path):
+        _, batch_id, index = path.split("/")
+        tasks = self._batches.get(batch_id)
+        if tasks is None or int(index) >= len(tasks):
+            return httpx.Response(404)
+        tasks[int(index)]["started"] = time.monotonic()
+        return httpx.Response(200)
+
+    def _batch_results(self, batch_id):
+        tasks = self._batches.get(batch_id)
+        if tasks is None:
+            return httpx.Response(200, json={"code": -1, "msg": "batch not found"})
+
+        now = time.monotonic()
+        results = []
+        for i, task in enumerate(tasks):
+            result = {"file_name": task["file_name"], "data_id": task["data_id"]}
+            if task["started"] is None:
+                result["state"] = "waiting-file"
+            elif now - task["started"] < self.processing_time:
+                done = (now - task["started"]) / self.processing_time if self.processing_time else 1
+                result["state"] = "running"
+                result["extract_progress"] = {
+                    "extracted_pages": int(self.pages * done),
+                    "total_pages": self.pages,
+                    "start_time": ""
+                }
+            elif task["fails"]:
+                result["state"] = "failed"
+                result["err_msg"] = "mock conversion failure"
+            else:
+                result["state"] = "done"
+                result["full_zip_url"] = f"https://{CDN_HOST}/{batch_id}/{i}.zip"
+            results.append(result)
+        return httpx.Response(200, json={
+            "code": 0, "msg": "ok", "data": {"batch_id": batch_id, "extract_result": results}
+        })
+
+    def _download(self, request):
+        data = self.archive()
+        status_code = 200
+        headers = {"Accept-Ranges": "bytes"}
+        match = re.match(r"bytes=(\d+)-", request.headers.get("Range", ""))
+        if match:
+            offset = int(match.group(1))
+            if offset >= len(data):
+                return httpx.Response(416)
+            headers["Content-Range"] = f"bytes {offset}-{len(data) - 1}/{len(data)}"
+            data = data[offset:]
+            status_code = 206
+        headers["Content-Length"] = str(len(data))
+        self.bytes_downloaded += len(data)
+        return httpx.Response(status_code, headers=headers, stream=_ChunkedStream(data))
+
+    def archive(self):
+        """Build (once) the result archive served for every finished task"""
+        if self._archive is None:
+            buffer = io.BytesIO()
+            with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+                zf.writestr("full.md", "# Mock document\n\n" + "Lorem ipsum dolor sit amet.\n\n" * 50)
+                zf.writestr("content_list.json", json.dumps([{"type": "text", "text": "Mock document", "page_idx": 0}]))
+                # Random bytes do not compress, so the archive ends up close to archive_size
+                padding = max(0, self.archive_size - buffer.tell())
+                zf.writestr("images/figure.jpg", random.Random(0).randbytes(padding), zipfile.ZIP_STORED)
+            self._archive = buffer.getvalue()
+        return self._archive
@@ -1,25 +1,57 @@
-from .server import mcp
+def __getattr__(name):
+    # The server module pulls in the whole MCP SDK, so "import pdf2md" and
+    # "pdf2md --help" stay fast and it is only imported once it is used
+    if name == "mcp":
+        from .server import mcp
+        return mcp
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def main():
     """PDF to Markdown Conversion Service - Provides MCP service for converting PDF files to Markdown"""
-    import os
     import argparse
     
     # Parse command line arguments
     parser = argparse.ArgumentParser(description="PDF to Markdown Conversion Service")
     parser.add_argument("--output-dir", default="./downloads", help="Specify output directory path, default is ./downloads")
+    parser.add_argument("--metrics-port", type=int, default=None, help="Serve Prometheus metrics on this port, disabled by default")
+    parser.add_argument("--worker", action="store_true", help="Run as a worker process converting jobs from the queue instead of an MCP server")
+    parser.add_argument("--workers", type=int, default=0, help="Start this many worker processes and hand conversions to them through the queue")
     args = parser.parse_args()
     
     # Set output directory
     from .server import set_output_dir
     set_output_dir(args.output_dir)
     
+    # Start Prometheus metrics endpoint
+    from .server import start_metrics_server
+    start_metrics_server(args.metrics_port)
+    
     # Check API key
     from .server import MINERU_API_KEY, logger
     if not MINERU_API_KEY:
         logger.warning("Warning: API key not set, please set the MINERU_API_KEY environment variable")
     
+    # Run as a queue worker
+    if args.worker:
+        import signal
+        import asyncio
+        from .server import run_worker
+        # Stop like on Ctrl+C so running jobs are given back to the queue
+        signal.signal(signal.SIGTERM, signal.default_int_handler)
+        try:
+            asyncio.run(run_worker())
+        except KeyboardInterrupt:
+            pass
+        return
+    
+    # Start local workers and send conversions to them
+    if args.workers > 0:
+        from .server import set_queue_enabled, start_worker_processes
+        set_queue_enabled(True)
+        start_worker_processes(args.workers)
+    
     # Run MCP server
+    from .server import mcp
     mcp.run()
 
-__all__ = ['main']
\ No newline at end of file
+__all__ = ['main', 'mcp']
\ No newline at end of file
@@ -1,7 +1,6 @@
 """
 PDF to Markdown Conversion Service Startup Script
 """
-import asyncio
 from . import main
 
 if __name__ == "__main__":
@@ -0,0 +1,223 @@
+"""
+Content-addressed conversion cache
+
+Maps the SHA-256 of a PDF's bytes plus the conversion options to a copy of
+its results kept below the cache directory, so an identical PDF is never
+uploaded and converted twice. The cache only ever deletes its own copies;
+result directories in the output directory belong to the user.
+"""
+import os
+import json
+import time
+import shutil
+import sqlite3
+import hashlib
+import threading
+from typing import Optional, Dict, Any
+
+HASH_CHUNK_SIZE = 1024 * 1024
+ENTRIES_DIR = "entries"
+
+
+def hash_file(path, chunk_size=HASH_CHUNK_SIZE):
+    """
+    Compute the SHA-256 digest of a file without loading it into memory
+
+    Args:
+        path: File path
+        chunk_size: Bytes read per iteration
+
+    Returns:
+        str: Hex digest of the file content
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def make_cache_key(content_hash, options):
+    """
+    Build a cache key from a content hash and conversion options
+
+    Args:
+        content_hash: SHA-256 hex digest of the PDF bytes
+        options: Conversion options that affect the output
+
+    Returns:
+        str: Cache key
+    """
+    payload = json.dumps(options, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(f"{content_hash}:{payload}".encode("utf-8")).hexdigest()
+
+
+def get_dir_size(path):
+    """Return the total size in bytes of all files below a directory"""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def copy_result_dir(source, target):
+    """
+    Copy a result directory, merging into the target if it already exists
+
+    Args:
+        source: Directory to copy
+        target: Destination directory
+    """
+    shutil.copytree(source, target, dirs_exist_ok=True)
+
+
+class ConversionCache:
+    """
+    Persistent on-disk conversion cache with size- and age-based eviction
+
+    Results are copied into entries/<key> below the cache directory when they
+    are added, so later conversions that reuse or overwrite a directory in
+    the output directory never change a cached result, and eviction never
+    removes anything outside the cache directory.
+    """
+
+    def __init__(self, cache_dir, max_bytes, max_age_seconds):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    extract_dir TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+                """
+            )
+
+    def _connect(self):
+        return sqlite3.connect(os.path.join(self.cache_dir, "cache.db"), timeout=30.0)
+
+    def _entry_dir(self, key):
+        return os.path.join(self.cache_dir, ENTRIES_DIR, key[:2], key)
+
+    def _remove(self, conn, key, entry_dir):
+        conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+        shutil.rmtree(entry_dir, ignore_errors=True)
+
+    def get(self, key) -> Optional[str]:
+        """
+        Look up a cached result directory
+
+        Args:
+            key: Cache key from make_cache_key
+
+        Returns:
+            str: Cached copy of the results on a hit, or None on a miss. The
+                directory belongs to the cache and is copied out before use.
+        """
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT extract_dir, created FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row:
+                extract_dir, created = row
+                expired = self.max_age_seconds and now - created > self.max_age_seconds
+                if not expired and os.path.isdir(extract_dir):
+                    conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, key))
+                    self.hits += 1
+                    return extract_dir
+                self._remove(conn, key, extract_dir)
+            self.misses += 1
+            return None
+
+    def put(self, key, extract_dir):
+        """
+        Copy a freshly extracted result directory into the cache and evict old entries
+
+        This copies the whole directory and should be run in a worker thread.
+
+        Args:
+            key: Cache key from make_cache_key
+            extract_dir: Directory the results were extracted to
+        """
+        entry_dir = self._entry_dir(key)
+        staging_dir = f"{entry_dir}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            shutil.copytree(extract_dir, staging_dir)
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            os.replace(staging_dir, entry_dir)
+        except OSError:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            return
+
+        now = time.time()
+        size = get_dir_size(entry_dir)
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, extract_dir, size, created, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, entry_dir, size, now, now)
+            )
+            self._evict(conn, now)
+
+    def evict(self):
+        """Drop expired entries, then least recently used ones until under the size limit"""
+        with self._lock, self._connect() as conn:
+            self._evict(conn, time.time())
+
+    def _evict(self, conn, now):
+        victims = []
+        if self.max_age_seconds:
+            victims.extend(conn.execute(
+                "SELECT key, extract_dir FROM entries WHERE created < ?",
+                (now - self.max_age_seconds,)
+            ).fetchall())
+
+        if self.max_bytes:
+            total = conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM entries WHERE created >= ?",
+                (now - self.max_age_seconds if self.max_age_seconds else 0,)
+            ).fetchone()[0]
+            if total > self.max_bytes:
+                expired = {key for key, _ in victims}
+                for key, extract_dir, size in conn.execute(
+                    "SELECT key, extract_dir, size FROM entries ORDER BY last_access ASC"
+                ).fetchall():
+                    if total <= self.max_bytes:
+                        break
+                    if key in expired:
+                        continue
+                    victims.append((key, extract_dir))
+                    total -= size
+
+        for key, extract_dir in victims:
+            self._remove(conn, key, extract_dir)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cumulative hit/miss counters and current cache usage"""
+        with self._lock, self._connect() as conn:
+            entries, size = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": entries,
+            "size_bytes": size,
+            "max_bytes": self.max_bytes,
+            "max_age_seconds": self.max_age_seconds
+        }
@@ -0,0 +1,78 @@
+"""
+Pooled HTTP client shared by all tool calls
+
+One client keeps connections and TLS sessions to mineru.net and the upload
+and download hosts alive between calls. Connection setup is traced so the
+reuse rate of the pool can be reported.
+"""
+import httpx
+
+
+def http2_available():
+    """Check whether the optional h2 package needed for HTTP/2 is installed"""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class ConnectionStats:
+    """Counts requests and new connections made through a client"""
+
+    def __init__(self):
+        self.requests = 0
+        self.connections_opened = 0
+        self.tls_handshakes = 0
+        self.http2_requests = 0
+
+    async def on_request(self, request):
+        self.requests += 1
+        request.extensions["trace"] = self.trace
+
+    async def trace(self, event_name, info):
+        if event_name == "connection.connect_tcp.complete":
+            self.connections_opened += 1
+        elif event_name == "connection.start_tls.complete":
+            self.tls_handshakes += 1
+        elif event_name == "http2.send_request_headers.started":
+            self.http2_requests += 1
+
+    def as_dict(self):
+        reused = max(0, self.requests - self.connections_opened)
+        return {
+            "requests": self.requests,
+            "connections_opened": self.connections_opened,
+            "tls_handshakes": self.tls_handshakes,
+            "http2_requests": self.http2_requests,
+            "reused_requests": reused,
+            "reuse_ratio": round(reused / self.requests, 3) if self.requests else None
+        }
+
+
+def create_http_client(stats, max_connections=20, max_keepalive_connections=10,
+                       keepalive_expiry=60.0, http2=True, timeout=300.0):
+    """
+    Create a pooled HTTP client
+
+    Args:
+        stats: ConnectionStats to record requests and new connections in
+        max_connections: Maximum number of open connections
+        max_keepalive_connections: Maximum number of idle connections kept alive
+        keepalive_expiry: Seconds an idle connection is kept alive
+        http2: Whether to use HTTP/2, ignored if h2 is not installed
+        timeout: Default request timeout in seconds
+
+    Returns:
+        httpx.AsyncClient: Client instance
+    """
+    return httpx.AsyncClient(
+        timeout=timeout,
+        http2=http2 and http2_available(),
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        ),
+        event_hooks={"request": [stats.on_request]}
+    )
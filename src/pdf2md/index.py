@@ -0,0 +1,238 @@
+"""
+Searchable chunk index over converted Markdown
+
+Each Markdown file is split into heading-aware chunks while it is being
+written, so no separate pass over the output directory is needed. Chunks
+are kept in an SQLite FTS5 table together with the path of headings they
+belong to, and a document is re-indexed in place when its result directory
+is converted again.
+"""
+import os
+import re
+import time
+import sqlite3
+import threading
+from typing import List, Dict, Any
+
+DEFAULT_CHUNK_CHARS = 1500
+# Chunk rowids are (document number << ROWID_SHIFT) + ordinal, so all chunks
+# of a document are removed with one range delete
+ROWID_SHIFT = 20
+MAX_CHUNKS_PER_DOCUMENT = (1 << ROWID_SHIFT) - 1
+INSERT_BATCH_SIZE = 200
+
+_HEADING_RE = re.compile(r"^(#{1,6})\s+(.*?)(?:\s+#+)?\s*$")
+_FENCE_RE = re.compile(r"^\s*(```|~~~)")
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    doc_num INTEGER PRIMARY KEY AUTOINCREMENT,
+    path TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    chunk_count INTEGER NOT NULL,
+    indexed REAL NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS chunks USING fts5(
+    heading, text, line UNINDEXED, tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+
+def chunk_markdown(lines, max_chars=DEFAULT_CHUNK_CHARS):
+    """
+    Split Markdown into chunks that follow its headings
+
+    A heading starts a new chunk. Sections longer than max_chars are cut at
+    the next blank line, or at any line once they reach twice that size.
+    Lines inside code fences are never taken for headings.
+
+    Args:
+        lines: Iterable of lines, consumed once
+        max_chars: Target chunk size in characters
+
+    Yields:
+        tuple: (heading path such as "Methods > Data", chunk text, 1-based
+            line number where the chunk starts)
+    """
+    headings = []
+    buffer = []
+    size = 0
+    start_line = 1
+    in_fence = False
+
+    def flush():
+        text = "".join(buffer).strip()
+        return (" > ".join(title for _, title in headings), text, start_line) if text else None
+
+    for number, line in enumerate(lines, 1):
+        if _FENCE_RE.match(line):
+            in_fence = not in_fence
+        heading = None if in_fence else _HEADING_RE.match(line.rstrip("\r\n"))
+        blank = not line.strip()
+        if heading or (size >= max_chars and (blank or size >= 2 * max_chars)):
+            chunk = flush()
+            if chunk:
+                yield chunk
+            buffer, size, start_line = [], 0, number
+        if heading:
+            level = len(heading.group(1))
+            headings = [(lvl, title) for lvl, title in headings if lvl < level] + [(level, heading.group(2))]
+            start_line = number + 1
+            continue
+        if buffer or not blank:
+            buffer.append(line)
+            size += len(line)
+    chunk = flush()
+    if chunk:
+        yield chunk
+
+
+def build_match_query(query):
+    """
+    Turn free text into an FTS5 query matching chunks that contain every term
+
+    Args:
+        query: Search text
+
+    Returns:
+        str: FTS5 MATCH expression, or an empty string if the text has no terms
+    """
+    terms = _TERM_RE.findall(query)
+    return " ".join(f'"{term}"' for term in terms)
+
+
+class ChunkIndex:
+    """
+    Incremental full-text index of converted Markdown files
+
+    Args:
+        db_path: SQLite database path
+        chunk_chars: Target chunk size in characters
+    """
+
+    def __init__(self, db_path, chunk_chars=DEFAULT_CHUNK_CHARS):
+        self.db_path = db_path
+        self.chunk_chars = chunk_chars
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30.0)
+
+    def _remove(self, conn, path):
+        row = conn.execute("SELECT doc_num FROM documents WHERE path = ?", (path,)).fetchone()
+        if row:
+            conn.execute(
+                "DELETE FROM chunks WHERE rowid BETWEEN ? AND ?",
+                (row[0] << ROWID_SHIFT, (row[0] << ROWID_SHIFT) + MAX_CHUNKS_PER_DOCUMENT)
+            )
+            conn.execute("DELETE FROM documents WHERE doc_num = ?", (row[0],))
+
+    def add_document(self, path, name, lines):
+        """
+        Index a Markdown file from its lines, replacing any earlier version
+
+        Chunks are inserted in batches as the lines are consumed, so the file
+        is never held in memory as a whole.
+
+        Args:
+            path: Markdown file path, identifies the document
+            name: Document name shown in search results
+            lines: Iterable of the file's lines
+
+        Returns:
+            int: Number of chunks indexed
+        """
+        path = os.path.abspath(path)
+        with self._lock, self._connect() as conn:
+            self._remove(conn, path)
+            doc_num = conn.execute(
+                "INSERT INTO documents (path, name, chunk_count, indexed) VALUES (?, ?, 0, ?)",
+                (path, name, time.time())
+            ).lastrowid
+
+        count = 0
+        batch = []
+        for heading, text, line in chunk_markdown(lines, self.chunk_chars):
+            if count >= MAX_CHUNKS_PER_DOCUMENT:
+                continue
+            batch.append(((doc_num << ROWID_SHIFT) + count, heading, text, line))
+            count += 1
+            if len(batch) >= INSERT_BATCH_SIZE:
+                self._insert(batch)
+                batch = []
+        self._insert(batch)
+
+        with self._lock, self._connect() as conn:
+            conn.execute("UPDATE documents SET chunk_count = ? WHERE doc_num = ?", (count, doc_num))
+        return count
+
+    def _insert(self, rows):
+        if rows:
+            with self._lock, self._connect() as conn:
+                conn.executemany("INSERT INTO chunks (rowid, heading, text, line) VALUES (?, ?, ?, ?)", rows)
+
+    def add_file(self, path, name):
+        """Index a Markdown file that is already on disk"""
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            return self.add_document(path, name, f)
+
+    def remove_under(self, directory):
+        """Remove every document stored below a directory"""
+        prefix = os.path.join(os.path.abspath(directory), "")
+        with self._lock, self._connect() as conn:
+            paths = [row[0] for row in conn.execute(
+                "SELECT path FROM documents WHERE substr(path, 1, ?) = ?", (len(prefix), prefix)
+            )]
+            for path in paths:
+                self._remove(conn, path)
+
+    def search(self, query, limit=10) -> List[Dict[str, Any]]:
+        """
+        Find the chunks that best match a query
+
+        Documents whose file no longer exists are dropped from the index.
+
+        Args:
+            query: Search text, every term must appear in the chunk
+            limit: Maximum number of results
+
+        Returns:
+            list: Matches with name, markdown_path, heading, line, snippet and
+                score (lower is better), best first
+        """
+        match = build_match_query(query)
+        if not match:
+            return []
+        with self._lock, self._connect() as conn:
+            rows = conn.execute(
+                "SELECT d.name, d.path, chunks.heading, chunks.line, "
+                "snippet(chunks, 1, '**', '**', ' ... ', 24), bm25(chunks, 2.0, 1.0) AS score "
+                "FROM chunks JOIN documents d ON d.doc_num = (chunks.rowid >> ?) "
+                "WHERE chunks MATCH ? ORDER BY score LIMIT ?",
+                (ROWID_SHIFT, match, max(1, limit))
+            ).fetchall()
+            results = []
+            for name, path, heading, line, snippet, score in rows:
+                if not os.path.exists(path):
+                    self._remove(conn, path)
+                    continue
+                results.append({
+                    "name": name,
+                    "markdown_path": path,
+                    "heading": heading,
+                    "line": line,
+                    "snippet": snippet,
+                    "score": round(score, 4)
+                })
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the number of indexed documents and chunks"""
+        with self._lock, self._connect() as conn:
+            documents, chunks = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(chunk_count), 0) FROM documents"
+            ).fetchone()
+        return {"documents": documents, "chunks": chunks, "db_path": self.db_path}
@@ -0,0 +1,342 @@
+"""
+Durable job store
+
+Records every conversion job, the MinerU batches it was submitted as and the
+state of each file in SQLite, so batches that were already paid for can be
+resumed and collected after a server restart or a client disconnect.
+
+Files split into page-range chunks are recorded as submitted, and their
+chunks are tracked like files in a table of their own, so a resumed job
+collects and stitches the chunks instead of submitting the file again.
+"""
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from typing import Optional, List, Dict, Any
+
+# File states recorded in the store
+FILE_QUEUED = "queued"
+FILE_SUBMITTED = "submitted"
+FILE_DONE = "done"
+FILE_DOWNLOADED = "downloaded"
+FILE_FAILED = "failed"
+
+# Job and batch states
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_PARTIAL = "partial"
+JOB_FAILED = "failed"
+BATCH_SUBMITTED = "submitted"
+BATCH_FINISHED = "finished"
+BATCH_TIMEOUT = "timeout"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    options TEXT NOT NULL,
+    error TEXT,
+    owner TEXT,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS batches (
+    batch_id TEXT PRIMARY KEY,
+    job_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS files (
+    job_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    data_id TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    source TEXT NOT NULL,
+    batch_id TEXT,
+    state TEXT NOT NULL,
+    zip_url TEXT,
+    extract_dir TEXT,
+    error TEXT,
+    updated REAL NOT NULL,
+    PRIMARY KEY (job_id, position)
+);
+CREATE TABLE IF NOT EXISTS chunks (
+    data_id TEXT PRIMARY KEY,
+    job_id TEXT NOT NULL,
+    parent_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    source TEXT NOT NULL,
+    first_page INTEGER NOT NULL,
+    last_page INTEGER NOT NULL,
+    batch_id TEXT,
+    state TEXT NOT NULL,
+    zip_url TEXT,
+    extract_dir TEXT,
+    error TEXT,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_batches_job ON batches (job_id);
+CREATE INDEX IF NOT EXISTS idx_chunks_job ON chunks (job_id);
+CREATE INDEX IF NOT EXISTS idx_files_batch ON files (batch_id);
+"""
+
+
+def new_job_id():
+    """Generate a short unique job ID"""
+    return uuid.uuid4().hex[:16]
+
+
+class JobStore:
+    """
+    SQLite-backed table of jobs, batches and files
+
+    Args:
+        db_path: Path of the SQLite database file
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30.0)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def create_job(self, kind, files, options=None, job_id=None, owner=None):
+        """
+        Record a new job and its files
+
+        Args:
+            kind: Job kind, "url" or "file"
+            files: File entries with data_id, name and source (URL or local path)
+            options: Conversion options of the job
+            job_id: Job ID to use (default: a new one)
+            owner: Process working on the job (optional)
+
+        Returns:
+            str: Job ID
+        """
+        job_id = job_id or new_job_id()
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (job_id, kind, status, options, owner, created, updated) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, kind, JOB_RUNNING, json.dumps(options or {}), owner, now, now)
+            )
+            conn.executemany(
+                "INSERT INTO files (job_id, position, data_id, name, source, state, updated) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(job_id, i, f["data_id"], f["name"], f["source"], FILE_QUEUED, now) for i, f in enumerate(files)]
+            )
+        return job_id
+
+    def claim_job(self, job_id, owner, previous):
+        """
+        Make a process the owner of a job, unless another one claimed it first
+
+        Args:
+            job_id: Job ID
+            owner: New owner
+            previous: Owner the caller expects the job to have
+
+        Returns:
+            bool: Whether the job is now owned by owner
+        """
+        with self._lock, self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET owner = ?, updated = ? WHERE job_id = ? AND owner IS ?",
+                (owner, time.time(), job_id, previous)
+            )
+            return cursor.rowcount == 1
+
+    def add_chunks(self, job_id, parent_id, chunks):
+        """
+        Record that a file of a job was split into page-range chunks
+
+        The file counts as submitted from then on, its chunks are queued
+        until they are submitted themselves.
+
+        Args:
+            job_id: Job ID
+            parent_id: Data ID of the split file
+            chunks: Chunks with data_id, path, first_page and last_page
+        """
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO chunks (data_id, job_id, parent_id, name, source, first_page, last_page, "
+                "state, updated) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(chunk["data_id"], job_id, parent_id, os.path.basename(chunk["path"]), chunk["path"],
+                  chunk["first_page"], chunk["last_page"], FILE_QUEUED, now) for chunk in chunks]
+            )
+            conn.execute(
+                "UPDATE files SET state = ?, updated = ? WHERE data_id = ?", (FILE_SUBMITTED, now, parent_id)
+            )
+
+    def add_batch(self, job_id, batch_id, data_ids):
+        """
+        Record that files or chunks of a job were submitted as a MinerU batch
+
+        Args:
+            job_id: Job ID
+            batch_id: Batch ID returned by the API
+            data_ids: Data IDs of the files in the batch
+        """
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO batches (batch_id, job_id, status, created, updated) VALUES (?, ?, ?, ?, ?)",
+                (batch_id, job_id, BATCH_SUBMITTED, now, now)
+            )
+            for table in ("files", "chunks"):
+                conn.executemany(
+                    f"UPDATE {table} SET batch_id = ?, state = ?, updated = ? WHERE data_id = ?",
+                    [(batch_id, FILE_SUBMITTED, now, data_id) for data_id in data_ids]
+                )
+
+    def update_file(self, data_id, state, zip_url=None, extract_dir=None, error=None):
+        """
+        Update the state of one file or chunk, identified by its data ID
+
+        Args:
+            data_id: Data ID of the file or chunk
+            state: New file state
+            zip_url: Result archive URL (optional)
+            extract_dir: Directory the results were extracted to (optional)
+            error: Error message (optional)
+        """
+        with self._lock, self._connect() as conn:
+            for table in ("files", "chunks"):
+                conn.execute(
+                    f"UPDATE {table} SET state = ?, zip_url = COALESCE(?, zip_url), "
+                    "extract_dir = COALESCE(?, extract_dir), error = ?, updated = ? WHERE data_id = ?",
+                    (state, zip_url, extract_dir, error, time.time(), data_id)
+                )
+
+    def finish_batch(self, batch_id, status):
+        """Mark a batch as finished or timed out"""
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "UPDATE batches SET status = ?, updated = ? WHERE batch_id = ?",
+                (status, time.time(), batch_id)
+            )
+
+    def finish_job(self, job_id, error=None):
+        """
+        Set the final status of a job from the states of its files
+        
+        A job with files still waiting on MinerU or on their download stays
+        running (or partial, once some of its files were downloaded), so it
+        can be resumed instead of being reported as failed.
+
+        Args:
+            job_id: Job ID
+            error: Job-level error message (optional)
+
+        Returns:
+            str: Final job status
+        """
+        with self._lock, self._connect() as conn:
+            states = [row["state"] for row in conn.execute(
+                "SELECT state FROM files WHERE job_id = ?", (job_id,)
+            )]
+            downloaded = states.count(FILE_DOWNLOADED)
+            pending = len(states) - downloaded - states.count(FILE_FAILED)
+            if states and downloaded == len(states):
+                status = JOB_COMPLETED
+            elif downloaded:
+                status = JOB_PARTIAL
+            elif pending:
+                status = JOB_RUNNING
+            else:
+                status = JOB_FAILED
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated = ? WHERE job_id = ?",
+                (status, error, time.time(), job_id)
+            )
+        return status
+
+    def get_job(self, job_id) -> Optional[Dict[str, Any]]:
+        """
+        Get a job with its batches, files and the chunks of its split files
+
+        Args:
+            job_id: Job ID
+
+        Returns:
+            dict: Job record, or None if the job does not exist
+        """
+        with self._lock, self._connect() as conn:
+            job = conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+            if job is None:
+                return None
+            batches = conn.execute(
+                "SELECT batch_id, status FROM batches WHERE job_id = ? ORDER BY created", (job_id,)
+            ).fetchall()
+            files = conn.execute(
+                "SELECT position, data_id, name, source, batch_id, state, zip_url, extract_dir, error "
+                "FROM files WHERE job_id = ? ORDER BY position", (job_id,)
+            ).fetchall()
+            chunks = conn.execute(
+                "SELECT data_id, parent_id, name, source, first_page, last_page, batch_id, state, zip_url, "
+                "extract_dir, error FROM chunks WHERE job_id = ? ORDER BY parent_id, first_page", (job_id,)
+            ).fetchall()
+        record = dict(job)
+        record["options"] = json.loads(record["options"])
+        record["batches"] = [dict(batch) for batch in batches]
+        record["files"] = [dict(f) for f in files]
+        record["chunks"] = [dict(chunk) for chunk in chunks]
+        return record
+
+    def list_jobs(self, status=None, limit=50) -> List[Dict[str, Any]]:
+        """
+        List the most recent jobs
+
+        Args:
+            status: Only return jobs in this status (optional)
+            limit: Maximum number of jobs, None for all of them
+
+        Returns:
+            list: Job summaries, newest first
+        """
+        query = "SELECT job_id, kind, status, owner, created, updated FROM jobs"
+        params = []
+        if status:
+            query += " WHERE status = ?"
+            params.append(status)
+        query += " ORDER BY created DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        with self._lock, self._connect() as conn:
+            return [dict(row) for row in conn.execute(query, params)]
+
+    def unfinished_batches(self, job_id=None) -> List[Dict[str, Any]]:
+        """
+        List batches that were submitted but never finished polling
+        
+        Batches whose polling timed out are included, MinerU may have
+        finished them since.
+
+        Args:
+            job_id: Only return batches of this job (optional)
+
+        Returns:
+            list: Batch records with batch_id and job_id
+        """
+        query = "SELECT batch_id, job_id FROM batches WHERE status IN (?, ?)"
+        params = [BATCH_SUBMITTED, BATCH_TIMEOUT]
+        if job_id:
+            query += " AND job_id = ?"
+            params.append(job_id)
+        with self._lock, self._connect() as conn:
+            return [dict(row) for row in conn.execute(query + " ORDER BY created", params)]
@@ -0,0 +1,160 @@
+"""
+In-process timing spans and counters for the conversion pipeline
+
+Each phase of a conversion (upload URL request, upload, queue wait, remote
+processing, download, extraction) records its duration, so the phase that
+dominates latency can be read from the metrics:// resource or scraped in
+Prometheus text format.
+"""
+import time
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Upper bounds in seconds of the latency histogram buckets
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+
+class _Histogram:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * len(BUCKETS)
+
+    def observe(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+
+
+class Metrics:
+    """Thread-safe registry of phase timings and counters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._phases = {}
+        self._counters = {}
+        self.started = time.time()
+
+    def observe(self, phase, seconds):
+        """
+        Record the duration of one occurrence of a phase
+
+        Args:
+            phase: Phase name
+            seconds: Duration in seconds
+        """
+        with self._lock:
+            self._phases.setdefault(phase, _Histogram()).observe(max(0.0, seconds))
+
+    @contextmanager
+    def span(self, phase):
+        """Time the enclosed block as one occurrence of a phase"""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(phase, time.monotonic() - start)
+
+    def inc(self, name, value=1):
+        """
+        Increase a counter
+
+        Args:
+            name: Counter name
+            value: Amount to add
+        """
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def snapshot(self):
+        """
+        Return all phase timings and counters
+
+        Phases are sorted by total time spent, so the one dominating latency
+        comes first.
+
+        Returns:
+            dict: Phase statistics, counters and uptime
+        """
+        with self._lock:
+            phases = {
+                phase: {
+                    "count": hist.count,
+                    "total_seconds": round(hist.total, 3),
+                    "mean_seconds": round(hist.total / hist.count, 3) if hist.count else None,
+                    "max_seconds": round(hist.max, 3)
+                }
+                for phase, hist in sorted(self._phases.items(), key=lambda item: -item[1].total)
+            }
+            counters = dict(sorted(self._counters.items()))
+        return {
+            "uptime_seconds": round(time.time() - self.started, 1),
+            "phases": phases,
+            "dominant_phase": next(iter(phases), None),
+            "counters": counters
+        }
+
+    def render_prometheus(self, prefix="pdf2md"):
+        """
+        Render the metrics in Prometheus text exposition format
+
+        Args:
+            prefix: Prefix of every metric name
+
+        Returns:
+            str: Metrics text
+        """
+        lines = [
+            f"# HELP {prefix}_phase_seconds Duration of conversion pipeline phases",
+            f"# TYPE {prefix}_phase_seconds histogram"
+        ]
+        with self._lock:
+            for phase, hist in sorted(self._phases.items()):
+                for bound, count in zip(BUCKETS, hist.buckets):
+                    lines.append(f'{prefix}_phase_seconds_bucket{{phase="{phase}",le="{bound}"}} {count}')
+                lines.append(f'{prefix}_phase_seconds_bucket{{phase="{phase}",le="+Inf"}} {hist.count}')
+                lines.append(f'{prefix}_phase_seconds_sum{{phase="{phase}"}} {hist.total:.6f}')
+                lines.append(f'{prefix}_phase_seconds_count{{phase="{phase}"}} {hist.count}')
+            for name, value in sorted(self._counters.items()):
+                lines.append(f"# TYPE {prefix}_{name}_total counter")
+                lines.append(f"{prefix}_{name}_total {value}")
+        return "\n".join(lines) + "\n"
+
+
+def serve_prometheus(metrics, port, host="127.0.0.1"):
+    """
+    Serve metrics in Prometheus text format from a background thread
+
+    Args:
+        metrics: Metrics registry to expose
+        port: TCP port to listen on
+        host: Interface to bind (default: localhost only)
+
+    Returns:
+        ThreadingHTTPServer: Running server, stop it with shutdown()
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+            body = metrics.render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            # The server does not log, keep scrapes off stderr as well
+            pass
+
+    httpd = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=httpd.serve_forever, name="pdf2md-metrics", daemon=True).start()
+    return httpd
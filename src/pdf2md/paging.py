@@ -0,0 +1,65 @@
+"""
+Lazy paging of converted Markdown files
+
+A Markdown file is served in parts of about chunk_size bytes, cut at line
+ends so no line or UTF-8 character is split. The file is memory-mapped and
+only the requested part is copied out, so a 10 MB document can be read
+part by part without loading it whole.
+"""
+import os
+import mmap
+
+
+def _part_end(data, start, chunk_size):
+    end = start + chunk_size
+    if end >= len(data):
+        return len(data)
+    newline = data.rfind(b"\n", start, end)
+    if newline >= 0:
+        return newline + 1
+    # A single line longer than a part: cut before a UTF-8 continuation byte
+    while end > start + 1 and data[end] & 0xC0 == 0x80:
+        end -= 1
+    return end
+
+
+def part_offsets(data, chunk_size):
+    """
+    Compute the byte offsets where each part starts
+
+    Args:
+        data: Memory-mapped or bytes content
+        chunk_size: Target part size in bytes
+
+    Returns:
+        list: Start offsets of the parts, followed by the content length
+    """
+    offsets = [0]
+    while offsets[-1] < len(data):
+        offsets.append(_part_end(data, offsets[-1], chunk_size))
+    if len(offsets) == 1:
+        offsets.append(0)
+    return offsets
+
+
+def read_part(path, part, chunk_size):
+    """
+    Read one part of a text file
+
+    Args:
+        path: File path
+        part: 1-based part number
+        chunk_size: Target part size in bytes
+
+    Returns:
+        tuple: (text of the part, total number of parts), with None as the
+            text if the part does not exist
+    """
+    if os.path.getsize(path) == 0:
+        return ("" if part == 1 else None), 1
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        offsets = part_offsets(data, chunk_size)
+        total = len(offsets) - 1
+        if part < 1 or part > total:
+            return None, total
+        return data[offsets[part - 1]:offsets[part]].decode("utf-8", errors="replace"), total
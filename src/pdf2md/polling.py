@@ -0,0 +1,332 @@
+"""
+Adaptive polling schedule for MinerU batch results
+
+Polls start fast so small documents come back quickly, then back off
+exponentially with jitter. While pages are being extracted, the observed
+page rate is used to estimate when the next file will finish. The overall
+timeout grows with the number of pages in the batch.
+
+A single BatchPollScheduler polls every in-flight batch of the process, so
+the request volume depends on the number of active batches, not on the
+number of tool calls waiting for them.
+"""
+import time
+import random
+import asyncio
+
+# States in which a task is waiting for a worker rather than being processed
+QUEUED_STATES = ("pending", "waiting-file")
+TERMINAL_STATES = ("done", "failed")
+
+
+class AdaptivePoller:
+    """
+    Decide how long to wait before the next status poll of one batch
+
+    Args:
+        min_interval: Shortest delay between polls in seconds
+        max_interval: Longest delay between polls in seconds
+        backoff: Factor applied to the delay while nothing changes
+        jitter: Relative random spread applied to every delay
+        base_timeout: Timeout in seconds before any page count is known
+        seconds_per_page: Extra timeout granted per page in the batch
+        max_timeout: Upper bound on the timeout in seconds
+        total_pages: Pages known to be in the batch before the first poll,
+            such as page counts from preflight. Polls only ever raise it.
+    """
+
+    def __init__(self, min_interval=1.0, max_interval=30.0, backoff=1.5, jitter=0.2,
+                 base_timeout=300.0, seconds_per_page=10.0, max_timeout=6 * 3600.0, total_pages=0):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.jitter = jitter
+        self.base_timeout = base_timeout
+        self.seconds_per_page = seconds_per_page
+        self.max_timeout = max_timeout
+
+        self.started = time.monotonic()
+        self.interval = min_interval
+        self.total_pages = max(0, total_pages or 0)
+        self.polls = 0
+        self._finished = 0
+        self._last_pages = None
+        self._last_time = None
+        self._page_rate = None
+
+    @property
+    def timeout(self):
+        """Current timeout, scaled by the total page count known or seen so far"""
+        return min(self.max_timeout, self.base_timeout + self.seconds_per_page * self.total_pages)
+
+    def expired(self):
+        """Check whether the batch has exceeded its timeout"""
+        return time.monotonic() - self.started > self.timeout
+
+    def next_delay(self, extract_results=None):
+        """
+        Compute the delay before the next poll
+
+        Args:
+            extract_results: Task results from the latest poll, or None if the poll failed
+
+        Returns:
+            float: Seconds to wait
+        """
+        self.polls += 1
+        now = time.monotonic()
+
+        if extract_results is None:
+            self.interval = min(self.max_interval, self.interval * self.backoff)
+            return self._spread(self.interval)
+
+        finished = 0
+        extracted_pages = 0
+        total_pages = 0
+        remaining = []
+        for result in extract_results:
+            state = result.get("state")
+            progress = result.get("extract_progress") or {}
+            pages = _to_int(progress.get("total_pages"))
+            done_pages = _to_int(progress.get("extracted_pages"))
+            total_pages += pages
+            if state in TERMINAL_STATES:
+                finished += 1
+                extracted_pages += pages
+            elif state not in QUEUED_STATES and pages:
+                extracted_pages += done_pages
+                remaining.append(max(0, pages - done_pages))
+        self.total_pages = max(self.total_pages, total_pages)
+
+        if self._last_pages is not None and now > self._last_time and extracted_pages > self._last_pages:
+            rate = (extracted_pages - self._last_pages) / (now - self._last_time)
+            self._page_rate = rate if self._page_rate is None else 0.5 * self._page_rate + 0.5 * rate
+        self._last_pages = extracted_pages
+        self._last_time = now
+
+        if finished > self._finished:
+            # Files tend to finish in clusters, so look again soon
+            self.interval = self.min_interval
+        elif remaining and self._page_rate:
+            # Wake up around when the file closest to completion should be done
+            self.interval = min(remaining) / (self._page_rate * len(remaining))
+        else:
+            self.interval = self.interval * self.backoff
+        self._finished = finished
+
+        self.interval = max(self.min_interval, min(self.max_interval, self.interval))
+        return self._spread(self.interval)
+
+    def _spread(self, delay):
+        return max(0.0, delay * random.uniform(1 - self.jitter, 1 + self.jitter))
+
+
+class _Subscription:
+    """Latest snapshot of a batch as seen by one waiter"""
+
+    def __init__(self):
+        self.snapshot = None
+        self.version = 0
+        self.closed = False
+        self.event = asyncio.Event()
+
+    def publish(self, snapshot):
+        self.snapshot = snapshot
+        self.version += 1
+        self.event.set()
+
+    def close(self):
+        self.closed = True
+        self.event.set()
+
+
+class _BatchEntry:
+    def __init__(self, batch_id, poller):
+        self.batch_id = batch_id
+        self.poller = poller
+        self.next_poll = 0.0
+        self.in_flight = False
+        self.snapshot = None
+        self.waiters = 0
+        self.subscriptions = set()
+        self.future = asyncio.get_running_loop().create_future()
+
+
+class BatchPollScheduler:
+    """
+    Shared background poller for all in-flight batches
+
+    Each batch is polled on its own adaptive schedule, and all polls share a
+    global request budget. Every waiter on a batch receives the same
+    snapshots, and the final snapshot (or None on timeout) resolves the
+    batch's future. A batch stops being polled once nobody waits for it.
+
+    Args:
+        fetch: Coroutine function taking a batch ID and returning its task
+            results, or None if the poll failed
+        poller_factory: Callable creating an AdaptivePoller for a new batch
+        max_requests_per_second: Global budget for status requests
+    """
+
+    def __init__(self, fetch, poller_factory=AdaptivePoller, max_requests_per_second=5.0):
+        self.fetch = fetch
+        self.poller_factory = poller_factory
+        self.max_requests_per_second = max_requests_per_second
+        self.requests = 0
+        self._entries = {}
+        self._next_slot = 0.0
+        self._loop = None
+        self._wakeup = None
+        self._task = None
+        # The loop only keeps weak references to tasks, hold the running polls
+        self._poll_tasks = set()
+
+    async def wait(self, batch_id, poller=None):
+        """
+        Wait for a batch to finish
+
+        Args:
+            batch_id: Batch ID
+            poller: AdaptivePoller for the batch, used only if it is not tracked yet
+
+        Returns:
+            list: Final task results, or None on timeout
+        """
+        entry = self._attach(batch_id, poller)
+        try:
+            return await asyncio.shield(entry.future)
+        finally:
+            self._detach(entry)
+
+    async def subscribe(self, batch_id, poller=None):
+        """
+        Yield status snapshots of a batch until it finishes or times out
+
+        Args:
+            batch_id: Batch ID
+            poller: AdaptivePoller for the batch, used only if it is not tracked yet
+
+        Yields:
+            list: Task results from the latest successful poll
+        """
+        entry = self._attach(batch_id, poller)
+        subscription = _Subscription()
+        entry.subscriptions.add(subscription)
+        if entry.snapshot is not None:
+            subscription.publish(entry.snapshot)
+        if entry.future.done():
+            subscription.close()
+
+        seen = 0
+        try:
+            while True:
+                await subscription.event.wait()
+                subscription.event.clear()
+                if subscription.version > seen:
+                    seen = subscription.version
+                    yield subscription.snapshot
+                if subscription.closed:
+                    return
+        finally:
+            entry.subscriptions.discard(subscription)
+            self._detach(entry)
+
+    def _attach(self, batch_id, poller):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Entries and events are bound to the loop they were created on
+            self._loop = loop
+            self._entries = {}
+            self._wakeup = asyncio.Event()
+            self._task = None
+            self._poll_tasks = set()
+
+        entry = self._entries.get(batch_id)
+        if entry is None:
+            entry = _BatchEntry(batch_id, poller or self.poller_factory())
+            self._entries[batch_id] = entry
+        entry.waiters += 1
+
+        self._wakeup.set()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return entry
+
+    def _detach(self, entry):
+        entry.waiters -= 1
+        if entry.waiters <= 0 and self._entries.get(entry.batch_id) is entry:
+            del self._entries[entry.batch_id]
+            if not entry.future.done():
+                entry.future.cancel()
+
+    def stats(self):
+        """Return the number of tracked batches, waiters and status requests made"""
+        return {
+            "active_batches": len(self._entries),
+            "waiters": sum(entry.waiters for entry in self._entries.values()),
+            "status_requests": self.requests,
+            "max_requests_per_second": self.max_requests_per_second
+        }
+
+    async def _run(self):
+        while self._entries:
+            self._wakeup.clear()
+            now = time.monotonic()
+            due = sorted(
+                (entry for entry in self._entries.values() if not entry.in_flight and entry.next_poll <= now),
+                key=lambda entry: entry.next_poll
+            )
+            for entry in due:
+                slot = max(self._next_slot, time.monotonic())
+                self._next_slot = slot + 1.0 / self.max_requests_per_second
+                if slot > time.monotonic():
+                    await asyncio.sleep(slot - time.monotonic())
+                if self._entries.get(entry.batch_id) is not entry:
+                    continue
+                entry.in_flight = True
+                task = asyncio.create_task(self._poll(entry))
+                self._poll_tasks.add(task)
+                task.add_done_callback(self._poll_tasks.discard)
+
+            waiting = [entry.next_poll for entry in self._entries.values() if not entry.in_flight]
+            delay = max(0.0, min(waiting) - time.monotonic()) if waiting else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _poll(self, entry):
+        self.requests += 1
+        try:
+            extract_results = await self.fetch(entry.batch_id)
+        except Exception:
+            extract_results = None
+        entry.in_flight = False
+
+        if self._entries.get(entry.batch_id) is not entry:
+            return
+
+        if extract_results is not None:
+            entry.snapshot = extract_results
+            for subscription in entry.subscriptions:
+                subscription.publish(extract_results)
+
+        finished = bool(extract_results) and all(
+            result.get("state") in TERMINAL_STATES for result in extract_results
+        )
+        if finished or entry.poller.expired():
+            del self._entries[entry.batch_id]
+            if not entry.future.done():
+                entry.future.set_result(extract_results if finished else None)
+            for subscription in entry.subscriptions:
+                subscription.close()
+        else:
+            entry.next_poll = time.monotonic() + entry.poller.next_delay(extract_results)
+        self._wakeup.set()
+
+
+def _to_int(value):
+    try:
+        return int(value or 0)
+    except (TypeError, ValueError):
+        return 0
@@ -0,0 +1,136 @@
+"""
+Fast local inspection of PDF files before they are uploaded
+
+The file is memory-mapped and scanned with byte patterns, never parsed or
+read whole. This finds broken and encrypted files, estimates the page
+count, and tells whether the document has a text layer, so OCR is only
+requested for scanned documents. A document counts as having a text layer
+when most of its pages use fonts: a scan with a typed cover page or an
+OCR'd appendix still needs OCR.
+
+Objects packed into compressed object streams (PDF 1.5+) are not visible
+to a byte scan. In that case the page count and text layer are reported as
+unknown and the caller's settings are kept.
+"""
+import os
+import re
+import mmap
+
+HEADER_SEARCH_BYTES = 1024
+TRAILER_SEARCH_BYTES = 2048
+
+# Object and generation numbers are bounded and must start at a digit
+# boundary: an unanchored \d+ backtracks quadratically on long digit runs
+# (image data, padding), which froze the scan on some files
+_NUM = rb"(?<!\d)(\d{1,10})"
+_GEN = rb"\d{1,5}"
+_ENCRYPT_RE = re.compile(rb"/Encrypt\s*(?:" + _NUM + rb"\s+" + _GEN + rb"\s+R|<<)")
+_PAGES_RE = re.compile(rb"/Type\s*/Pages(?![A-Za-z])")
+_COUNT_RE = re.compile(rb"/Count\s+(\d{1,10})")
+_PAGE_RE = re.compile(rb"/Type\s*/Page(?![A-Za-z])")
+_FONT_RE = re.compile(rb"/Font\s*(?:<<|" + _NUM + rb"\s+" + _GEN + rb"\s+R)")
+_OBJ_RE = re.compile(_NUM + rb"\s+" + _GEN + rb"\s+obj(?![A-Za-z])")
+_RESOURCES_RE = re.compile(rb"/Resources\s*(?:" + _NUM + rb"\s+" + _GEN + rb"\s+R)?")
+_PARENT_RE = re.compile(rb"/Parent\s+" + _NUM + rb"\s+" + _GEN + rb"\s+R")
+
+# Share of the pages that must use fonts for the document to have a text layer
+TEXT_PAGE_SHARE = 0.5
+# Page tree levels followed up to find inherited resources
+MAX_TREE_DEPTH = 32
+
+
+def inspect_pdf(path):
+    """
+    Inspect a local PDF file
+
+    Args:
+        path: PDF file path
+
+    Returns:
+        dict: valid, error, encrypted, pages (or None if unknown), text_pages
+            (pages using fonts, or None if unknown), has_text (or None if
+            unknown) and size in bytes
+    """
+    info = {"valid": False, "error": None, "encrypted": False, "pages": None, "text_pages": None,
+            "has_text": None, "size": 0}
+    try:
+        info["size"] = os.path.getsize(path)
+        if info["size"] == 0:
+            info["error"] = "File is empty"
+            return info
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return _inspect(data, info)
+    except (OSError, ValueError) as e:
+        info["error"] = f"Unable to read file: {e}"
+        return info
+
+
+def _inspect(data, info):
+    if data.find(b"%PDF-", 0, HEADER_SEARCH_BYTES) < 0:
+        info["error"] = "Not a PDF file (missing %PDF header)"
+        return info
+    if data.rfind(b"%%EOF", max(0, len(data) - TRAILER_SEARCH_BYTES)) < 0:
+        info["error"] = "PDF file is truncated (missing %%EOF marker)"
+        return info
+    if _ENCRYPT_RE.search(data):
+        info["encrypted"] = True
+        info["error"] = "PDF file is encrypted"
+        return info
+
+    info["valid"] = True
+    info["pages"] = _page_count(data)
+    if data.find(b"/ObjStm") < 0:
+        page_objects, text_pages = _text_pages(data)
+        if page_objects:
+            info["text_pages"] = text_pages
+            info["has_text"] = text_pages > page_objects * TEXT_PAGE_SHARE
+    return info
+
+
+def _text_pages(data):
+    # Count the page objects, and those whose resources (their own or
+    # inherited from the page tree) include fonts
+    objects = {}
+    for match in _OBJ_RE.finditer(data):
+        end = data.find(b"endobj", match.end())
+        objects[int(match.group(1))] = (match.end(), end if end >= 0 else len(data))
+    pages = 0
+    text_pages = 0
+    for start, end in objects.values():
+        if _PAGE_RE.search(data, start, end):
+            pages += 1
+            if _uses_fonts(data, objects, start, end):
+                text_pages += 1
+    return pages, text_pages
+
+
+def _uses_fonts(data, objects, start, end):
+    for _ in range(MAX_TREE_DEPTH):
+        if _FONT_RE.search(data, start, end):
+            return True
+        resources = _RESOURCES_RE.search(data, start, end)
+        if resources:
+            span = objects.get(int(resources.group(1))) if resources.group(1) else None
+            return bool(span and _FONT_RE.search(data, *span))
+        parent = _PARENT_RE.search(data, start, end)
+        if not parent or int(parent.group(1)) not in objects:
+            return False
+        start, end = objects[int(parent.group(1))]
+    return False
+
+
+def _page_count(data):
+    # The root page tree node holds the largest /Count
+    counts = []
+    for match in _PAGES_RE.finditer(data):
+        start = data.rfind(b"<<", max(0, match.start() - 512), match.start())
+        end = data.find(b">>", match.end(), match.end() + 512)
+        if start < 0 or end < 0:
+            continue
+        count = _COUNT_RE.search(data, start, end)
+        if count:
+            counts.append(int(count.group(1)))
+    if counts:
+        return max(counts)
+    pages = sum(1 for _ in _PAGE_RE.finditer(data))
+    return pages or None
@@ -0,0 +1,204 @@
+"""
+Client-side rate limiting and circuit breaking per MinerU endpoint
+
+Every endpoint (batch submission, upload links, status polls, uploads and
+result downloads) gets a token bucket and a circuit breaker shared by all
+tool calls. A 429 or 503 with Retry-After pauses the bucket so no request
+to that endpoint goes out before the server asked, instead of each caller
+retrying on its own. After repeated server errors or network failures the
+circuit opens and requests fail immediately until a probe succeeds.
+"""
+import time
+import asyncio
+from email.utils import parsedate_to_datetime
+
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_OPEN = "open"
+CIRCUIT_HALF_OPEN = "half_open"
+
+# Status codes that mean the endpoint itself is unhealthy
+FAILURE_STATUS_CODES = (500, 502, 503, 504)
+# Status codes that ask the client to slow down
+THROTTLE_STATUS_CODES = (429, 503)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request while an endpoint's circuit is open"""
+
+    def __init__(self, endpoint, retry_in):
+        super().__init__(f"MinerU {endpoint} endpoint is unavailable, retry in {retry_in:.0f}s")
+        self.endpoint = endpoint
+        self.retry_in = retry_in
+
+
+def parse_retry_after(value):
+    """
+    Parse a Retry-After header
+
+    Args:
+        value: Header value, either seconds or an HTTP date
+
+    Returns:
+        float: Seconds to wait, or None if the header is missing or invalid
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """
+    Token bucket that spaces requests to a steady rate with bursts
+
+    Args:
+        rate: Tokens added per second, 0 for no limit
+        burst: Maximum number of tokens
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def reserve(self):
+        """Take one token and return how long the caller must wait before using it"""
+        now = time.monotonic()
+        pause = max(0.0, self.paused_until - now)
+        if self.rate <= 0:
+            return pause
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        return max(wait, pause)
+
+    def pause(self, seconds):
+        """Hold back every request for the given number of seconds"""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker counting consecutive failures
+
+    Args:
+        failure_threshold: Consecutive failures that open the circuit
+        reset_timeout: Seconds the circuit stays open before a probe is let through
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.state = CIRCUIT_CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_started = None
+
+    def retry_in(self):
+        """Seconds until an open circuit lets a probe through"""
+        return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+
+    def allow(self):
+        """Check whether a request may be sent, moving to half-open when the timeout has passed"""
+        now = time.monotonic()
+        if self.state == CIRCUIT_OPEN and self.retry_in() <= 0:
+            self.state = CIRCUIT_HALF_OPEN
+            self._probe_started = None
+        if self.state == CIRCUIT_HALF_OPEN:
+            # Only one probe at a time, unless the last one never reported back
+            if self._probe_started is not None and now - self._probe_started < self.reset_timeout:
+                return False
+            self._probe_started = now
+            return True
+        return self.state == CIRCUIT_CLOSED
+
+    def record_success(self):
+        self.state = CIRCUIT_CLOSED
+        self.failures = 0
+        self._probe_started = None
+
+    def record_failure(self):
+        self.failures += 1
+        self._probe_started = None
+        if self.state == CIRCUIT_HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = CIRCUIT_OPEN
+            self.opened_at = time.monotonic()
+
+
+class EndpointGuard:
+    """
+    Token bucket and circuit breaker of one endpoint
+
+    Args:
+        name: Endpoint name used in errors and stats
+        rate: Requests per second, 0 for no limit
+        burst: Requests allowed at once before spacing kicks in
+        failure_threshold: Consecutive failures that open the circuit
+        reset_timeout: Seconds the circuit stays open
+        default_backoff: Pause in seconds after a 429 without Retry-After
+    """
+
+    def __init__(self, name, rate=10.0, burst=10.0, failure_threshold=5, reset_timeout=30.0, default_backoff=1.0):
+        self.name = name
+        self.bucket = TokenBucket(rate, burst)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.default_backoff = default_backoff
+        self.requests = 0
+        self.throttled = 0
+        self.rejected = 0
+        self.failures = 0
+
+    async def acquire(self):
+        """
+        Wait until a request may be sent to the endpoint
+
+        Raises:
+            CircuitOpenError: The circuit is open
+        """
+        if not self.breaker.allow():
+            self.rejected += 1
+            raise CircuitOpenError(self.name, self.breaker.retry_in())
+        delay = self.bucket.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        self.requests += 1
+
+    def record_response(self, response):
+        """Update the bucket and the circuit from a response"""
+        status_code = response.status_code
+        if status_code in THROTTLE_STATUS_CODES:
+            self.throttled += 1
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            if retry_after is not None or status_code == 429:
+                self.bucket.pause(retry_after if retry_after is not None else self.default_backoff)
+        if status_code in FAILURE_STATUS_CODES:
+            self.record_failure()
+        else:
+            self.breaker.record_success()
+
+    def record_failure(self):
+        """Count a server error or a failed connection against the circuit"""
+        self.failures += 1
+        self.breaker.record_failure()
+
+    def stats(self):
+        """Return the limiter and circuit state of the endpoint"""
+        return {
+            "circuit": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+            "retry_in_seconds": round(self.breaker.retry_in(), 1) if self.breaker.state == CIRCUIT_OPEN else 0,
+            "paused_seconds": round(max(0.0, self.bucket.paused_until - time.monotonic()), 1),
+            "requests": self.requests,
+            "throttled": self.throttled,
+            "rejected": self.rejected,
+            "failures": self.failures
+        }
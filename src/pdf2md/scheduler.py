@@ -0,0 +1,245 @@
+"""
+Priority and fair-share scheduling of batch submissions
+
+Every MinerU batch of the process asks the BatchScheduler for a slot before
+it is submitted. Waiting batches are granted in order of priority class,
+and within a class by fair queuing over clients: the client that has been
+granted the fewest pages goes next, so one client's large dump cannot hold
+back another client's single document. Bulk and normal batches that have
+waited long enough are promoted one class at a time so they never starve.
+Granted batches count against a cap on the pages in flight at MinerU.
+"""
+import time
+import asyncio
+import itertools
+import contextlib
+from collections import deque
+
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_NORMAL = "normal"
+PRIORITY_BULK = "bulk"
+# Priority classes, most urgent first
+PRIORITIES = (PRIORITY_INTERACTIVE, PRIORITY_NORMAL, PRIORITY_BULK)
+
+# Pages assumed for a document whose page count is unknown, such as a URL
+DEFAULT_DOCUMENT_PAGES = 10
+
+
+def document_pages(pages, data_id):
+    """Get the page count of a document, or the default if it is unknown"""
+    return pages.get(data_id) or DEFAULT_DOCUMENT_PAGES
+
+
+def pack_batches(items, pages, batch_size, batch_pages=0):
+    """
+    Group file entries into batches bounded by file count and page count
+
+    Entries are packed in the given order, so with the longest documents
+    first each of them fills a batch of its own and the short ones share the
+    last batches. A document longer than batch_pages gets a batch to itself.
+
+    Args:
+        items: File entries, each with a data_id
+        pages: Page counts by data ID, missing for unknown counts
+        batch_size: Maximum entries per batch
+        batch_pages: Maximum pages per batch, 0 for no limit
+
+    Returns:
+        list: Lists of entries, one per batch
+    """
+    batches = []
+    batch = []
+    batch_total = 0
+    for item in items:
+        item_pages = document_pages(pages, item["data_id"])
+        if batch and (len(batch) >= batch_size or (batch_pages > 0 and batch_total + item_pages > batch_pages)):
+            batches.append(batch)
+            batch, batch_total = [], 0
+        batch.append(item)
+        batch_total += item_pages
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+class _Request:
+    __slots__ = ("client", "priority", "pages", "enqueued", "seq", "future")
+
+    def __init__(self, client, priority, pages, seq):
+        self.client = client
+        self.priority = priority
+        self.pages = pages
+        self.enqueued = time.monotonic()
+        self.seq = seq
+        self.future = asyncio.get_running_loop().create_future()
+
+
+class BatchScheduler:
+    """
+    Admission control for batch submissions with priorities and fairness
+
+    Args:
+        max_inflight_pages: Pages allowed in flight at once, 0 for no limit.
+            A batch larger than the cap is still admitted when nothing else
+            is in flight.
+        max_inflight_batches: Batches allowed in flight at once, 0 for no limit
+        aging_seconds: Wait after which a batch is promoted one priority
+            class, 0 disables promotion
+    """
+
+    def __init__(self, max_inflight_pages=2000, max_inflight_batches=8, aging_seconds=120.0):
+        self.max_inflight_pages = max_inflight_pages
+        self.max_inflight_batches = max_inflight_batches
+        self.aging_seconds = aging_seconds
+        self.inflight_pages = 0
+        self.inflight_batches = 0
+        self.granted = 0
+        self._queues = {priority: {} for priority in PRIORITIES}
+        self._served = {}
+        self._seq = itertools.count()
+        self._waits = {priority: [0, 0.0, 0.0] for priority in PRIORITIES}
+
+    @contextlib.asynccontextmanager
+    async def slot(self, client, priority, pages):
+        """
+        Hold a slot for one batch while the block runs
+
+        Args:
+            client: Key of the client the batch is submitted for
+            priority: Priority class from PRIORITIES
+            pages: Pages in the batch, counted against the in-flight cap
+
+        Yields:
+            float: Seconds the batch waited for its slot
+        """
+        waited = await self.acquire(client, priority, pages)
+        try:
+            yield waited
+        finally:
+            self.release(pages)
+
+    async def acquire(self, client, priority, pages):
+        """
+        Wait until a batch may be submitted; release must be called after it
+
+        Returns:
+            float: Seconds the batch waited
+        """
+        if priority not in self._queues:
+            priority = PRIORITY_NORMAL
+        if not self._waiting(client):
+            # A client that was idle starts level with the busiest waiting
+            # ones instead of catching up on the share it did not use
+            active = [self._served[c] for c in self._active_clients() if c in self._served]
+            self._served[client] = max(self._served.get(client, 0), min(active, default=0))
+        request = _Request(client, priority, max(0, pages), next(self._seq))
+        self._queues[priority].setdefault(client, deque()).append(request)
+        self._dispatch()
+
+        try:
+            await request.future
+        except asyncio.CancelledError:
+            if request.future.done() and not request.future.cancelled():
+                self.release(request.pages)
+            else:
+                self._discard(request)
+                self._dispatch()
+            raise
+
+        waited = time.monotonic() - request.enqueued
+        stats = self._waits[priority]
+        stats[0] += 1
+        stats[1] += waited
+        stats[2] = max(stats[2], waited)
+        return waited
+
+    def release(self, pages):
+        """Give back the slot of a finished batch"""
+        self.inflight_batches = max(0, self.inflight_batches - 1)
+        self.inflight_pages = max(0, self.inflight_pages - max(0, pages))
+        self._dispatch()
+
+    def _waiting(self, client):
+        return any(client in queues for queues in self._queues.values())
+
+    def _active_clients(self):
+        return {client for queues in self._queues.values() for client in queues}
+
+    def _discard(self, request):
+        queue = self._queues[request.priority].get(request.client)
+        if queue is not None and request in queue:
+            queue.remove(request)
+            if not queue:
+                del self._queues[request.priority][request.client]
+
+    def _rank(self, request, now):
+        rank = PRIORITIES.index(request.priority)
+        if self.aging_seconds > 0:
+            rank -= int((now - request.enqueued) // self.aging_seconds)
+        return max(0, rank)
+
+    def _next(self):
+        now = time.monotonic()
+        best = None
+        best_key = None
+        for queues in self._queues.values():
+            for client, queue in queues.items():
+                request = queue[0]
+                key = (self._rank(request, now), self._served.get(client, 0), request.seq)
+                if best_key is None or key < best_key:
+                    best, best_key = request, key
+        return best
+
+    def _fits(self, request):
+        if self.max_inflight_batches > 0 and self.inflight_batches >= self.max_inflight_batches:
+            return False
+        if self.max_inflight_pages > 0 and self.inflight_batches > 0:
+            return self.inflight_pages + request.pages <= self.max_inflight_pages
+        return True
+
+    def _dispatch(self):
+        while True:
+            request = self._next()
+            if request is None:
+                # Nobody is waiting, so fair shares start over
+                self._served.clear()
+                return
+            if request.future.done():
+                self._discard(request)
+                continue
+            # The head is not overtaken by smaller batches, so large ones cannot starve
+            if not self._fits(request):
+                return
+            self._discard(request)
+            self.inflight_batches += 1
+            self.inflight_pages += request.pages
+            self.granted += 1
+            self._served[request.client] = self._served.get(request.client, 0) + request.pages
+            request.future.set_result(None)
+
+    def stats(self):
+        """Return queue depth, in-flight load and wait times by priority class"""
+        now = time.monotonic()
+        waiting = [request for queues in self._queues.values() for queue in queues.values() for request in queue]
+        return {
+            "queued_batches": len(waiting),
+            "queued_pages": sum(request.pages for request in waiting),
+            "queued_by_priority": {
+                priority: sum(len(queue) for queue in self._queues[priority].values()) for priority in PRIORITIES
+            },
+            "waiting_clients": len(self._active_clients()),
+            "oldest_wait_seconds": round(max((now - request.enqueued for request in waiting), default=0.0), 3),
+            "inflight_batches": self.inflight_batches,
+            "inflight_pages": self.inflight_pages,
+            "max_inflight_batches": self.max_inflight_batches,
+            "max_inflight_pages": self.max_inflight_pages,
+            "granted_batches": self.granted,
+            "wait_seconds": {
+                priority: {
+                    "count": count,
+                    "avg": round(total / count, 3) if count else 0.0,
+                    "max": round(longest, 3)
+                }
+                for priority, (count, total, longest) in self._waits.items()
+            }
+        }
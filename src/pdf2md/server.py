@@ -1,14 +1,40 @@
 import os
+import sys
 import json
 import time
+import socket
+import random
 import asyncio
 import httpx
 import re
+import shutil
 import logging
 from pathlib import Path
+from urllib.parse import urlparse, quote, unquote
 from dotenv import load_dotenv
 from typing import Optional, List, Dict, Any
-from mcp.server.fastmcp import FastMCP
+from contextlib import asynccontextmanager
+from mcp.server.fastmcp import FastMCP, Context
+
+from .cache import ConversionCache, copy_result_dir, hash_file, make_cache_key
+from .polling import AdaptivePoller, BatchPollScheduler, QUEUED_STATES, TERMINAL_STATES
+from .client import ConnectionStats, create_http_client
+from .metrics import Metrics, serve_prometheus
+from .ratelimit import EndpointGuard, CircuitOpenError
+from .preflight import inspect_pdf
+from .splitting import splitting_available, split_pdf, stitch_chunks, remove_chunk_files
+from .paging import read_part
+from .index import ChunkIndex
+from .scheduler import BatchScheduler, PRIORITIES, PRIORITY_INTERACTIVE, PRIORITY_NORMAL, PRIORITY_BULK, pack_batches, document_pages
+from .workqueue import WorkQueue, QUEUE_QUEUED, QUEUE_LEASED, QUEUE_FAILED
+from .sync import (
+    SyncManifest, scan_files, has_glob, split_glob, glob_to_regex,
+    SYNC_SUBMITTED, SYNC_CONVERTED, SYNC_FAILED
+)
+from .jobs import (
+    JobStore, new_job_id, FILE_QUEUED, FILE_SUBMITTED, FILE_DONE, FILE_DOWNLOADED, FILE_FAILED,
+    BATCH_SUBMITTED, BATCH_FINISHED, BATCH_TIMEOUT, JOB_RUNNING, JOB_PARTIAL, JOB_FAILED
+)
 
 # Set up logging - disable all log output
 logging.basicConfig(
@@ -29,8 +55,118 @@ MINERU_BATCH_API = os.environ.get("MINERU_BATCH_API", "https://mineru.net/api/v4
 MINERU_BATCH_RESULTS_API = os.environ.get("MINERU_BATCH_RESULTS_API", "https://mineru.net/api/v4/extract-results/batch")
 MINERU_FILE_URLS_API = os.environ.get("MINERU_FILE_URLS_API", "https://mineru.net/api/v4/file-urls/batch")
 
+# HTTP client configuration
+HTTP_MAX_CONNECTIONS = int(os.environ.get("PDF2MD_HTTP_MAX_CONNECTIONS", "20"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.environ.get("PDF2MD_HTTP_MAX_KEEPALIVE_CONNECTIONS", "10"))
+HTTP_KEEPALIVE_EXPIRY = float(os.environ.get("PDF2MD_HTTP_KEEPALIVE_EXPIRY", "60"))
+HTTP2_ENABLED = os.environ.get("PDF2MD_HTTP2", "true").lower() not in ("0", "false", "no")
+
+# Conversion cache configuration
+CACHE_ENABLED = os.environ.get("PDF2MD_CACHE_ENABLED", "true").lower() not in ("0", "false", "no")
+CACHE_DIR = os.environ.get("PDF2MD_CACHE_DIR", "")
+CACHE_MAX_SIZE_MB = float(os.environ.get("PDF2MD_CACHE_MAX_SIZE_MB", "2048"))
+CACHE_MAX_AGE_DAYS = float(os.environ.get("PDF2MD_CACHE_MAX_AGE_DAYS", "30"))
+
+# Upload configuration
+UPLOAD_CHUNK_SIZE = int(os.environ.get("PDF2MD_UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+UPLOAD_CONCURRENCY = int(os.environ.get("PDF2MD_UPLOAD_CONCURRENCY", "4"))
+UPLOAD_MAX_RETRIES = int(os.environ.get("PDF2MD_UPLOAD_MAX_RETRIES", "3"))
+
+# Batch configuration
+MAX_BATCH_SIZE = int(os.environ.get("PDF2MD_MAX_BATCH_SIZE", "200"))
+BATCH_SUBMIT_CONCURRENCY = int(os.environ.get("PDF2MD_BATCH_SUBMIT_CONCURRENCY", "2"))
+BATCH_MAX_PAGES = int(os.environ.get("PDF2MD_BATCH_MAX_PAGES", "500"))
+
+# Batch scheduler configuration: priorities, fair sharing between clients and in-flight caps (0 disables a cap)
+MAX_INFLIGHT_PAGES = int(os.environ.get("PDF2MD_MAX_INFLIGHT_PAGES", "2000"))
+MAX_INFLIGHT_BATCHES = int(os.environ.get("PDF2MD_MAX_INFLIGHT_BATCHES", "8"))
+PRIORITY_AGING_SECONDS = float(os.environ.get("PDF2MD_PRIORITY_AGING_SECONDS", "120"))
+
+# Page-range splitting configuration (0 disables splitting)
+SPLIT_PAGES = int(os.environ.get("PDF2MD_SPLIT_PAGES", "0"))
+
+# Download configuration
+DOWNLOAD_CONCURRENCY = int(os.environ.get("PDF2MD_DOWNLOAD_CONCURRENCY", "4"))
+
+# Extraction configuration: which archive members are unpacked, and whether the archive is kept
+EXTRACT_PROFILES = ("markdown", "markdown_images", "all")
+EXTRACT_PROFILE = os.environ.get("PDF2MD_EXTRACT_PROFILE", "all").lower()
+if EXTRACT_PROFILE not in EXTRACT_PROFILES:
+    EXTRACT_PROFILE = "all"
+KEEP_ARCHIVE = os.environ.get("PDF2MD_KEEP_ARCHIVE", "false").lower() in ("1", "true", "yes")
+ARCHIVE_NAME = ".pdf2md_archive.zip"
+
+# Search index configuration: Markdown is chunked and indexed as it is extracted
+INDEX_ENABLED = os.environ.get("PDF2MD_INDEX_ENABLED", "false").lower() in ("1", "true", "yes")
+INDEX_DB_PATH = os.environ.get("PDF2MD_INDEX_DB", "")
+INDEX_CHUNK_CHARS = int(os.environ.get("PDF2MD_INDEX_CHUNK_CHARS", "1500"))
+
+# Size in bytes of the parts Markdown resources are served in
+RESOURCE_PART_SIZE = int(os.environ.get("PDF2MD_RESOURCE_PART_SIZE", str(64 * 1024)))
+
+# Polling configuration
+POLL_MIN_INTERVAL = float(os.environ.get("PDF2MD_POLL_MIN_INTERVAL", "1"))
+POLL_MAX_INTERVAL = float(os.environ.get("PDF2MD_POLL_MAX_INTERVAL", "30"))
+POLL_BASE_TIMEOUT = float(os.environ.get("PDF2MD_POLL_BASE_TIMEOUT", "300"))
+POLL_SECONDS_PER_PAGE = float(os.environ.get("PDF2MD_POLL_SECONDS_PER_PAGE", "10"))
+POLL_MAX_TIMEOUT = float(os.environ.get("PDF2MD_POLL_MAX_TIMEOUT", "21600"))
+POLL_MAX_REQUESTS_PER_SECOND = float(os.environ.get("PDF2MD_POLL_MAX_REQUESTS_PER_SECOND", "5"))
+
+# Job store configuration
+JOB_DB_PATH = os.environ.get("PDF2MD_JOB_DB", "")
+
+# Rate limit and circuit breaker configuration, per endpoint (0 disables the rate limit)
+API_RATE_LIMIT = float(os.environ.get("PDF2MD_API_RATE_LIMIT", "10"))
+API_BURST = float(os.environ.get("PDF2MD_API_BURST", "10"))
+TRANSFER_RATE_LIMIT = float(os.environ.get("PDF2MD_TRANSFER_RATE_LIMIT", "0"))
+CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get("PDF2MD_CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_RESET_TIMEOUT = float(os.environ.get("PDF2MD_CIRCUIT_RESET_TIMEOUT", "30"))
+
+# Directory sync configuration
+MANIFEST_DB_PATH = os.environ.get("PDF2MD_MANIFEST_DB", "")
+HASH_CONCURRENCY = int(os.environ.get("PDF2MD_HASH_CONCURRENCY", "4"))
+
+# Worker queue configuration: with the queue enabled, conversions are run by worker processes
+QUEUE_ENABLED = os.environ.get("PDF2MD_QUEUE_ENABLED", "false").lower() in ("1", "true", "yes")
+QUEUE_DB_PATH = os.environ.get("PDF2MD_QUEUE_DB", "")
+QUEUE_LEASE_SECONDS = float(os.environ.get("PDF2MD_QUEUE_LEASE_SECONDS", "60"))
+QUEUE_MAX_ATTEMPTS = int(os.environ.get("PDF2MD_QUEUE_MAX_ATTEMPTS", "3"))
+QUEUE_POLL_INTERVAL = float(os.environ.get("PDF2MD_QUEUE_POLL_INTERVAL", "1"))
+WORKER_CONCURRENCY = int(os.environ.get("PDF2MD_WORKER_CONCURRENCY", "2"))
+
+# Seconds a finished URL conversion is reused for identical requests (0 disables it)
+URL_RESULT_MEMO_SECONDS = float(os.environ.get("PDF2MD_URL_RESULT_MEMO_SECONDS", "300"))
+
+# Metrics configuration (0 disables the Prometheus endpoint)
+METRICS_PORT = int(os.environ.get("PDF2MD_METRICS_PORT", "0"))
+METRICS_HOST = os.environ.get("PDF2MD_METRICS_HOST", "127.0.0.1")
+
+# Batch-level conversion options sent with every request
+CONVERSION_OPTIONS = {
+    "enable_formula": True,
+    "language": "auto",
+    "layout_model": "doclayout_yolo",
+    "enable_table": True
+}
+
 # Global variables
 OUTPUT_DIR = "./downloads"
+_conversion_cache = None
+_job_store = None
+_chunk_index = None
+_work_queue = None
+_sync_manifest = None
+_worker_processes = []
+_job_tasks = {}
+_output_dir_claims = {}
+_url_flights = {}
+_poll_scheduler = None
+_batch_scheduler = None
+_http_client = None
+_connection_stats = ConnectionStats()
+_metrics = Metrics()
+_endpoint_guards = {}
+_metrics_server = None
 
 # API authentication headers
 HEADERS = {
@@ -44,6 +180,214 @@ def set_output_dir(output_dir: str):
     # Normalize path to handle Unicode characters properly
     OUTPUT_DIR = os.path.normpath(output_dir)
 
+def set_queue_enabled(enabled: bool):
+    """Send conversions to worker processes through the queue instead of running them here"""
+    global QUEUE_ENABLED
+    QUEUE_ENABLED = enabled
+
+def get_http_client():
+    """
+    Get the process-wide pooled HTTP client, creating it on first use
+    
+    Returns:
+        httpx.AsyncClient: Shared client instance
+    """
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = create_http_client(
+            _connection_stats,
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+            http2=HTTP2_ENABLED
+        )
+    return _http_client
+
+async def close_http_client():
+    """Close the shared HTTP client and its connection pool"""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+def get_connection_stats():
+    """Return request and connection reuse counters of the shared client"""
+    return _connection_stats.as_dict()
+
+def get_endpoint_guard(endpoint):
+    """
+    Get the shared rate limiter and circuit breaker of an endpoint
+    
+    Args:
+        endpoint: "batch", "file_urls" or "batch_results" for the MinerU API,
+            "upload" or "download" for file transfers
+        
+    Returns:
+        EndpointGuard: Guard shared by all tool calls
+    """
+    guard = _endpoint_guards.get(endpoint)
+    if guard is None:
+        rate = TRANSFER_RATE_LIMIT if endpoint in ("upload", "download") else API_RATE_LIMIT
+        guard = EndpointGuard(
+            endpoint,
+            rate=rate,
+            burst=API_BURST,
+            failure_threshold=CIRCUIT_FAILURE_THRESHOLD,
+            reset_timeout=CIRCUIT_RESET_TIMEOUT
+        )
+        _endpoint_guards[endpoint] = guard
+    return guard
+
+async def guarded_request(endpoint, send, max_throttle_retries=2):
+    """
+    Send a request through the rate limiter and circuit breaker of an endpoint
+    
+    A request answered with 429 (or 503 with Retry-After) is sent again once
+    the endpoint's pause is over, at most max_throttle_retries times.
+    
+    Args:
+        endpoint: Endpoint name, see get_endpoint_guard
+        send: Callable returning the request coroutine
+        max_throttle_retries: Resends of a throttled request
+        
+    Returns:
+        httpx.Response: Response of the request
+        
+    Raises:
+        CircuitOpenError: The endpoint's circuit is open
+    """
+    guard = get_endpoint_guard(endpoint)
+    for attempt in range(max_throttle_retries + 1):
+        await guard.acquire()
+        try:
+            response = await send()
+        except httpx.TransportError as e:
+            guard.record_failure()
+            raise
+        guard.record_response(response)
+        throttled = response.status_code == 429 or (
+            response.status_code == 503 and "Retry-After" in response.headers
+        )
+        if not throttled:
+            break
+    return response
+
+def get_endpoint_stats():
+    """Return the limiter and circuit state of every endpoint used so far"""
+    return {endpoint: guard.stats() for endpoint, guard in sorted(_endpoint_guards.items())}
+
+def get_metrics():
+    """Return phase timings and counters of the conversion pipeline"""
+    return _metrics.snapshot()
+
+def start_metrics_server(port=None, host=None):
+    """
+    Expose the metrics in Prometheus text format over HTTP
+    
+    Args:
+        port: TCP port to listen on (default: METRICS_PORT)
+        host: Interface to bind (default: METRICS_HOST)
+        
+    Returns:
+        bool: Whether the endpoint is running
+    """
+    global _metrics_server
+    port = port or METRICS_PORT
+    if _metrics_server is None and port:
+        try:
+            _metrics_server = serve_prometheus(_metrics, port, host or METRICS_HOST)
+        except OSError as e:
+            return False
+    return _metrics_server is not None
+
+def get_conversion_cache():
+    """
+    Get the conversion cache for the current output directory
+    
+    Expired and excess entries are evicted when the cache is opened, so the
+    limits apply even while nothing new is added.
+
+    Returns:
+        ConversionCache: Cache instance, or None if caching is disabled
+    """
+    global _conversion_cache
+    if not CACHE_ENABLED:
+        return None
+    cache_dir = CACHE_DIR or os.path.join(OUTPUT_DIR, ".pdf2md_cache")
+    if _conversion_cache is None or _conversion_cache.cache_dir != cache_dir:
+        _conversion_cache = ConversionCache(
+            cache_dir,
+            max_bytes=int(CACHE_MAX_SIZE_MB * 1024 * 1024),
+            max_age_seconds=CACHE_MAX_AGE_DAYS * 24 * 3600
+        )
+        _conversion_cache.evict()
+    return _conversion_cache
+
+def get_job_store():
+    """
+    Get the job store for the current output directory
+    
+    Returns:
+        JobStore: Job store instance
+    """
+    global _job_store
+    db_path = JOB_DB_PATH or os.path.join(OUTPUT_DIR, ".pdf2md_jobs.db")
+    if _job_store is None or _job_store.db_path != db_path:
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        _job_store = JobStore(db_path)
+    return _job_store
+
+def get_chunk_index():
+    """
+    Get the search index for the current output directory
+    
+    Returns:
+        ChunkIndex: Index instance, or None if indexing is disabled
+    """
+    global _chunk_index
+    if not INDEX_ENABLED:
+        return None
+    db_path = INDEX_DB_PATH or os.path.join(OUTPUT_DIR, ".pdf2md_index.db")
+    if _chunk_index is None or _chunk_index.db_path != db_path:
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        _chunk_index = ChunkIndex(db_path, chunk_chars=INDEX_CHUNK_CHARS)
+    return _chunk_index
+
+def get_work_queue():
+    """
+    Get the worker queue for the current output directory
+    
+    Returns:
+        WorkQueue: Queue instance
+    """
+    global _work_queue
+    db_path = QUEUE_DB_PATH or os.path.join(OUTPUT_DIR, ".pdf2md_queue.db")
+    if _work_queue is None or _work_queue.db_path != db_path:
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        _work_queue = WorkQueue(db_path, max_attempts=QUEUE_MAX_ATTEMPTS)
+    return _work_queue
+
+def get_sync_manifest():
+    """
+    Get the directory sync manifest for the current output directory
+    
+    Returns:
+        SyncManifest: Manifest instance
+    """
+    global _sync_manifest
+    db_path = MANIFEST_DB_PATH or os.path.join(OUTPUT_DIR, ".pdf2md_manifest.db")
+    if _sync_manifest is None or _sync_manifest.db_path != db_path:
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        _sync_manifest = SyncManifest(db_path)
+    return _sync_manifest
+
+def record_job_state(method, *args, **kwargs):
+    """Call a JobStore method, ignoring storage errors so conversions are never interrupted"""
+    try:
+        return getattr(get_job_store(), method)(*args, **kwargs)
+    except Exception as e:
+        return None
+
 def print_task_status(extract_results):
     """
     Print task status and check if all tasks are completed
@@ -57,268 +401,2041 @@ def print_task_status(extract_results):
     all_done = True
     any_done = False
     
-    for i, result in enumerate(extract_results):
-        current_status = result.get("state", "")
-        file_name = result.get("file_name", "")
-        
-        status_icon = "✅" if current_status == "done" else "⏳"
-        
-        if current_status == "done":
+    for result in extract_results:
+        if result.get("state", "") == "done":
             any_done = True
         else:
             all_done = False
     
     return all_done, any_done
 
-async def check_task_status(client, batch_id, max_retries=60, sleep_seconds=5):
+def is_finished(extract_results):
+    """Check whether every task in a batch has reached a terminal state"""
+    return bool(extract_results) and all(
+        result.get("state") in TERMINAL_STATES for result in extract_results
+    )
+
+def make_poller(total_pages=0):
+    """
+    Create an adaptive poller from the configured polling settings
+    
+    Args:
+        total_pages: Pages known to be in the batch before it is first polled (optional)
+        
+    Returns:
+        AdaptivePoller: New poller
+    """
+    return AdaptivePoller(
+        min_interval=POLL_MIN_INTERVAL,
+        max_interval=POLL_MAX_INTERVAL,
+        base_timeout=POLL_BASE_TIMEOUT,
+        seconds_per_page=POLL_SECONDS_PER_PAGE,
+        max_timeout=POLL_MAX_TIMEOUT,
+        total_pages=total_pages
+    )
+
+async def fetch_batch_status(batch_id):
+    """
+    Fetch the current task results of a batch
+    
+    Args:
+        batch_id: Batch ID
+        
+    Returns:
+        list: Task results, or None if the request failed
+    """
+    _metrics.inc("status_polls")
+    status_response = await guarded_request("batch_results", lambda: get_http_client().get(
+        f"{MINERU_BATCH_RESULTS_API}/{batch_id}",
+        headers=HEADERS,
+        timeout=60.0  
+    ))
+    
+    if status_response.status_code != 200:
+        _metrics.inc("status_poll_errors")
+        return None
+    
+    status_data = status_response.json()
+    extract_results = status_data.get("data", {}).get("extract_result", [])
+    print_task_status(extract_results)
+    return extract_results
+
+def get_poll_scheduler():
+    """Get the process-wide scheduler polling all in-flight batches"""
+    global _poll_scheduler
+    if _poll_scheduler is None:
+        _poll_scheduler = BatchPollScheduler(
+            fetch_batch_status,
+            poller_factory=make_poller,
+            max_requests_per_second=POLL_MAX_REQUESTS_PER_SECOND
+        )
+    return _poll_scheduler
+
+def get_batch_scheduler():
+    """Get the process-wide scheduler admitting batch submissions"""
+    global _batch_scheduler
+    if _batch_scheduler is None:
+        _batch_scheduler = BatchScheduler(
+            max_inflight_pages=MAX_INFLIGHT_PAGES,
+            max_inflight_batches=MAX_INFLIGHT_BATCHES,
+            aging_seconds=PRIORITY_AGING_SECONDS
+        )
+    return _batch_scheduler
+
+def client_key(ctx):
+    """Identify the MCP client of a request for fair sharing, by client ID or session"""
+    if ctx is None:
+        return "local"
+    try:
+        return ctx.client_id or f"session_{id(ctx.session)}"
+    except Exception as e:
+        return "local"
+
+def resolve_priority(priority, documents):
+    """
+    Pick the priority class of a conversion
+    
+    Args:
+        priority: Requested class from PRIORITIES, or None to choose by size
+        documents: Number of documents in the conversion
+        
+    Returns:
+        str: Priority class, or None if the requested one is unknown
+    """
+    if not priority:
+        return PRIORITY_INTERACTIVE if documents == 1 else PRIORITY_NORMAL
+    priority = priority.lower()
+    return priority if priority in PRIORITIES else None
+
+async def watch_batch(batch_id, poller=None):
+    """
+    Yield each status snapshot of a batch until every task has finished
+    
+    Polling is done by the shared poll scheduler, so concurrent callers
+    waiting on the same batch do not multiply status requests.
+    
+    Args:
+        batch_id: Batch ID
+        poller: AdaptivePoller deciding poll delays and the timeout (optional)
+        
+    Yields:
+        list: Task results from the latest successful poll
+    """
+    async for extract_results in get_poll_scheduler().subscribe(batch_id, poller):
+        yield extract_results
+
+async def check_task_status(client, batch_id, poller=None):
     """
     Check batch task status
     
     Args:
-        client: HTTP client
+        client: HTTP client (unused, status polling goes through the shared poll scheduler)
         batch_id: Batch ID
-        max_retries: Maximum number of retries
-        sleep_seconds: Seconds between retries
+        poller: AdaptivePoller deciding poll delays and the timeout (optional)
         
     Returns:
         dict: Dictionary containing task status information, or error message if failed
     """
-    retry_count = 0
+    extract_results = await get_poll_scheduler().wait(batch_id, poller)
+    if extract_results is not None:
+        return {
+            "success": True,
+            "extract_results": extract_results
+        }
     
-    while retry_count < max_retries:
-        retry_count += 1
-        
+    return {
+        "success": False,
+        "error": "Polling timeout, unable to get final results"
+    }
+
+class ProgressReporter:
+    """
+    Report per-file progress of a conversion through MCP progress notifications
+    
+    Args:
+        ctx: MCP request context, or None to report nothing
+        total: Total number of files in the conversion
+    """
+    
+    def __init__(self, ctx, total):
+        self.ctx = ctx
+        self.total = total
+        self.completed = 0
+    
+    async def advance(self, message):
+        """Count one more finished file and notify the client"""
+        self.completed += 1
+        if self.ctx is None:
+            return
         try:
-            status_response = await client.get(
-                f"{MINERU_BATCH_RESULTS_API}/{batch_id}",
-                headers=HEADERS,
-                timeout=60.0  
-            )
-            
-            if status_response.status_code != 200:
-                retry_count += 1
-                if retry_count < max_retries:
-                    await asyncio.sleep(sleep_seconds)
+            await self.ctx.report_progress(self.completed, self.total)
+            await self.ctx.info(message)
+        except Exception as e:
+            pass
+
+async def process_batch(client, batch_id, progress=None, poller=None, job_id=None):
+    """
+    Poll a batch and download each file as soon as it finishes
+    
+    Downloads start while the rest of the batch is still converting, and
+    progress is reported for every finished file. Files still unfinished
+    when polling gives up are returned as pending rather than failing the
+    whole batch.
+    
+    Args:
+        client: HTTP client
+        batch_id: Batch ID
+        progress: ProgressReporter for MCP progress notifications (optional)
+        poller: AdaptivePoller deciding poll delays and the timeout (optional)
+        job_id: Job the batch belongs to, owns the result directories (optional)
+        
+    Returns:
+        dict: Downloaded, failed and pending files of the batch
+    """
+    progress = progress or ProgressReporter(None, None)
+    semaphore = asyncio.Semaphore(max(1, DOWNLOAD_CONCURRENCY))
+    download_tasks = {}
+    failed_files = {}
+    extract_results = []
+    # Queue wait and processing times are only as precise as the poll interval
+    started = time.monotonic()
+    running_since = {}
+    
+    async def download_and_report(i, result):
+        downloaded_file = await download_extract_result(client, i, result, semaphore, job_id=job_id)
+        file_name = result.get("file_name", f"file_{i+1}")
+        _metrics.inc("files_downloaded" if downloaded_file else "downloads_failed")
+        if result.get("data_id"):
+            if downloaded_file:
+                record_job_state("update_file", result["data_id"], FILE_DOWNLOADED,
+                                 extract_dir=downloaded_file["extract_dir"])
+            else:
+                # Retries are used up, so the file would stay pending forever
+                record_job_state("update_file", result["data_id"], FILE_FAILED, error="Download failed")
+        if not downloaded_file:
+            failed_files[result.get("data_id") or i] = {"file_name": file_name, "error": "Download failed"}
+            if result.get("data_id"):
+                failed_files[result["data_id"]]["data_id"] = result["data_id"]
+        await progress.advance(f"{file_name}: {'downloaded' if downloaded_file else 'download failed'}")
+        return downloaded_file
+    
+    async for extract_results in watch_batch(batch_id, poller):
+        now = time.monotonic()
+        for i, result in enumerate(extract_results):
+            key = result.get("data_id") or i
+            if key in download_tasks or key in failed_files:
                 continue
-            
+            if result.get("state") not in QUEUED_STATES and key not in running_since:
+                if result.get("state") in TERMINAL_STATES:
+                    # Finished between two polls: the time cannot be split into queueing and processing
+                    running_since[key] = started
+                else:
+                    running_since[key] = now
+                    _metrics.observe("queue_wait", now - started)
+            if result.get("state") in TERMINAL_STATES:
+                _metrics.observe("processing", now - running_since[key])
+            if result.get("state") == "done":
+                if result.get("data_id"):
+                    record_job_state("update_file", result["data_id"], FILE_DONE, zip_url=result.get("full_zip_url"))
+                download_tasks[key] = asyncio.create_task(download_and_report(i, result))
+            elif result.get("state") == "failed":
+                failed_files[key] = {
+                    "file_name": result.get("file_name", f"file_{i+1}"),
+                    "error": result.get("err_msg", "Conversion failed")
+                }
+                _metrics.inc("files_failed")
+                if result.get("data_id"):
+                    failed_files[key]["data_id"] = result["data_id"]
+                    record_job_state("update_file", result["data_id"], FILE_FAILED, error=failed_files[key]["error"])
+                await progress.advance(f"{failed_files[key]['file_name']}: conversion failed")
+    
+    downloaded = await asyncio.gather(*download_tasks.values())
+    downloaded_files = [downloaded_file for downloaded_file in downloaded if downloaded_file]
+    record_job_state("finish_batch", batch_id, BATCH_FINISHED if is_finished(extract_results) else BATCH_TIMEOUT)
+    pending_files = [
+        result.get("file_name", f"file_{i+1}")
+        for i, result in enumerate(extract_results)
+        if result.get("state") not in TERMINAL_STATES
+    ]
+    
+    batch_result = {
+        "success": bool(downloaded_files) or (is_finished(extract_results) and not failed_files),
+        "partial": bool(pending_files or failed_files or len(downloaded_files) < len(download_tasks)),
+        "downloaded_files": downloaded_files,
+        "failed_files": list(failed_files.values()),
+        "pending_files": pending_files
+    }
+    if not batch_result["success"]:
+        if pending_files or not extract_results:
+            batch_result["error"] = "Polling timeout, unable to get final results"
+        else:
+            batch_result["error"] = "No file was converted successfully"
+    return batch_result
+
+async def convert_url_batch(client, files, progress=None, job_id=None, pages=0):
+    """
+    Submit one batch of URL tasks and collect its results
+    
+    Args:
+        client: HTTP client
+        files: File entries with url, is_ocr and data_id
+        progress: ProgressReporter for MCP progress notifications (optional)
+        job_id: Job the batch belongs to, recorded in the job store (optional)
+        pages: Pages known to be in the batch, scales the polling timeout (optional)
+        
+    Returns:
+        dict: Batch result from process_batch with the batch ID, or error message if failed
+    """
+    batch_data = dict(CONVERSION_OPTIONS, files=files)
+    
+    with _metrics.span("batch_submit"):
+        response = await guarded_request("batch", lambda: client.post(
+            MINERU_BATCH_API,
+            headers=HEADERS,
+            json=batch_data,
+            timeout=300.0
+        ))
+    
+    if response.status_code != 200:
+        return {"success": False, "error": f"Request failed: {response.status_code}"}
+    
+    try:
+        status_data = response.json()
+    except json.JSONDecodeError as e:
+        return {"success": False, "error": f"Failed to parse JSON: {e}"}
+    
+    if status_data.get("code") != 0 and status_data.get("code") != 200:
+        error_msg = status_data.get("msg", "Unknown error")
+        return {"success": False, "error": f"API returned error: {error_msg}"}
+        
+    batch_id = status_data.get("data", {}).get("batch_id", "")
+    if not batch_id:
+        return {"success": False, "error": "Failed to get batch ID"}
+    
+    if job_id:
+        record_job_state("add_batch", job_id, batch_id, [f["data_id"] for f in files])
+    
+    batch_result = await process_batch(client, batch_id, progress=progress, poller=make_poller(pages), job_id=job_id)
+    return dict(batch_result, batch_id=batch_id)
+
+async def convert_file_batch(client, file_paths, files_data, progress=None, job_id=None, pages=0):
+    """
+    Request upload links for one batch of local files, upload them and collect the results
+    
+    Args:
+        client: HTTP client
+        file_paths: Local file paths
+        files_data: File entries with name, is_ocr and data_id, one per path
+        progress: ProgressReporter for MCP progress notifications (optional)
+        job_id: Job the batch belongs to, recorded in the job store (optional)
+        pages: Pages known to be in the batch, scales the polling timeout (optional)
+        
+    Returns:
+        dict: Batch result from process_batch with the batch ID and upload results, or error message if failed
+    """
+    file_url_data = dict(CONVERSION_OPTIONS, files=files_data)
+    
+    with _metrics.span("upload_url_request"):
+        file_url_response = await guarded_request("file_urls", lambda: client.post(
+            MINERU_FILE_URLS_API,
+            headers=HEADERS,
+            json=file_url_data,
+            timeout=60.0
+        ))
+    
+    if file_url_response.status_code != 200:
+        return {"success": False, "error": f"Failed to get upload link: {file_url_response.status_code}"}
+    
+    file_url_result = file_url_response.json()
+    
+    if file_url_result.get("code") != 0 and file_url_result.get("code") != 200:
+        error_msg = file_url_result.get("msg", "Unknown error")
+        return {"success": False, "error": f"Failed to get upload link: {error_msg}"}
+    
+    batch_id = file_url_result.get("data", {}).get("batch_id", "")
+    file_urls = file_url_result.get("data", {}).get("file_urls", [])
+    
+    if not batch_id or not file_urls or len(file_urls) != len(file_paths):
+        return {"success": False, "error": "Failed to get upload link or batch ID"}
+    
+    if job_id:
+        record_job_state("add_batch", job_id, batch_id, [data["data_id"] for data in files_data])
+    
+    upload_results = await upload_files(client, file_paths, file_urls)
+    for data, upload_result in zip(files_data, upload_results):
+        if not upload_result["success"]:
+            record_job_state("update_file", data["data_id"], FILE_FAILED, error=upload_result.get("error", "Upload failed"))
+    
+    if not any(result["success"] for result in upload_results):
+        return {"success": False, "error": "All files failed to upload", "batch_id": batch_id, "upload_results": upload_results}
+    
+    batch_result = await process_batch(client, batch_id, progress=progress, poller=make_poller(pages), job_id=job_id)
+    return dict(batch_result, batch_id=batch_id, upload_results=upload_results)
+
+async def run_in_sub_batches(items, run_batch, batch_size=None, concurrency=None, pages=None,
+                             client=None, priority=None):
+    """
+    Pack work into API-sized sub-batches and run them concurrently
+    
+    Sub-batches are bounded by file count and by BATCH_MAX_PAGES, so short
+    documents share a batch while long ones get their own. Each sub-batch
+    waits for a slot from the batch scheduler before it is submitted.
+    
+    Args:
+        items: File entries to convert, each with a data_id and a name or url
+        run_batch: Coroutine function converting one list of entries
+        batch_size: Maximum entries per sub-batch (default: MAX_BATCH_SIZE)
+        concurrency: Maximum sub-batches in flight (default: BATCH_SUBMIT_CONCURRENCY)
+        pages: Page counts by data ID, missing ones count as DEFAULT_DOCUMENT_PAGES (optional)
+        client: Client the work is done for, shares are split fairly between clients (optional)
+        priority: Priority class from PRIORITIES (default: normal)
+        
+    Returns:
+        dict: Merged result of all sub-batches, with downloaded files in input order
+    """
+    pages = pages or {}
+    semaphore = asyncio.Semaphore(max(1, concurrency or BATCH_SUBMIT_CONCURRENCY))
+    chunks = pack_batches(items, pages, max(1, batch_size or MAX_BATCH_SIZE), BATCH_MAX_PAGES)
+    scheduler = get_batch_scheduler()
+    
+    async def run_one(chunk):
+        chunk_pages = sum(document_pages(pages, item["data_id"]) for item in chunk)
+        async with semaphore:
             try:
-                status_data = status_response.json()
+                async with scheduler.slot(client or "local", priority or PRIORITY_NORMAL, chunk_pages) as waited:
+                    _metrics.observe("scheduler_wait", waited)
+                    result = await run_batch(chunk)
             except Exception as e:
-                retry_count += 1
-                if retry_count < max_retries:
-                    await asyncio.sleep(sleep_seconds)
-                continue
-            
-            task_data = status_data.get("data", {})
-            extract_results = task_data.get("extract_result", [])
-            
-            all_done, any_done = print_task_status(extract_results)
-            
-            if all_done:
-                return {
-                    "success": True,
-                    "extract_results": extract_results,
-                    "task_data": task_data,
-                    "status_data": status_data
-                }
-            
-            await asyncio.sleep(sleep_seconds)
-            
-        except Exception as e:
-            retry_count += 1
-            if retry_count < max_retries:
-                await asyncio.sleep(sleep_seconds)
+                result = {"success": False, "error": str(e)}
+        if not (result.get("downloaded_files") or result.get("failed_files") or result.get("pending_files")) \
+                and not result.get("success"):
+            # The sub-batch never got going, so every file in it failed
+            result["failed_files"] = [
+                {"file_name": item.get("name") or item.get("url"), "data_id": item["data_id"],
+                 "error": result.get("error", "Unknown error")}
+                for item in chunk
+            ]
+            for item in chunk:
+                record_job_state("update_file", item["data_id"], FILE_FAILED, error=result.get("error", "Unknown error"))
+        return result
     
-    return {
-        "success": False,
-        "error": "Polling timeout, unable to get final results"
+    batch_results = await asyncio.gather(*(run_one(chunk) for chunk in chunks))
+    
+    order = {item["data_id"]: i for i, item in enumerate(items)}
+    merged = {
+        "downloaded_files": [],
+        "failed_files": [],
+        "pending_files": [],
+        "upload_results": [],
+        "batch_ids": []
+    }
+    errors = []
+    for result in batch_results:
+        for key in ("downloaded_files", "failed_files", "pending_files", "upload_results"):
+            merged[key].extend(result.get(key, []))
+        if result.get("batch_id"):
+            merged["batch_ids"].append(result["batch_id"])
+        if result.get("error"):
+            errors.append(result["error"])
+    merged["downloaded_files"].sort(key=lambda f: order.get(f.get("data_id"), len(order)))
+    merged["failed_files"].sort(key=lambda f: order.get(f.get("data_id"), len(order)))
+    
+    merged["success"] = bool(merged["downloaded_files"]) or all(result.get("success") for result in batch_results)
+    merged["partial"] = any(result.get("partial") for result in batch_results) or (
+        merged["success"] and bool(merged["failed_files"] or merged["pending_files"])
+    )
+    if not merged["success"]:
+        merged["error"] = errors[0] if errors else "No file was converted successfully"
+    return merged
+
+async def iter_file_chunks(file_path, chunk_size=UPLOAD_CHUNK_SIZE):
+    """
+    Read a file as an async stream of chunks
+    
+    Only one chunk is held in memory at a time, and reads run in a worker
+    thread so large files do not block the event loop.
+    
+    Args:
+        file_path: File path
+        chunk_size: Bytes per chunk
+        
+    Yields:
+        bytes: Next chunk of the file
+    """
+    f = await asyncio.to_thread(open, file_path, 'rb')
+    try:
+        while True:
+            chunk = await asyncio.to_thread(f.read, chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        await asyncio.to_thread(f.close)
+
+async def upload_file(client, upload_url, file_path):
+    """
+    Stream a local file to a presigned upload URL
+    
+    Args:
+        client: HTTP client
+        upload_url: Presigned upload URL
+        file_path: Local file path
+        
+    Returns:
+        dict: Upload result with success flag, size, elapsed time and throughput
+    """
+    file_size = os.path.getsize(file_path)
+    start_time = time.monotonic()
+    
+    upload_response = await guarded_request("upload", lambda: client.put(
+        upload_url,
+        content=iter_file_chunks(file_path),
+        headers={"Content-Length": str(file_size)},
+        timeout=300.0
+    ))
+    
+    elapsed = time.monotonic() - start_time
+    _metrics.observe("upload", elapsed)
+    if upload_response.status_code == 200:
+        _metrics.inc("bytes_uploaded", file_size)
+    result = {
+        "file": os.path.basename(file_path),
+        "success": upload_response.status_code == 200,
+        "status_code": upload_response.status_code,
+        "bytes": file_size,
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput_mbps": round(file_size / 1024 / 1024 / elapsed, 2) if elapsed > 0 else None
     }
+    if upload_response.status_code != 200:
+        result["error"] = f"Upload failed: {upload_response.status_code}"
+    return result
+
+async def upload_files(client, file_paths, upload_urls, concurrency=None, max_retries=None):
+    """
+    Upload files to their presigned URLs concurrently
+    
+    Uploads run under a semaphore so at most `concurrency` are in flight.
+    A failed upload is retried with exponential backoff and jitter; client
+    errors other than 408/429 are not retried since a presigned URL that
+    was rejected will be rejected again.
+    
+    Args:
+        client: HTTP client
+        file_paths: Local file paths
+        upload_urls: Presigned upload URLs, one per file path
+        concurrency: Maximum concurrent uploads (default: UPLOAD_CONCURRENCY)
+        max_retries: Maximum attempts per file (default: UPLOAD_MAX_RETRIES)
+        
+    Returns:
+        list: Upload results in the same order as file_paths
+    """
+    concurrency = concurrency or UPLOAD_CONCURRENCY
+    max_retries = max_retries or UPLOAD_MAX_RETRIES
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    
+    async def upload_one(file_path, upload_url):
+        result = None
+        start_time = time.monotonic()
+        for attempt in range(1, max_retries + 1):
+            async with semaphore:
+                try:
+                    result = await upload_file(client, upload_url, file_path)
+                except CircuitOpenError as e:
+                    result = {"file": os.path.basename(file_path), "success": False, "error": str(e), "attempts": attempt}
+                    break
+                except Exception as e:
+                    result = {"file": os.path.basename(file_path), "success": False, "error": str(e)}
+            result["attempts"] = attempt
+            if result["success"]:
+                break
+            status_code = result.get("status_code")
+            if status_code is not None and 400 <= status_code < 500 and status_code not in (408, 429):
+                break
+            if attempt < max_retries:
+                _metrics.inc("upload_retries")
+                await asyncio.sleep(min(30.0, 2 ** (attempt - 1)) + random.uniform(0, 0.5))
+        result["total_seconds"] = round(time.monotonic() - start_time, 3)
+        return result
+    
+    return await asyncio.gather(*(
+        upload_one(file_path, upload_url) for file_path, upload_url in zip(file_paths, upload_urls)
+    ))
+
+async def download_extract_result(client, i, result, semaphore, job_id=None):
+    """
+    Download and unzip the archive of one finished task
+    
+    Args:
+        client: HTTP client
+        i: Index of the task in the batch
+        result: Task result from the batch results API
+        semaphore: Semaphore bounding concurrent downloads
+        job_id: Job the task belongs to, see claim_output_dir (optional)
+        
+    Returns:
+        dict: Downloaded file information, or None if failed
+    """
+    try:
+        file_name = result.get("file_name", f"file_{i+1}")
+        zip_url = result.get("full_zip_url", "")
+        
+        if not zip_url:
+            return None
+        
+        async with semaphore:
+            downloaded_file = await download_zip_file(client, zip_url, file_name,
+                                                      data_id=result.get("data_id"), job_id=job_id)
+        if downloaded_file and result.get("data_id"):
+            downloaded_file["data_id"] = result["data_id"]
+        return downloaded_file
+    except Exception as e:
+        return None
+
+async def download_batch_results(client, extract_results):
+    """
+    Download batch task results
+    
+    Archives are downloaded concurrently, at most DOWNLOAD_CONCURRENCY at a
+    time, and unzipped in worker threads so the event loop stays responsive.
+    
+    Args:
+        client: HTTP client
+        extract_results: List of task results
+        
+    Returns:
+        list: List of downloaded file information
+    """
+    semaphore = asyncio.Semaphore(max(1, DOWNLOAD_CONCURRENCY))
+    
+    downloaded = await asyncio.gather(*(
+        download_extract_result(client, i, result, semaphore)
+        for i, result in enumerate(extract_results)
+        if result.get("state") == "done"
+    ))
+    
+    return [downloaded_file for downloaded_file in downloaded if downloaded_file]
+
+def is_member_selected(member_name, profile=None):
+    """
+    Check whether an archive member is unpacked under an extraction profile
+    
+    Args:
+        member_name: Path of the member inside the archive
+        profile: "markdown", "markdown_images" or "all" (default: EXTRACT_PROFILE)
+        
+    Returns:
+        bool: Whether the member is extracted
+    """
+    profile = profile or EXTRACT_PROFILE
+    if profile == "all":
+        return True
+    if member_name.lower().endswith(".md"):
+        return True
+    return profile == "markdown_images" and member_name.replace("\\", "/").split("/")[0] == "images"
+
+def extract_zip_file(zip_path, extract_dir, profile=None, keep_archive=None):
+    """
+    Unzip the members selected by the extraction profile and remove or keep the archive
+    
+    Members are read from the archive on disk, so skipped members never
+    touch the output directory. A kept archive is moved into the result
+    directory, where its other members can be read later.
+    
+    This is blocking and is run in a worker thread by download_zip_file.
+    
+    Args:
+        zip_path: ZIP file path
+        extract_dir: Target directory
+        profile: Extraction profile (default: EXTRACT_PROFILE)
+        keep_archive: Whether to keep the archive (default: KEEP_ARCHIVE)
+    """
+    import zipfile
+    try:
+        index = get_chunk_index()
+    except Exception as e:
+        index = None
+    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        members = [info for info in zip_ref.infolist() if not info.is_dir() and is_member_selected(info.filename, profile)]
+        markdown = [info for info in members if info.filename.lower().endswith(".md")] if index else []
+        zip_ref.extractall(extract_dir, members=[info for info in members if info not in markdown])
+        for info in markdown:
+            extract_and_index_member(zip_ref, info, extract_dir, index)
+        _metrics.inc("archive_members_extracted", len(members))
+        _metrics.inc("archive_members_skipped", sum(1 for info in zip_ref.infolist() if not info.is_dir()) - len(members))
+    if KEEP_ARCHIVE if keep_archive is None else keep_archive:
+        os.replace(zip_path, os.path.join(extract_dir, ARCHIVE_NAME))
+    else:
+        os.remove(zip_path)
+
+def extract_and_index_member(zip_ref, info, extract_dir, index):
+    """
+    Unzip a Markdown member and add it to the search index in the same pass
+    
+    Each line is written to disk and handed to the chunker as it is read, so
+    the file is never read back. If indexing fails the member is extracted
+    again on its own, the conversion result never depends on the index.
+    
+    Args:
+        zip_ref: Open ZipFile
+        info: ZipInfo of the Markdown member
+        extract_dir: Target directory
+        index: ChunkIndex the document is added to
+    """
+    parts = [part for part in info.filename.replace("\\", "/").split("/") if part not in ("", ".", "..")]
+    target_path = os.path.join(str(extract_dir), *parts)
+    
+    def tee_lines():
+        with zip_ref.open(info) as source, open(target_path, "wb") as target:
+            for line in source:
+                target.write(line)
+                yield line.decode("utf-8", errors="replace")
+    
+    try:
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+        chunks = index.add_document(target_path, os.path.basename(os.path.normpath(str(extract_dir))), tee_lines())
+        _metrics.inc("chunks_indexed", chunks)
+    except Exception as e:
+        _metrics.inc("index_errors")
+        zip_ref.extract(info, extract_dir)
+
+def read_archive_member(extract_dir, member_name):
+    """
+    Read one member of the archive kept in a result directory
+    
+    Args:
+        extract_dir: Result directory
+        member_name: Path of the member inside the archive
+        
+    Returns:
+        bytes: Member content, or None if there is no kept archive or no such member
+    """
+    import zipfile
+    archive_path = os.path.join(extract_dir, ARCHIVE_NAME)
+    if not os.path.exists(archive_path):
+        return None
+    with zipfile.ZipFile(archive_path, 'r') as zip_ref:
+        try:
+            return zip_ref.read(member_name)
+        except KeyError as e:
+            return None
+
+def claim_output_dir(name, data_id=None, job_id=None):
+    """
+    Reserve the result directory name of a file for the rest of its job
+    
+    Two files with the same name in one job, or in jobs running at the same
+    time, would otherwise be extracted into the same directory. The second
+    one gets a numbered name instead; the same file asking again keeps its
+    name.
+    
+    Args:
+        name: Directory name from safe_output_name
+        data_id: File the directory is for (optional)
+        job_id: Job holding the name until release_output_dirs (optional)
+        
+    Returns:
+        str: Reserved directory name
+    """
+    candidate = name
+    n = 1
+    while candidate in _output_dir_claims and (data_id is None or _output_dir_claims[candidate][1] != data_id):
+        n += 1
+        candidate = f"{name}_{n}"
+    _output_dir_claims[candidate] = (job_id, data_id)
+    return candidate
+
+def release_output_dirs(job_id=None, name=None):
+    """Release the directory names reserved by a job, or a single name reserved without a job"""
+    for candidate, (owner, _) in list(_output_dir_claims.items()):
+        if (job_id is not None and owner == job_id) or (name is not None and candidate == name and owner is None):
+            del _output_dir_claims[candidate]
+
+def safe_output_name(file_name):
+    """
+    Turn a file name into the name of its result directory
+    
+    Args:
+        file_name: Original file name
+        
+    Returns:
+        str: Directory name without extension or characters invalid in paths
+    """
+    base_name = os.path.splitext(file_name)[0]
+    # Only remove control characters and chars that are invalid in filenames
+    safe_name = re.sub(r'[<>:"/\\|?*\x00-\x1f]', '', base_name).strip()
+    # Replace spaces with underscores
+    safe_name = re.sub(r'\s+', '_', safe_name)
+    
+    if safe_name.isdigit() or re.match(r'^\d+\.\d+$', safe_name):
+        safe_name = f"paper_{safe_name}"
+    return safe_name
+
+async def download_zip_file(client, zip_url, file_name, prefix="md", max_retries=3, data_id=None, job_id=None):
+    """
+    Download and save ZIP file, then automatically unzip
+    
+    The archive is streamed to a partial file on disk in chunks. If a transfer
+    is interrupted, the next attempt requests only the missing bytes with an
+    HTTP Range header and appends them.
+    
+    Args:
+        client: HTTP client
+        zip_url: ZIP file URL
+        file_name: File name
+        prefix: File prefix
+        max_retries: Maximum number of retries
+        data_id: Task the archive belongs to, keeps its partial file apart from other tasks (optional)
+        job_id: Job reserving the result directory, see claim_output_dir (optional)
+        
+    Returns:
+        dict: Dictionary containing file name and unzip directory, or None if failed
+    """
+    current_date = time.strftime("%Y%m%d")
+    
+    safe_name = safe_output_name(file_name)
+        
+    # Downloads run concurrently, so every task writes to its own partial file
+    zip_filename = f"{prefix}_{safe_name}_{current_date}_{data_id or new_job_id()}.zip"
+    
+    download_dir = Path(OUTPUT_DIR)
+    if not download_dir.exists():
+        try:
+            download_dir.mkdir(parents=True, exist_ok=True)
+        except Exception as e:
+            print(f"Error creating directory: {e}")
+            return None
+    
+    save_path = download_dir / zip_filename
+    part_path = download_dir / f"{zip_filename}.part"
+    guard = get_endpoint_guard("download")
+    if part_path.exists():
+        part_path.unlink()
+    
+    for attempt in range(1, max_retries + 1):
+        if attempt > 1:
+            _metrics.inc("download_retries")
+        try:
+            offset = part_path.stat().st_size if part_path.exists() else 0
+            headers = {"Range": f"bytes={offset}-"} if offset else {}
+            
+            download_started = time.monotonic()
+            await guard.acquire()
+            async with client.stream("GET", zip_url, headers=headers, follow_redirects=True, timeout=120.0) as zip_response:
+                guard.record_response(zip_response)
+                if zip_response.status_code == 416 and offset:
+                    # Range starts at the end of the file: the previous attempt got everything
+                    pass
+                elif zip_response.status_code in (200, 206):
+                    mode = "ab" if zip_response.status_code == 206 else "wb"
+                    # Write chunks as they arrive so an interrupted transfer keeps what it received
+                    with open(part_path, mode) as f:
+                        async for chunk in zip_response.aiter_raw():
+                            f.write(chunk)
+                            _metrics.inc("bytes_downloaded", len(chunk))
+                else:
+                    if attempt < max_retries:
+                        await asyncio.sleep(2)
+                    continue
+            _metrics.observe("download", time.monotonic() - download_started)
+            
+            os.replace(part_path, save_path)
+        except CircuitOpenError as e:
+            break
+        except Exception as e:
+            if isinstance(e, httpx.TransportError):
+                guard.record_failure()
+            if attempt < max_retries:
+                await asyncio.sleep(2)
+            continue
+        
+        dir_name = claim_output_dir(safe_name, data_id, job_id)
+        extract_dir = download_dir / dir_name
+        if not extract_dir.exists():
+            extract_dir.mkdir(parents=True)
+        
+        try:
+            with _metrics.span("extraction"):
+                await asyncio.to_thread(extract_zip_file, save_path, extract_dir)
+            
+            return {
+                "file_name": file_name,
+                "extract_dir": str(extract_dir)
+            }
+        except Exception as e:
+            # Corrupt archive: discard it so the next attempt starts from scratch
+            if save_path.exists():
+                os.remove(save_path)
+        finally:
+            if job_id is None:
+                release_output_dirs(name=dir_name)
+    
+    if part_path.exists():
+        part_path.unlink()
+    return None
+
+def parse_url_string(url_string):
+    """
+    Parse URL string separated by spaces, commas, or newlines
+    
+    A URL given more than once is only returned once, in the position it
+    first appears, so it is not converted twice.
+    
+    Args:
+        url_string: URL string
+        
+    Returns:
+        list: List of unique URLs
+    """
+    if isinstance(url_string, str):
+        if (url_string.startswith('"') and url_string.endswith('"')) or \
+           (url_string.startswith("'") and url_string.endswith("'")):
+            url_string = url_string[1:-1]
+    
+    urls = []
+    for part in url_string.split():
+        if ',' in part:
+            urls.extend(part.split(','))
+        elif '\n' in part:
+            urls.extend(part.split('\n'))
+        else:
+            urls.append(part)
+    
+    cleaned_urls = []
+    for url in urls:
+        if not url:
+            continue
+        if (url.startswith('"') and url.endswith('"')) or \
+           (url.startswith("'") and url.endswith("'")):
+            url = url[1:-1]
+        if url not in cleaned_urls:
+            cleaned_urls.append(url)
+    
+    return cleaned_urls
+
+# A quoted path, or a piece of a path up to the next space or comma
+PATH_TOKEN_RE = re.compile(r'"[^"]*"|\'[^\']*\'|[^\s,]+')
+# Most pieces an unquoted path with spaces or commas is put back together from
+MAX_PATH_PIECES = 16
+
+def parse_path_string(path_string):
+    """
+    Parse file path string separated by spaces, commas, or newlines
+    
+    A quoted path is kept whole. An unquoted path containing spaces or
+    commas is recognised when its pieces, joined again, name an existing
+    file. A path given more than once is only returned once.
+    
+    Args:
+        path_string: File path string
+        
+    Returns:
+        list: List of file paths
+    """
+    path_string = path_string.strip()
+    if (path_string.startswith('"') and path_string.endswith('"')) or \
+       (path_string.startswith("'") and path_string.endswith("'")):
+        path_string = path_string[1:-1]
+    
+    paths = []
+    for line in path_string.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if os.path.exists(line):
+            paths.append(line)
+            continue
+        
+        spans = [match.span() for match in PATH_TOKEN_RE.finditer(line)]
+        i = 0
+        while i < len(spans):
+            end = i
+            if not os.path.exists(line[spans[i][0]:spans[i][1]]):
+                # Join the following pieces back while that names an existing file, longest first
+                for j in range(min(len(spans), i + MAX_PATH_PIECES) - 1, i, -1):
+                    if os.path.exists(line[spans[i][0]:spans[j][1]]):
+                        end = j
+                        break
+            paths.append(line[spans[i][0]:spans[end][1]])
+            i = end + 1
+    
+    cleaned_paths = []
+    for path in paths:
+        if (path.startswith('"') and path.endswith('"')) or \
+           (path.startswith("'") and path.endswith("'")):
+            path = path[1:-1]
+        if path and path not in cleaned_paths:
+            cleaned_paths.append(path)
+    
+    return cleaned_paths
+
+def start_job_task(job_id, coro):
+    """
+    Run the work of a job as a background task registered under its ID
+    
+    The task keeps running if the tool call that started it is cancelled,
+    and collect_conversion can wait for it instead of starting the job again.
+    
+    Args:
+        job_id: Job ID
+        coro: Coroutine doing the work
+        
+    Returns:
+        asyncio.Task: The registered task
+    """
+    task = asyncio.ensure_future(coro)
+    _job_tasks[job_id] = task
+    
+    def unregister(finished_task):
+        if _job_tasks.get(job_id) is finished_task:
+            del _job_tasks[job_id]
+            release_output_dirs(job_id)
+    
+    task.add_done_callback(unregister)
+    return task
+
+def process_owner():
+    """Identify this process as the owner of the jobs it runs"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def owned_elsewhere(job):
+    """
+    Check whether a job is owned by another process that may still be running
+    
+    Only processes on this host can be checked, jobs owned by a process on
+    another host always count as owned.
+    
+    Args:
+        job: Job record from the job store
+        
+    Returns:
+        bool: Whether another process may be working on the job
+    """
+    owner = job.get("owner")
+    if not owner or owner == process_owner():
+        return False
+    host, _, pid = owner.rpartition(":")
+    if host != socket.gethostname() or not pid.isdigit() or os.name == "nt":
+        # Signal 0 only checks for the process on POSIX, on Windows it would end it
+        return True
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError as e:
+        return False
+    except OSError as e:
+        pass
+    return True
+
+async def submit_queued_files(client, job, files):
+    """
+    Submit the files of a job that were recorded but never submitted
+    
+    Local files are sent whole with the job's OCR setting, and files that
+    no longer exist fail.
+    
+    Args:
+        client: HTTP client
+        job: Job record from the job store
+        files: File records of the job still queued
+        
+    Returns:
+        dict: Merged result from run_in_sub_batches
+    """
+    job_id = job["job_id"]
+    is_ocr = job["options"].get("is_ocr", True)
+    if job["kind"] == "url":
+        entries = [{"url": f["source"], "is_ocr": is_ocr, "data_id": f["data_id"]} for f in files]
+        return await run_in_sub_batches(entries, lambda chunk: convert_url_batch(client, chunk, job_id=job_id))
+    
+    path_by_data_id = {}
+    entries = []
+    for f in files:
+        if os.path.isfile(f["source"]):
+            path_by_data_id[f["data_id"]] = f["source"]
+            entries.append({"name": f["name"], "is_ocr": is_ocr, "data_id": f["data_id"]})
+        else:
+            record_job_state("update_file", f["data_id"], FILE_FAILED, error=f"File does not exist: {f['source']}")
+    return await run_in_sub_batches(entries, lambda chunk: convert_file_batch(
+        client, [path_by_data_id[data["data_id"]] for data in chunk], chunk, job_id=job_id
+    ))
+
+async def resume_job(job_id, submit_queued=None):
+    """
+    Finish a job recorded in the job store
+    
+    Unfinished batches, including those whose polling timed out, are
+    polled again, and converted files that were never downloaded are
+    downloaded. Files that were never submitted, because the process
+    running the job stopped first, are submitted. The same goes for the
+    chunks of split files, which are stitched once all of them are done.
+    
+    Args:
+        job_id: Job ID
+        submit_queued: Whether to submit files that are still queued
+            (default: if no other running process owns the job)
+        
+    Returns:
+        str: Final job status
+    """
+    client = get_http_client()
+    store = get_job_store()
+    
+    job = store.get_job(job_id)
+    queued = [f for f in job["files"] + job["chunks"] if f["state"] == FILE_QUEUED]
+    if queued and submit_queued is None:
+        submit_queued = not owned_elsewhere(job) and store.claim_job(job_id, process_owner(), job["owner"])
+    
+    batches = store.unfinished_batches(job_id)
+    work = [process_batch(client, batch["batch_id"], job_id=job_id) for batch in batches]
+    if queued and submit_queued:
+        work.append(submit_queued_files(client, job, queued))
+    await asyncio.gather(*work)
+    
+    job = store.get_job(job_id)
+    semaphore = asyncio.Semaphore(max(1, DOWNLOAD_CONCURRENCY))
+    
+    async def redownload(f):
+        result = {"file_name": f["name"], "full_zip_url": f["zip_url"], "data_id": f["data_id"]}
+        downloaded_file = await download_extract_result(client, f.get("position", 0), result, semaphore, job_id=job_id)
+        if downloaded_file:
+            store.update_file(f["data_id"], FILE_DOWNLOADED, extract_dir=downloaded_file["extract_dir"])
+        else:
+            store.update_file(f["data_id"], FILE_FAILED, error="Download failed")
+    
+    await asyncio.gather(*(
+        redownload(f) for f in job["files"] + job["chunks"] if f["state"] == FILE_DONE and f["zip_url"]
+    ))
+    
+    job = store.get_job(job_id)
+    await stitch_resumed_chunks(job)
+    return store.finish_job(job_id, job.get("error"))
+
+async def stitch_resumed_chunks(job):
+    """
+    Stitch the split files of a resumed job whose chunks have all finished
+    
+    Args:
+        job: Job record from the job store
+    """
+    chunks_by_parent = {}
+    for chunk in job["chunks"]:
+        chunks_by_parent.setdefault(chunk["parent_id"], []).append(chunk)
+    files = {f["data_id"]: f for f in job["files"]}
+    for parent_id, records in chunks_by_parent.items():
+        if files[parent_id]["state"] != FILE_SUBMITTED or any(
+            chunk["state"] not in (FILE_DOWNLOADED, FILE_FAILED) for chunk in records
+        ):
+            continue
+        chunks = [{"data_id": chunk["data_id"], "path": chunk["source"], "first_page": chunk["first_page"],
+                   "last_page": chunk["last_page"]} for chunk in records]
+        job_result = {
+            "success": True,
+            "partial": False,
+            "downloaded_files": [{"data_id": chunk["data_id"], "extract_dir": chunk["extract_dir"]}
+                                 for chunk in records if chunk["state"] == FILE_DOWNLOADED],
+            "failed_files": [],
+            "pending_files": []
+        }
+        await stitch_split_files(job_result, {parent_id: chunks}, {parent_id: files[parent_id]["name"]},
+                                 os.path.dirname(chunks[0]["path"]), job_id=job["job_id"])
+
+def needs_resume(job):
+    """Check whether a job has batches to poll, results left to download or stitch, or files never submitted"""
+    split_files = {chunk["parent_id"] for chunk in job["chunks"]}
+    return any(batch["status"] in (BATCH_SUBMITTED, BATCH_TIMEOUT) for batch in job["batches"]) or any(
+        (f["state"] == FILE_DONE and f["zip_url"]) or f["state"] == FILE_QUEUED
+        for f in job["files"] + job["chunks"]
+    ) or any(f["state"] == FILE_SUBMITTED and f["data_id"] in split_files for f in job["files"])
+
+def resume_pending_jobs():
+    """
+    Resume every unfinished job in the background
+    
+    Jobs with unfinished batches or still running are resumed unless
+    another process that is still running owns them.
+    
+    Returns:
+        list: IDs of the resumed jobs
+    """
+    store = get_job_store()
+    candidates = [batch["job_id"] for batch in store.unfinished_batches()]
+    candidates += [job["job_id"] for job in store.list_jobs(status=JOB_RUNNING, limit=None)]
+    job_ids = []
+    for job_id in dict.fromkeys(candidates):
+        if job_id in _job_tasks:
+            continue
+        job = store.get_job(job_id)
+        if job is None or owned_elsewhere(job) or not needs_resume(job):
+            continue
+        job_ids.append(job_id)
+        start_job_task(job_id, resume_job(job_id))
+    return job_ids
+
+def markdown_resource_uri(job_id, file_ref, part=None):
+    """
+    Build the URI of the MCP resource serving a converted file's Markdown
+    
+    Args:
+        job_id: Job ID
+        file_ref: Data ID or name of the file in the job
+        part: 1-based part number (optional, default: the first part)
+        
+    Returns:
+        str: Resource URI
+    """
+    uri = f"pdf2md://{job_id}/{quote(str(file_ref), safe='')}/markdown"
+    return f"{uri}/{part}" if part else uri
+
+def with_resource_uris(job_id, files):
+    """Return copies of downloaded file entries with their Markdown resource URI added"""
+    return [dict(f, resource_uri=markdown_resource_uri(job_id, f.get("data_id") or f["file_name"])) for f in files]
+
+def find_markdown_file(extract_dir):
+    """
+    Find the Markdown file in a result directory
+    
+    Args:
+        extract_dir: Result directory
+        
+    Returns:
+        str: Path of full.md, or of the first Markdown file found, or None
+    """
+    full_path = os.path.join(extract_dir, "full.md")
+    if os.path.isfile(full_path):
+        return full_path
+    for root, _, files in os.walk(extract_dir):
+        for name in sorted(files):
+            if name.lower().endswith(".md"):
+                return os.path.join(root, name)
+    return None
+
+def read_markdown_resource(job_id, file_ref, part):
+    """
+    Read one part of the Markdown of a converted file
+    
+    Args:
+        job_id: Job ID
+        file_ref: File name, data ID or 1-based position of the file in the job
+        part: 1-based part number
+        
+    Returns:
+        str: Markdown of the part, followed by a comment pointing to the next part
+        
+    Raises:
+        ValueError: The job, file or part does not exist
+    """
+    job = get_job_store().get_job(unquote(job_id))
+    if job is None:
+        raise ValueError(f"Job not found: {job_id}")
+    file_ref = unquote(file_ref)
+    matches = [
+        f for f in job["files"]
+        if file_ref in (f["name"], f["data_id"]) or (file_ref.isdigit() and int(file_ref) == f["position"] + 1)
+    ]
+    if not matches:
+        raise ValueError(f"File not found in job {job_id}: {file_ref}")
+    f = matches[0]
+    if f["state"] != FILE_DOWNLOADED or not f["extract_dir"]:
+        raise ValueError(f"File has not been converted yet: {f['name']} ({f['state']})")
+    markdown_path = find_markdown_file(f["extract_dir"])
+    if markdown_path is None:
+        raise ValueError(f"No Markdown file in {f['extract_dir']}")
+    
+    text, total = read_part(markdown_path, part, max(1024, RESOURCE_PART_SIZE))
+    if text is None:
+        raise ValueError(f"Part {part} does not exist, {f['name']} has {total} part(s)")
+    if total > 1:
+        footer = f"\n<!-- pdf2md: part {part} of {total}"
+        if part < total:
+            footer += f", next: {markdown_resource_uri(job['job_id'], f['data_id'], part + 1)}"
+        text += footer + " -->\n"
+    return text
+
+def summarize_job(job):
+    """
+    Build a conversion result from a job record
+    
+    Args:
+        job: Job record from the job store
+        
+    Returns:
+        dict: Job status with downloaded, failed and pending files
+    """
+    downloaded_files = []
+    failed_files = []
+    pending_files = []
+    for f in job["files"]:
+        if f["state"] == FILE_DOWNLOADED:
+            downloaded_files.append({
+                "file_name": f["name"],
+                "extract_dir": f["extract_dir"],
+                "data_id": f["data_id"],
+                "resource_uri": markdown_resource_uri(job["job_id"], f["data_id"])
+            })
+        elif f["state"] == FILE_FAILED:
+            failed_files.append({"file_name": f["name"], "data_id": f["data_id"], "error": f["error"]})
+        else:
+            pending_files.append(f["name"])
+    
+    return {
+        "success": job["status"] != JOB_FAILED,
+        "job_id": job["job_id"],
+        "status": job["status"],
+        "partial": job["status"] == JOB_PARTIAL,
+        "downloaded_files": downloaded_files,
+        "failed_files": failed_files,
+        "pending_files": pending_files,
+        "batch_ids": [batch["batch_id"] for batch in job["batches"]],
+        "total_files": len(job["files"]),
+        "processed_files": len(downloaded_files)
+    }
+
+async def split_large_files(pending, path_by_data_id, page_counts, split_pages, chunk_dir, job_id=None):
+    """
+    Replace files longer than split_pages with page-range chunks
+    
+    The chunk entries are appended to pending in place of their file, with
+    their paths and page counts added to path_by_data_id and page_counts.
+    The chunks are recorded in the job store, so a resumed job collects
+    them instead of submitting the file again. Files that cannot be split
+    are converted whole.
+    
+    Args:
+        pending: File entries about to be submitted
+        path_by_data_id: Local path of every entry
+        page_counts: Page counts from preflight, by data ID
+        split_pages: Maximum pages per chunk, 0 disables splitting
+        chunk_dir: Directory the chunk files are written to
+        job_id: Job the files belong to (optional)
+        
+    Returns:
+        dict: Chunks with first_page, last_page and data_id, by the data ID of their file
+    """
+    chunks_by_parent = {}
+    if split_pages <= 0 or not splitting_available():
+        return chunks_by_parent
+    
+    for data in list(pending):
+        if 0 < page_counts.get(data["data_id"], 0) <= split_pages:
+            continue
+        try:
+            chunks = await asyncio.to_thread(split_pdf, path_by_data_id[data["data_id"]], split_pages, chunk_dir)
+        except Exception as e:
+            continue
+        if not chunks:
+            continue
+        
+        pending.remove(data)
+        for n, chunk in enumerate(chunks):
+            chunk["data_id"] = f"{data['data_id']}_part{n+1}"
+            path_by_data_id[chunk["data_id"]] = chunk["path"]
+            page_counts[chunk["data_id"]] = chunk["last_page"] - chunk["first_page"] + 1
+            pending.append({
+                "name": os.path.basename(chunk["path"]),
+                "is_ocr": data["is_ocr"],
+                "data_id": chunk["data_id"]
+            })
+        chunks_by_parent[data["data_id"]] = chunks
+        if job_id:
+            record_job_state("add_chunks", job_id, data["data_id"], chunks)
+        _metrics.inc("files_split")
+        _metrics.inc("chunks_submitted", len(chunks))
+    return chunks_by_parent
+
+def reindex_stitched(chunk_dirs, extract_dir):
+    """Index the Markdown of a result that was not extracted from an archive, replacing the indexed results of its chunks"""
+    try:
+        index = get_chunk_index()
+        if index is None:
+            return
+        for chunk_extract_dir in chunk_dirs:
+            index.remove_under(chunk_extract_dir)
+        markdown_path = find_markdown_file(extract_dir)
+        if markdown_path:
+            _metrics.inc("chunks_indexed", index.add_file(markdown_path, os.path.basename(extract_dir)))
+    except Exception as e:
+        _metrics.inc("index_errors")
+
+async def stitch_split_files(job_result, chunks_by_parent, name_by_data_id, chunk_dir, job_id=None):
+    """
+    Merge the converted chunks of split files into one result per file
+    
+    Chunk entries in the job result are replaced by an entry for their file.
+    A file with some chunks missing is still returned, with the missing
+    page ranges listed, and makes the job partial. A file with chunks
+    still pending is left pending, with its chunk files and downloaded
+    chunks kept for resume_job to stitch; the chunk files and results of
+    every other file are removed.
+    
+    Args:
+        job_result: Merged job result, updated in place
+        chunks_by_parent: Chunks by the data ID of their file, from split_large_files
+        name_by_data_id: File name of every original entry
+        chunk_dir: Directory holding the chunk files, removed once empty
+        job_id: Job reserving the stitched result directories, see claim_output_dir (optional)
+    """
+    chunk_ids = {chunk["data_id"] for chunks in chunks_by_parent.values() for chunk in chunks}
+    chunk_names = {os.path.basename(chunk["path"]) for chunks in chunks_by_parent.values() for chunk in chunks}
+    downloaded = {f.get("data_id"): f for f in job_result["downloaded_files"]}
+    job_result["downloaded_files"] = [f for f in job_result["downloaded_files"] if f.get("data_id") not in chunk_ids]
+    job_result["failed_files"] = [f for f in job_result["failed_files"] if f.get("data_id") not in chunk_ids]
+    pending_chunks = {name for name in job_result["pending_files"] if name in chunk_names}
+    job_result["pending_files"] = [name for name in job_result["pending_files"] if name not in chunk_names]
+    
+    for parent_id, chunks in chunks_by_parent.items():
+        file_name = name_by_data_id[parent_id]
+        if any(os.path.basename(chunk["path"]) in pending_chunks for chunk in chunks):
+            job_result["pending_files"].append(file_name)
+            continue
+        for chunk in chunks:
+            chunk["extract_dir"] = downloaded.get(chunk["data_id"], {}).get("extract_dir")
+        
+        try:
+            if not any(chunk["extract_dir"] for chunk in chunks):
+                error = "No chunk of the split file was converted"
+                job_result["failed_files"].append({"file_name": file_name, "data_id": parent_id, "error": error})
+                record_job_state("update_file", parent_id, FILE_FAILED, error=error)
+                continue
+            
+            extract_dir = os.path.join(OUTPUT_DIR, claim_output_dir(safe_output_name(file_name), parent_id, job_id))
+            try:
+                missing = await asyncio.to_thread(stitch_chunks, chunks, extract_dir)
+            except Exception as e:
+                job_result["failed_files"].append({"file_name": file_name, "data_id": parent_id, "error": f"Failed to stitch chunks: {e}"})
+                record_job_state("update_file", parent_id, FILE_FAILED, error=f"Failed to stitch chunks: {e}")
+                continue
+        finally:
+            remove_chunk_files(chunks, chunk_dir)
+            for chunk in chunks:
+                if chunk["extract_dir"]:
+                    shutil.rmtree(chunk["extract_dir"], ignore_errors=True)
+        
+        await asyncio.to_thread(reindex_stitched, [chunk["extract_dir"] for chunk in chunks if chunk["extract_dir"]], extract_dir)
+        stitched = {"file_name": file_name, "extract_dir": extract_dir, "data_id": parent_id, "chunks": len(chunks)}
+        if missing:
+            stitched["missing_pages"] = [f"{first}-{last}" for first, last in missing]
+            job_result["partial"] = True
+        job_result["downloaded_files"].append(stitched)
+        record_job_state("update_file", parent_id, FILE_DOWNLOADED, extract_dir=extract_dir)
+    
+    job_result["success"] = bool(job_result["downloaded_files"]) or (job_result["success"] and not job_result["failed_files"])
+    if job_result["success"]:
+        job_result.pop("error", None)
+        job_result["partial"] = job_result["partial"] or bool(job_result["failed_files"] or job_result["pending_files"])
+
+def find_url_flight(flight_key):
+    """
+    Find a running or recently finished job for the same URLs and options
+    
+    Only a job for the identical URL list matches; a job converting some of
+    the URLs, or the same URLs in another order, does not.
+    
+    Args:
+        flight_key: Key of the URL list and conversion options
+        
+    Returns:
+        tuple: (job ID, task) to attach to, or None if the URLs must be converted
+    """
+    now = time.monotonic()
+    for key, (_, _, expires) in list(_url_flights.items()):
+        if expires is not None and expires <= now:
+            del _url_flights[key]
+    
+    flight = _url_flights.get(flight_key)
+    if flight is None:
+        return None
+    job_id, task, expires = flight
+    if expires is not None:
+        # Reuse a finished result only while its files are still on disk
+        job_result = task.result()
+        if not all(os.path.isdir(f["extract_dir"]) for f in job_result["downloaded_files"]):
+            del _url_flights[flight_key]
+            return None
+        _metrics.inc("url_memo_hits")
+    else:
+        _metrics.inc("url_requests_coalesced")
+    return job_id, task
+
+def register_url_flight(flight_key, job_id, task):
+    """
+    Let identical URL requests attach to a job while it runs, and reuse its
+    result for URL_RESULT_MEMO_SECONDS once it has fully succeeded
+    
+    Args:
+        flight_key: Key of the URL list and conversion options
+        job_id: Job ID
+        task: Task of the job
+    """
+    _url_flights[flight_key] = (job_id, task, None)
+    
+    def finish(finished_task):
+        if _url_flights.get(flight_key, (None, None, None))[1] is not finished_task:
+            return
+        succeeded = not finished_task.cancelled() and finished_task.exception() is None and \
+            finished_task.result().get("success") and not finished_task.result().get("partial")
+        if succeeded and URL_RESULT_MEMO_SECONDS > 0:
+            _url_flights[flight_key] = (job_id, finished_task, time.monotonic() + URL_RESULT_MEMO_SECONDS)
+        else:
+            del _url_flights[flight_key]
+    
+    task.add_done_callback(finish)
+
+def validate_pdf_paths(file_paths):
+    """
+    Check that every path is an existing PDF file
+    
+    Args:
+        file_paths: Local file paths
+        
+    Returns:
+        str: Error message for the first invalid path, or None if all are valid
+    """
+    for path in file_paths:
+        if not os.path.exists(path):
+            return f"File does not exist: {path}"
+        if not path.lower().endswith('.pdf'):
+            return f"File is not in PDF format: {path}"
+    return None
+
+def job_file_entries(kind, sources, job_id):
+    """
+    Build the job store entries of the files of a new job
+    
+    Args:
+        kind: Job kind, "url" or "file"
+        sources: PDF URLs or local file paths
+        job_id: Job ID
+        
+    Returns:
+        list: Entries with data_id, name and source
+    """
+    entries = []
+    for i, source in enumerate(sources):
+        if kind == "url":
+            name = os.path.basename(urlparse(source).path) or source
+        else:
+            name, source = os.path.basename(source), os.path.abspath(source)
+        entries.append({"data_id": f"{kind}_convert_{i+1}_{job_id}", "name": name, "source": source})
+    return entries
+
+def start_url_job(urls, enable_ocr, progress=None, job_id=None, client=None, priority=None):
+    """
+    Create a job converting PDF URLs and start it in the background
+    
+    A request for exactly the same URLs, in the same order and with the
+    same options, as a job still running or recently finished attaches to
+    that job, see find_url_flight. Flights are keyed on the whole URL list:
+    requests that only share some of their URLs are converted separately.
+    
+    Args:
+        urls: PDF URLs
+        enable_ocr: Whether to enable OCR
+        progress: ProgressReporter for MCP progress notifications (optional)
+        job_id: ID of a job already recorded by enqueue_job, run by a worker (optional)
+        client: Client the job is run for, see run_in_sub_batches (optional)
+        priority: Priority class of the job's batches (default: normal)
+        
+    Returns:
+        tuple: (job ID, task resolving to the merged job result)
+    """
+    queued = job_id is not None
+    if not queued:
+        flight_key = make_cache_key(json.dumps(urls), dict(CONVERSION_OPTIONS, is_ocr=enable_ocr))
+        flight = find_url_flight(flight_key)
+        if flight is not None:
+            return flight
+    
+    http_client = get_http_client()
+    job_id = job_id or new_job_id()
+    entries = job_file_entries("url", urls, job_id)
+    if not queued:
+        record_job_state("create_job", "url", entries, dict(CONVERSION_OPTIONS, is_ocr=enable_ocr), job_id=job_id,
+                         owner=process_owner())
+    
+    files = [{"url": entry["source"], "is_ocr": enable_ocr, "data_id": entry["data_id"]} for entry in entries]
+    
+    async def run_job():
+        job_result = await run_in_sub_batches(
+            files,
+            lambda chunk: convert_url_batch(http_client, chunk, progress=progress, job_id=job_id),
+            client=client, priority=priority
+        )
+        record_job_state("finish_job", job_id, job_result.get("error"))
+        return job_result
+    
+    task = start_job_task(job_id, run_job())
+    if not queued:
+        register_url_flight(flight_key, job_id, task)
+    return job_id, task
+
+def start_file_job(file_paths, enable_ocr, progress=None, preflight=True, split_pages=None, job_id=None,
+                   content_hashes=None, client=None, priority=None):
+    """
+    Create a job converting local PDF files and start it in the background
+    
+    With preflight, every file is inspected locally first: broken and
+    encrypted files are rejected without being uploaded, OCR is turned off
+    for files that already have a text layer, and files with the most pages
+    are submitted first. Files found in the conversion cache are not
+    uploaded again; the results of the others are added to the cache once
+    downloaded. Files longer than split_pages are converted as page-range
+    chunks in parallel and stitched back together.
+    
+    Args:
+        file_paths: Local PDF file paths
+        enable_ocr: Whether to enable OCR
+        progress: ProgressReporter for MCP progress notifications (optional)
+        preflight: Whether to inspect the files before uploading them
+        split_pages: Maximum pages per chunk (default: SPLIT_PAGES, 0 disables splitting)
+        job_id: ID of a job already recorded by enqueue_job, run by a worker (optional)
+        content_hashes: SHA-256 of files already hashed by the caller, by path (optional)
+        client: Client the job is run for, see run_in_sub_batches (optional)
+        priority: Priority class of the job's batches (default: normal)
+        
+    Returns:
+        tuple: (job ID, task resolving to the merged job result)
+    """
+    http_client = get_http_client()
+    content_hashes = content_hashes or {}
+    queued = job_id is not None
+    job_id = job_id or new_job_id()
+    
+    entries = job_file_entries("file", file_paths, job_id)
+    files_data = []
+    path_by_data_id = {}
+    for path, entry in zip(file_paths, entries):
+        path_by_data_id[entry["data_id"]] = path
+        files_data.append({
+            "name": entry["name"],
+            "is_ocr": enable_ocr,
+            "data_id": entry["data_id"]
+        })
+    
+    if not queued:
+        record_job_state("create_job", "file", entries, dict(CONVERSION_OPTIONS, is_ocr=enable_ocr), job_id=job_id,
+                         owner=process_owner())
+    
+    async def run_job():
+        rejected_files = []
+        page_counts = {}
+        ocr_disabled = []
+        if preflight:
+            for data in files_data:
+                with _metrics.span("preflight"):
+                    info = await asyncio.to_thread(inspect_pdf, path_by_data_id[data["data_id"]])
+                if not info["valid"]:
+                    rejected_files.append({"file_name": data["name"], "data_id": data["data_id"], "error": info["error"]})
+                    record_job_state("update_file", data["data_id"], FILE_FAILED, error=info["error"])
+                    continue
+                page_counts[data["data_id"]] = info["pages"] or 0
+                if data["is_ocr"] and info["has_text"]:
+                    data["is_ocr"] = False
+                    ocr_disabled.append(data["name"])
+            _metrics.inc("preflight_rejected", len(rejected_files))
+            _metrics.inc("preflight_ocr_disabled", len(ocr_disabled))
+        rejected_ids = {f["data_id"] for f in rejected_files}
+        
+        cache = get_conversion_cache()
+        cache_keys = {}
+        cached_files = {}
+        if cache is not None:
+            for data in files_data:
+                if data["data_id"] in rejected_ids:
+                    continue
+                try:
+                    content_hash = content_hashes.get(path_by_data_id[data["data_id"]]) or \
+                        await asyncio.to_thread(hash_file, path_by_data_id[data["data_id"]])
+                except OSError as e:
+                    continue
+                cache_keys[data["data_id"]] = make_cache_key(
+                    content_hash, dict(CONVERSION_OPTIONS, is_ocr=data["is_ocr"], extract_profile=EXTRACT_PROFILE)
+                )
+                cached_dir = cache.get(cache_keys[data["data_id"]])
+                _metrics.inc("cache_hits" if cached_dir else "cache_misses")
+                if cached_dir:
+                    # The cache keeps its own copy, the user gets theirs in the output directory
+                    extract_dir = os.path.join(OUTPUT_DIR, claim_output_dir(safe_output_name(data["name"]), data["data_id"], job_id))
+                    try:
+                        await asyncio.to_thread(copy_result_dir, cached_dir, extract_dir)
+                    except OSError as e:
+                        continue
+                    await asyncio.to_thread(reindex_stitched, [], extract_dir)
+                    cached_files[data["data_id"]] = {
+                        "file_name": data["name"],
+                        "extract_dir": extract_dir,
+                        "data_id": data["data_id"],
+                        "cached": True
+                    }
+                    record_job_state("update_file", data["data_id"], FILE_DOWNLOADED, extract_dir=extract_dir)
+        
+        pending = [data for data in files_data if data["data_id"] not in cached_files and data["data_id"] not in rejected_ids]
+        chunks_by_parent = await split_large_files(
+            pending, path_by_data_id, page_counts,
+            SPLIT_PAGES if split_pages is None else split_pages,
+            os.path.join(OUTPUT_DIR, ".pdf2md_chunks", job_id), job_id=job_id
+        )
+        # Long documents take longest to convert, so start them first; the short ones are packed together last
+        pending.sort(key=lambda data: page_counts.get(data["data_id"], 0), reverse=True)
+        if progress is not None:
+            progress.total = len(pending)
+        
+        job_result = await run_in_sub_batches(
+            pending,
+            lambda chunk: convert_file_batch(
+                http_client, [path_by_data_id[data["data_id"]] for data in chunk], chunk,
+                progress=progress, job_id=job_id, pages=sum(page_counts.get(data["data_id"], 0) for data in chunk)
+            ),
+            pages=page_counts, client=client, priority=priority
+        )
+        
+        if chunks_by_parent:
+            await stitch_split_files(
+                job_result, chunks_by_parent, {data["data_id"]: data["name"] for data in files_data},
+                os.path.join(OUTPUT_DIR, ".pdf2md_chunks", job_id), job_id=job_id
+            )
+        
+        for downloaded_file in job_result["downloaded_files"]:
+            cache_key = cache_keys.get(downloaded_file.get("data_id"))
+            if cache is not None and cache_key and not downloaded_file.get("missing_pages"):
+                await asyncio.to_thread(cache.put, cache_key, downloaded_file["extract_dir"])
+        
+        order = {data["data_id"]: i for i, data in enumerate(files_data)}
+        job_result["downloaded_files"] = sorted(
+            list(cached_files.values()) + job_result["downloaded_files"],
+            key=lambda f: order.get(f.get("data_id"), len(order))
+        )
+        job_result["cache"] = {"hits": len(cached_files), "misses": len(files_data) - len(cached_files) - len(rejected_files)}
+        if rejected_files:
+            job_result["failed_files"] = sorted(
+                rejected_files + job_result["failed_files"],
+                key=lambda f: order.get(f.get("data_id"), len(order))
+            )
+            if job_result["downloaded_files"]:
+                job_result["partial"] = True
+            else:
+                job_result["success"] = False
+                job_result["error"] = job_result.get("error") or rejected_files[0]["error"]
+        if preflight:
+            job_result["preflight"] = {
+                "inspected": len(files_data),
+                "rejected": len(rejected_files),
+                "ocr_disabled": len(ocr_disabled),
+                "ocr_disabled_files": ocr_disabled
+            }
+        record_job_state("finish_job", job_id, job_result.get("error"))
+        return job_result
+    
+    return job_id, start_job_task(job_id, run_job())
+
+def enqueue_job(kind, sources, enable_ocr, preflight=True, split_pages=None, client=None, priority=None):
+    """
+    Record a job and put it on the worker queue
+    
+    Args:
+        kind: Job kind, "url" or "file"
+        sources: PDF URLs or local file paths
+        enable_ocr: Whether to enable OCR
+        preflight: Whether to inspect local files before uploading them
+        split_pages: Maximum pages per chunk of local files (optional)
+        client: Client the job is run for, used by the worker's batch scheduler (optional)
+        priority: Priority class of the job's batches (optional)
+        
+    Returns:
+        str: Job ID
+    """
+    job_id = new_job_id()
+    if kind == "file":
+        # Workers may run in another directory or on another node sharing the volume
+        sources = [os.path.abspath(path) for path in sources]
+    get_job_store().create_job(
+        kind, job_file_entries(kind, sources, job_id), dict(CONVERSION_OPTIONS, is_ocr=enable_ocr), job_id=job_id
+    )
+    get_work_queue().enqueue(job_id, kind, {
+        "sources": sources,
+        "enable_ocr": enable_ocr,
+        "preflight": preflight,
+        "split_pages": split_pages,
+        "client": client,
+        "priority": priority
+    })
+    return job_id
 
-async def download_batch_results(client, extract_results):
+async def collect_queued_job(job_id, wait=True):
     """
-    Download batch task results
+    Get the result of a job run by the workers
     
     Args:
-        client: HTTP client
-        extract_results: List of task results
+        job_id: Job ID returned by enqueue_job
+        wait: Whether to wait until a worker has finished the job
         
     Returns:
-        list: List of downloaded file information
+        dict: Job result as returned by summarize_job, with the queue entry
     """
-    downloaded_files = []
+    queue = get_work_queue()
+    entry = await asyncio.to_thread(queue.get, job_id)
+    while wait and entry is not None and entry["state"] in (QUEUE_QUEUED, QUEUE_LEASED):
+        await asyncio.sleep(QUEUE_POLL_INTERVAL)
+        entry = await asyncio.to_thread(queue.get, job_id)
     
-    for i, result in enumerate(extract_results):
-        if result.get("state") == "done":
-            try:
-                file_name = result.get("file_name", f"file_{i+1}")
-                zip_url = result.get("full_zip_url", "")
-                
-                if not zip_url:
-                    continue
-                
-                downloaded_file = await download_zip_file(client, zip_url, file_name)
-                if downloaded_file:
-                    downloaded_files.append(downloaded_file)
-            except Exception as e:
-                pass
+    result = summarize_job(get_job_store().get_job(job_id))
+    if entry is not None:
+        result["queue"] = {key: entry[key] for key in ("state", "attempts", "worker", "error")}
+        if entry["state"] == QUEUE_FAILED and not result["downloaded_files"]:
+            result["success"] = False
+            result["error"] = entry["error"]
+    return result
+
+async def run_queued_job(queue, entry, worker_id):
+    """
+    Run one leased job, renewing its lease until the job has finished
+    
+    A job whose earlier lease already submitted batches or split files is
+    resumed instead of being submitted again: its batches are polled, split
+    files are stitched from their chunks and only the files and chunks it
+    never submitted are sent, so a worker crash never pays for a conversion
+    twice.
+    
+    Args:
+        queue: WorkQueue the job was leased from
+        entry: Leased queue entry
+        worker_id: ID of this worker
+    """
+    job_id = entry["job_id"]
+    payload = entry["payload"]
+    job = await asyncio.to_thread(get_job_store().get_job, job_id)
+    if job is None:
+        await asyncio.to_thread(queue.complete, job_id, worker_id, error="Job not found in the job store")
+        return
+    
+    # The lease makes this worker the owner, whoever ran the job before
+    await asyncio.to_thread(record_job_state, "claim_job", job_id, process_owner(), job["owner"])
+    try:
+        if job["batches"] or job["chunks"]:
+            task = start_job_task(job_id, resume_job(job_id, submit_queued=True))
+        elif entry["kind"] == "url":
+            _, task = start_url_job(payload["sources"], payload["enable_ocr"], job_id=job_id,
+                                    client=payload.get("client"), priority=payload.get("priority"))
+        else:
+            _, task = start_file_job(payload["sources"], payload["enable_ocr"], preflight=payload["preflight"],
+                                     split_pages=payload["split_pages"], job_id=job_id,
+                                     client=payload.get("client"), priority=payload.get("priority"))
+    except Exception as e:
+        await asyncio.to_thread(queue.retry, job_id, worker_id, str(e))
+        return
     
-    return downloaded_files
+    try:
+        while not task.done():
+            await asyncio.wait({task}, timeout=max(1.0, QUEUE_LEASE_SECONDS / 3))
+            if not task.done() and not await asyncio.to_thread(queue.renew, job_id, worker_id, QUEUE_LEASE_SECONDS):
+                # The lease expired and another worker took the job over
+                task.cancel()
+                _metrics.inc("queue_leases_lost")
+                return
+        result = task.result()
+    except asyncio.CancelledError:
+        task.cancel()
+        await asyncio.to_thread(queue.release, job_id, worker_id)
+        raise
+    except Exception as e:
+        _metrics.inc("queue_jobs_retried")
+        await asyncio.to_thread(queue.retry, job_id, worker_id, str(e))
+        return
+    
+    error = result.get("error") if isinstance(result, dict) and not result.get("success") else None
+    await asyncio.to_thread(queue.complete, job_id, worker_id, error=error)
+    _metrics.inc("queue_jobs_completed")
 
-async def download_zip_file(client, zip_url, file_name, prefix="md", max_retries=3):
+async def run_worker(worker_id=None, concurrency=None):
     """
-    Download and save ZIP file, then automatically unzip
+    Take conversion jobs from the queue and run them until cancelled
+    
+    Jobs still running when the worker is cancelled are given back to the
+    queue. If the worker dies instead, its leases expire and the jobs are
+    taken over by other workers.
     
     Args:
-        client: HTTP client
-        zip_url: ZIP file URL
-        file_name: File name
-        prefix: File prefix
-        max_retries: Maximum number of retries
+        worker_id: ID recorded on leased jobs (default: host name and process ID)
+        concurrency: Jobs run at the same time (default: WORKER_CONCURRENCY)
+    """
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    limit = max(1, concurrency or WORKER_CONCURRENCY)
+    queue = get_work_queue()
+    running = set()
+    try:
+        while True:
+            if len(running) >= limit:
+                await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                continue
+            entry = await asyncio.to_thread(queue.lease, worker_id, QUEUE_LEASE_SECONDS)
+            if entry is None:
+                await asyncio.sleep(QUEUE_POLL_INTERVAL)
+                continue
+            task = asyncio.ensure_future(run_queued_job(queue, entry, worker_id))
+            running.add(task)
+            task.add_done_callback(running.discard)
+    finally:
+        for task in running:
+            task.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+        await close_http_client()
+
+def start_worker_processes(count):
+    """
+    Start local worker processes sharing the output directory and queue
+    
+    The workers are stopped when this process exits.
+    
+    Args:
+        count: Number of worker processes
         
     Returns:
-        dict: Dictionary containing file name and unzip directory, or None if failed
+        list: The started processes
     """
-    retry_count = 0
+    import atexit
+    import subprocess
     
-    while retry_count < max_retries:
-        try:
-            zip_response = await client.get(zip_url, follow_redirects=True, timeout=120.0)
-            
-            if zip_response.status_code == 200:
-                current_date = time.strftime("%Y%m%d")
-                
-                base_name = os.path.splitext(file_name)[0]
-                # Only remove control characters and chars that are invalid in filenames
-                safe_name = re.sub(r'[<>:"/\\|?*\x00-\x1f]', '', base_name).strip()
-                # Replace spaces with underscores
-                safe_name = re.sub(r'\s+', '_', safe_name)
-                
-                if safe_name.isdigit() or re.match(r'^\d+\.\d+$', safe_name):
-                    safe_name = f"paper_{safe_name}"
-                    
-                zip_filename = f"{prefix}_{safe_name}_{current_date}.zip"
-                
-                download_dir = Path(OUTPUT_DIR)
-                if not download_dir.exists():
-                    try:
-                        download_dir.mkdir(parents=True, exist_ok=True)
-                    except Exception as e:
-                        print(f"Error creating directory: {e}")
-                        return None
-                
-                save_path = download_dir / zip_filename
-                
-                with open(save_path, "wb") as f:
-                    f.write(zip_response.content)
-                
-                extract_dir = download_dir / safe_name
-                if not extract_dir.exists():
-                    extract_dir.mkdir(parents=True)
-                
-                import zipfile
-                try:
-                    with zipfile.ZipFile(save_path, 'r') as zip_ref:
-                        zip_ref.extractall(extract_dir)
-                    os.remove(save_path)
-                    
-                    return {
-                        "file_name": file_name,
-                        "extract_dir": str(extract_dir)
-                    }
-                except Exception as e:
-                    pass
-            else:
-                retry_count += 1
-                if retry_count < max_retries:
-                    await asyncio.sleep(2)
-                continue
-        except Exception as e:
-            retry_count += 1
-            if retry_count < max_retries:
-                await asyncio.sleep(2)
-            continue
+    for _ in range(count):
+        _worker_processes.append(subprocess.Popen(
+            [sys.executable, "-m", "pdf2md", "--worker", "--output-dir", OUTPUT_DIR],
+            # stdout carries the MCP protocol of this process, keep it clean
+            stdin=subprocess.DEVNULL, stdout=sys.stderr
+        ))
     
-    return None
+    def stop_workers():
+        for process in _worker_processes:
+            if process.poll() is None:
+                process.terminate()
+        for process in _worker_processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired as e:
+                process.kill()
+    
+    atexit.register(stop_workers)
+    return _worker_processes
 
-def parse_url_string(url_string):
+def job_in_flight(job):
+    """Check whether a job is still being worked on, here, by a worker or through batches left to collect"""
+    if job["job_id"] in _job_tasks or needs_resume(job):
+        return True
+    entry = get_work_queue().get(job["job_id"]) if QUEUE_ENABLED else None
+    return entry is not None and entry["state"] in (QUEUE_QUEUED, QUEUE_LEASED)
+
+def resume_stalled_job(job):
     """
-    Parse URL string separated by spaces, commas, or newlines
+    Resume a job in the background when nothing works on it but it has batches or downloads left
     
     Args:
-        url_string: URL string
+        job: Job record from the job store
         
     Returns:
-        list: List of URLs
+        bool: Whether the job was resumed
     """
-    if isinstance(url_string, str):
-        if (url_string.startswith('"') and url_string.endswith('"')) or \
-           (url_string.startswith("'") and url_string.endswith("'")):
-            url_string = url_string[1:-1]
+    if job["job_id"] in _job_tasks or not needs_resume(job):
+        return False
+    entry = get_work_queue().get(job["job_id"]) if QUEUE_ENABLED else None
+    if entry is not None and entry["state"] in (QUEUE_QUEUED, QUEUE_LEASED):
+        # A worker owns the job, resuming it here would run it twice
+        return False
+    start_job_task(job["job_id"], resume_job(job["job_id"]))
+    return True
+
+async def reconcile_manifest(manifest, entries, resume=False):
+    """
+    Update submitted manifest entries from the job store
     
-    urls = []
-    for part in url_string.split():
-        if ',' in part:
-            urls.extend(part.split(','))
-        elif '\n' in part:
-            urls.extend(part.split('\n'))
-        else:
-            urls.append(part)
+    Entries whose job is still in flight are left alone, and with resume
+    the job is restarted if it was left with batches to poll or results to
+    download. The others become converted or failed from the state of their
+    file in the job, or are cleared so they are submitted again if their
+    job ended without them.
     
-    cleaned_urls = []
-    for url in urls:
-        if (url.startswith('"') and url.endswith('"')) or \
-           (url.startswith("'") and url.endswith("'")):
-            cleaned_urls.append(url[1:-1])
+    Args:
+        manifest: SyncManifest
+        entries: Manifest entries by path, updated in place
+        resume: Resume stalled jobs in the background (default: False)
+    """
+    store = get_job_store()
+    files_by_job = {}
+    updated = []
+    for path, entry in entries.items():
+        if entry["state"] != SYNC_SUBMITTED:
+            continue
+        job_id = entry["job_id"]
+        if job_id not in files_by_job:
+            job = await asyncio.to_thread(store.get_job, job_id) if job_id else None
+            if job is not None and await asyncio.to_thread(job_in_flight, job):
+                if resume:
+                    resume_stalled_job(job)
+                files_by_job[job_id] = None
+            else:
+                files_by_job[job_id] = {f["source"]: f for f in job["files"]} if job else {}
+        files = files_by_job[job_id]
+        if files is None:
+            continue
+        
+        f = files.get(path)
+        if f is not None and f["state"] == FILE_DOWNLOADED:
+            entry.update(state=SYNC_CONVERTED, extract_dir=f["extract_dir"], error=None)
+        elif f is not None and f["state"] == FILE_FAILED:
+            entry.update(state=SYNC_FAILED, error=f["error"])
         else:
-            cleaned_urls.append(url)
-    
-    return cleaned_urls
+            entry.update(state=None, job_id=None)
+        updated.append(entry)
+    if updated:
+        await asyncio.to_thread(manifest.record, updated)
 
-def parse_path_string(path_string):
+async def hash_files(paths):
     """
-    Parse file path string separated by spaces, commas, or newlines
+    Hash files in worker threads, HASH_CONCURRENCY at a time
     
     Args:
-        path_string: File path string
+        paths: File paths
         
     Returns:
-        list: List of file paths
+        dict: SHA-256 hex digest by path, without the files that could not be read
     """
-    if isinstance(path_string, str):
-        if (path_string.startswith('"') and path_string.endswith('"')) or \
-           (path_string.startswith("'") and path_string.endswith("'")):
-            path_string = path_string[1:-1]
-    
-    paths = []
-    for part in path_string.split():
-        if ',' in part:
-            paths.extend(part.split(','))
-        elif '\n' in part:
-            paths.extend(part.split('\n'))
-        else:
-            paths.append(part)
+    semaphore = asyncio.Semaphore(max(1, HASH_CONCURRENCY))
+    hashes = {}
     
-    cleaned_paths = []
-    for path in paths:
-        if (path.startswith('"') and path.endswith('"')) or \
-           (path.startswith("'") and path.endswith("'")):
-            cleaned_paths.append(path[1:-1])
-        else:
-            cleaned_paths.append(path)
+    async def hash_one(path):
+        async with semaphore:
+            try:
+                hashes[path] = await asyncio.to_thread(hash_file, path)
+            except OSError as e:
+                pass
     
-    return cleaned_paths
+    await asyncio.gather(*(hash_one(path) for path in paths))
+    return hashes
+
+@asynccontextmanager
+async def server_lifespan(server):
+    """Own the shared HTTP client and resume unfinished jobs for the lifetime of the MCP server"""
+    try:
+        # In queue mode the workers own the jobs and recover them through their leases
+        if not QUEUE_ENABLED:
+            resume_pending_jobs()
+    except Exception as e:
+        pass
+    try:
+        yield {}
+    finally:
+        await close_http_client()
 
 # Create MCP server
-mcp = FastMCP("PDF to Markdown Conversion Service")
+mcp = FastMCP("PDF to Markdown Conversion Service", lifespan=server_lifespan)
 
 @mcp.tool()  
-async def convert_pdf_url(url: str, enable_ocr: bool = True) -> Dict[str, Any]:
+async def convert_pdf_url(url: str, enable_ocr: bool = True, priority: Optional[str] = None,
+                          ctx: Context = None) -> Dict[str, Any]:
     """
     Convert PDF URL to Markdown, supports single URL or URL list
     
     Args:
         url: PDF file URL or URL list, can be separated by spaces, commas, or newlines
         enable_ocr: Whether to enable OCR (default: True)
+        priority: Scheduling class: "interactive", "normal" or "bulk" (default: interactive for a
+            single document, normal otherwise)
+        ctx: MCP request context, used for progress notifications
 
     Returns:
         dict: Conversion result information
@@ -331,74 +2448,63 @@ async def convert_pdf_url(url: str, enable_ocr: bool = True) -> Dict[str, Any]:
     else:
         urls = [url]  
     
-    async with httpx.AsyncClient(timeout=300.0) as client:
+    priority = resolve_priority(priority, len(urls))
+    if priority is None:
+        return {"success": False, "error": f"Unknown priority, use one of: {', '.join(PRIORITIES)}"}
+    
+    if QUEUE_ENABLED:
         try:
-            files = []
-            for i, url_item in enumerate(urls):
-                files.append({
-                    "url": url_item, 
-                    "is_ocr": enable_ocr, 
-                    "data_id": f"url_convert_{i+1}_{int(time.time())}"
-                })
-            
-            batch_data = {
-                "enable_formula": True,
-                "language": "auto",
-                "layout_model": "doclayout_yolo",
-                "enable_table": True,
-                "files": files
-            }
-            
-            response = await client.post(
-                MINERU_BATCH_API,
-                headers=HEADERS,
-                json=batch_data,
-                timeout=300.0
-            )
-            
-            if response.status_code != 200:
-                return {"success": False, "error": f"Request failed: {response.status_code}"}
-            
-            try:
-                status_data = response.json()
-                
-                if status_data.get("code") != 0 and status_data.get("code") != 200:
-                    error_msg = status_data.get("msg", "Unknown error")
-                    return {"success": False, "error": f"API returned error: {error_msg}"}
-                    
-                batch_id = status_data.get("data", {}).get("batch_id", "")
-                if not batch_id:
-                    return {"success": False, "error": "Failed to get batch ID"}
-                
-                task_status = await check_task_status(client, batch_id)
-                
-                if not task_status.get("success"):
-                    return task_status
-                
-                downloaded_files = await download_batch_results(client, task_status.get("extract_results", []))
-                
-                return {
-                    "success": True, 
-                    "downloaded_files": downloaded_files,
-                    "batch_id": batch_id,
-                    "total_urls": len(urls),
-                    "processed_urls": len(downloaded_files)
-                }
-                
-            except json.JSONDecodeError as e:
-                return {"success": False, "error": f"Failed to parse JSON: {e}"}
-                
+            job_id = await asyncio.to_thread(enqueue_job, "url", urls, enable_ocr, client=client_key(ctx), priority=priority)
+            return await collect_queued_job(job_id)
         except Exception as e:
             return {"success": False, "error": str(e)}
+    
+    try:
+        job_id, task = start_url_job(urls, enable_ocr, ProgressReporter(ctx, len(urls)),
+                                     client=client_key(ctx), priority=priority)
+        job_result = await asyncio.shield(task)
+        
+        if not job_result["success"]:
+            # The result may be shared with identical requests, so copy it
+            failed_result = {key: value for key, value in job_result.items() if key != "upload_results"}
+            return dict(failed_result, job_id=job_id)
+        
+        downloaded_files = with_resource_uris(job_id, job_result["downloaded_files"])
+        
+        return {
+            "success": True, 
+            "job_id": job_id,
+            "partial": job_result["partial"],
+            "downloaded_files": downloaded_files,
+            "failed_files": job_result["failed_files"],
+            "pending_files": job_result["pending_files"],
+            "batch_id": job_result["batch_ids"][0] if job_result["batch_ids"] else None,
+            "batch_ids": job_result["batch_ids"],
+            "total_urls": len(urls),
+            "processed_urls": len(downloaded_files),
+            "connection_stats": get_connection_stats()
+        }
+            
+    except Exception as e:
+        return {"success": False, "error": str(e)}
 
 @mcp.tool()  
-async def convert_pdf_file(file_path: str, enable_ocr: bool = True) -> Dict[str, Any]:
+async def convert_pdf_file(file_path: str, enable_ocr: bool = True, preflight: bool = True,
+                           split_pages: Optional[int] = None, priority: Optional[str] = None,
+                           ctx: Context = None) -> Dict[str, Any]:
     """
     Convert local PDF file to Markdown, supports single file or file list
     
     Args:
         file_path: PDF file local path or path list, can be separated by spaces, commas, or newlines
         enable_ocr: Whether to enable OCR (default: True)
+        preflight: Inspect files before uploading: reject broken or encrypted ones and skip OCR
+            for files that already have a text layer (default: True)
+        split_pages: Convert PDFs longer than this many pages as page-range chunks in parallel and
+            stitch the results (default: PDF2MD_SPLIT_PAGES, 0 disables splitting, needs pypdf)
+        priority: Scheduling class: "interactive", "normal" or "bulk" (default: interactive for a
+            single document, normal otherwise)
+        ctx: MCP request context, used for progress notifications
 
     Returns:
         dict: Conversion result information
@@ -411,96 +2517,376 @@ async def convert_pdf_file(file_path: str, enable_ocr: bool = True) -> Dict[str,
     else:
         file_paths = [file_path]  
     
-    for path in file_paths:
-        if not os.path.exists(path):
-            return {"success": False, "error": f"File does not exist: {path}"}
-        else:
-            if not path.lower().endswith('.pdf'):
-                return {"success": False, "error": f"File is not in PDF format: {path}"}
+    error = validate_pdf_paths(file_paths)
+    if error:
+        return {"success": False, "error": error}
+    
+    priority = resolve_priority(priority, len(file_paths))
+    if priority is None:
+        return {"success": False, "error": f"Unknown priority, use one of: {', '.join(PRIORITIES)}"}
     
-    async with httpx.AsyncClient(timeout=300.0) as client:
+    if QUEUE_ENABLED:
         try:
-            file_names = [os.path.basename(path) for path in file_paths]
-            
-            files_data = []
-            for i, name in enumerate(file_names):
-                files_data.append({
-                    "name": name,
-                    "is_ocr": enable_ocr,
-                    "data_id": f"file_convert_{i+1}_{int(time.time())}"
-                })
-            
-            file_url_data = {
-                "enable_formula": True,
-                "language": "auto",
-                "layout_model": "doclayout_yolo",
-                "enable_table": True,
-                "files": files_data
-            }
-            
-            file_url_response = await client.post(
-                MINERU_FILE_URLS_API,
-                headers=HEADERS,
-                json=file_url_data,
-                timeout=60.0
-            )
-            
-            if file_url_response.status_code != 200:
-                return {"success": False, "error": f"Failed to get upload link: {file_url_response.status_code}"}
-            
-            file_url_result = file_url_response.json()
-            
-            if file_url_result.get("code") != 0 and file_url_result.get("code") != 200:
-                error_msg = file_url_result.get("msg", "Unknown error")
-                return {"success": False, "error": f"Failed to get upload link: {error_msg}"}
-            
-            batch_id = file_url_result.get("data", {}).get("batch_id", "")
-            file_urls = file_url_result.get("data", {}).get("file_urls", [])
-            
-            if not batch_id or not file_urls or len(file_urls) != len(file_paths):
-                return {"success": False, "error": "Failed to get upload link or batch ID"}
-            
-            upload_results = []
-            for i, (file_path, upload_url) in enumerate(zip(file_paths, file_urls)):
-                try:
-                    with open(file_path, 'rb') as f:
-                        file_content = f.read()
-                        
-                        upload_response = await client.put(
-                            upload_url,
-                            content=file_content,
-                            headers={},  
-                            timeout=300.0
-                        )
-                    
-                    if upload_response.status_code != 200:
-                        upload_results.append({"file": file_names[i], "success": False})
-                    else:
-                        upload_results.append({"file": file_names[i], "success": True})
-                except Exception as e:
-                    upload_results.append({"file": file_names[i], "success": False, "error": str(e)})
-            
-            if not any(result["success"] for result in upload_results):
-                return {"success": False, "error": "All files failed to upload", "upload_results": upload_results}
-            
-            task_status = await check_task_status(client, batch_id)
-            
-            if not task_status.get("success"):
-                return task_status
-            
-            downloaded_files = await download_batch_results(client, task_status.get("extract_results", []))
-            
-            return {
-                "success": True, 
-                "downloaded_files": downloaded_files,
-                "batch_id": batch_id,
-                "upload_results": upload_results,
-                "total_files": len(file_paths),
-                "processed_files": len(downloaded_files)
-            }
-                
+            job_id = await asyncio.to_thread(enqueue_job, "file", file_paths, enable_ocr, preflight, split_pages,
+                                             client=client_key(ctx), priority=priority)
+            return await collect_queued_job(job_id)
         except Exception as e:
             return {"success": False, "error": str(e)}
+    
+    try:
+        job_id, task = start_file_job(file_paths, enable_ocr, ProgressReporter(ctx, len(file_paths)),
+                                      preflight=preflight, split_pages=split_pages,
+                                      client=client_key(ctx), priority=priority)
+        job_result = await asyncio.shield(task)
+        
+        if not job_result["success"]:
+            return dict(job_result, job_id=job_id)
+        
+        downloaded_files = with_resource_uris(job_id, job_result["downloaded_files"])
+        
+        return {
+            "success": True, 
+            "job_id": job_id,
+            "partial": job_result["partial"],
+            "downloaded_files": downloaded_files,
+            "failed_files": job_result["failed_files"],
+            "pending_files": job_result["pending_files"],
+            "batch_id": job_result["batch_ids"][0] if job_result["batch_ids"] else None,
+            "batch_ids": job_result["batch_ids"],
+            "upload_results": job_result["upload_results"],
+            "total_files": len(file_paths),
+            "processed_files": len(downloaded_files),
+            "cache": job_result["cache"],
+            "preflight": job_result.get("preflight"),
+            "connection_stats": get_connection_stats()
+        }
+            
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+@mcp.tool()
+async def submit_conversion(source: str, enable_ocr: bool = True, preflight: bool = True,
+                            split_pages: Optional[int] = None, priority: str = PRIORITY_NORMAL,
+                            ctx: Context = None) -> Dict[str, Any]:
+    """
+    Start converting PDF URLs or local PDF files without waiting for the results
+    
+    Returns a job ID right away. Use get_conversion_status to follow the job
+    and collect_conversion to get its results.
+    
+    Args:
+        source: PDF URLs or local PDF file paths, can be separated by spaces, commas, or newlines
+        enable_ocr: Whether to enable OCR (default: True)
+        preflight: Inspect local files before uploading them, see convert_pdf_file (default: True)
+        split_pages: Split local PDFs longer than this many pages, see convert_pdf_file
+        priority: Scheduling class: "interactive", "normal" or "bulk" (default: normal)
+        ctx: MCP request context, identifies the client for fair scheduling
+
+    Returns:
+        dict: Job handle information
+    """
+    if not MINERU_API_KEY:
+        return {"success": False, "error": "Missing API key, please set environment variable MINERU_API_KEY"}
+    
+    entries = parse_url_string(source)
+    if not entries:
+        return {"success": False, "error": "No URL or file path given"}
+    
+    is_url = [entry.lower().startswith(("http://", "https://")) for entry in entries]
+    if any(is_url) and not all(is_url):
+        return {"success": False, "error": "Mixed URLs and local files, please submit them separately"}
+    
+    priority = resolve_priority(priority or PRIORITY_NORMAL, len(entries))
+    if priority is None:
+        return {"success": False, "error": f"Unknown priority, use one of: {', '.join(PRIORITIES)}"}
+    client = client_key(ctx)
+    
+    try:
+        if all(is_url):
+            kind = "url"
+            if QUEUE_ENABLED:
+                job_id = await asyncio.to_thread(enqueue_job, kind, entries, enable_ocr, client=client, priority=priority)
+            else:
+                job_id, _ = start_url_job(entries, enable_ocr, client=client, priority=priority)
+        else:
+            kind = "file"
+            entries = parse_path_string(source)
+            error = validate_pdf_paths(entries)
+            if error:
+                return {"success": False, "error": error}
+            if QUEUE_ENABLED:
+                job_id = await asyncio.to_thread(enqueue_job, kind, entries, enable_ocr, preflight, split_pages,
+                                                 client=client, priority=priority)
+            else:
+                job_id, _ = start_file_job(entries, enable_ocr, preflight=preflight, split_pages=split_pages,
+                                           client=client, priority=priority)
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+    
+    return {
+        "success": True,
+        "job_id": job_id,
+        "kind": kind,
+        "status": QUEUE_QUEUED if QUEUE_ENABLED else JOB_RUNNING,
+        "priority": priority,
+        "total_files": len(entries)
+    }
+
+@mcp.tool()
+async def convert_pdf_directory(path: str, pattern: str = "*.pdf", recursive: bool = True, enable_ocr: bool = True,
+                                preflight: bool = True, wait: bool = True, retry_failed: bool = False,
+                                priority: str = PRIORITY_BULK, ctx: Context = None) -> Dict[str, Any]:
+    """
+    Convert the new and changed PDFs of a directory, or of the files matched by a glob
+    
+    The size, modification time and content hash of every submitted file are
+    kept in a manifest. A repeated sync only lists the directory: unchanged
+    files are skipped without being read, and nothing is sent to the API if
+    nothing changed.
+    
+    Args:
+        path: Directory, or glob such as /data/papers/**/*.pdf
+        pattern: File name pattern used when path is a directory (default: *.pdf)
+        recursive: Whether to include subdirectories when path is a directory (default: True)
+        enable_ocr: Whether to enable OCR (default: True)
+        preflight: Inspect files before uploading them, see convert_pdf_file (default: True)
+        wait: Whether to wait until the submitted files are converted (default: True)
+        retry_failed: Submit unchanged files again whose conversion failed (default: False)
+        priority: Scheduling class: "interactive", "normal" or "bulk" (default: bulk)
+        ctx: MCP request context, used for progress notifications
+
+    Returns:
+        dict: Sync summary with the job ID and, when waiting, the results of the submitted files
+    """
+    if not MINERU_API_KEY:
+        return {"success": False, "error": "Missing API key, please set environment variable MINERU_API_KEY"}
+    
+    path = path.strip()
+    if len(path) > 1 and path[0] == path[-1] and path[0] in "\"'":
+        path = path[1:-1]
+    if has_glob(path):
+        root, pattern = split_glob(path)
+        recursive = "/" in pattern or "**" in pattern
+    else:
+        root = path
+        if recursive:
+            pattern = "**/" + pattern
+    if not os.path.isdir(root):
+        return {"success": False, "error": f"Directory does not exist: {root}"}
+    root = os.path.abspath(root)
+    priority = resolve_priority(priority or PRIORITY_BULK, 0)
+    if priority is None:
+        return {"success": False, "error": f"Unknown priority, use one of: {', '.join(PRIORITIES)}"}
+    
+    try:
+        started = time.monotonic()
+        matcher = glob_to_regex(pattern)
+        manifest = get_sync_manifest()
+        files = await asyncio.to_thread(lambda: list(scan_files(root, matcher, recursive, exclude=[OUTPUT_DIR])))
+        known = await asyncio.to_thread(manifest.entries_under, root)
+        await reconcile_manifest(manifest, known, resume=True)
+        
+        scanned = {file_path for file_path, _, _ in files}
+        removed = [
+            file_path for file_path in known
+            if file_path not in scanned and matcher.match(os.path.relpath(file_path, root).replace(os.sep, "/"))
+        ]
+        
+        unchanged = 0
+        in_progress = 0
+        resubmitted = 0
+        submit = []
+        to_hash = []
+        for file_path, size, mtime_ns in files:
+            entry = known.get(file_path)
+            if entry is None or entry["size"] != size or entry["mtime_ns"] != mtime_ns:
+                to_hash.append((file_path, size, mtime_ns))
+            elif entry["state"] == SYNC_SUBMITTED:
+                in_progress += 1
+            elif entry["state"] == SYNC_CONVERTED or (entry["state"] == SYNC_FAILED and not retry_failed):
+                unchanged += 1
+            else:
+                # Failed, or its job ended without a result for it
+                resubmitted += 1
+                submit.append(entry)
+        
+        # Only files whose size or modification time changed are read
+        hashes = await hash_files([file_path for file_path, _, _ in to_hash])
+        touched = []
+        new = 0
+        changed = 0
+        for file_path, size, mtime_ns in to_hash:
+            if file_path not in hashes:
+                continue
+            entry = known.get(file_path)
+            if entry is not None and entry["hash"] == hashes[file_path] and (
+                entry["state"] == SYNC_CONVERTED or (entry["state"] == SYNC_FAILED and not retry_failed)
+            ):
+                touched.append(dict(entry, size=size, mtime_ns=mtime_ns))
+                unchanged += 1
+                continue
+            if entry is None:
+                new += 1
+            else:
+                changed += 1
+            submit.append({"path": file_path, "size": size, "mtime_ns": mtime_ns, "hash": hashes[file_path]})
+        
+        await asyncio.to_thread(manifest.remove, removed)
+        await asyncio.to_thread(manifest.record, touched)
+        _metrics.observe("directory_scan", time.monotonic() - started)
+        
+        result = {
+            "success": True,
+            "directory": root,
+            "pattern": pattern,
+            "scanned": len(files),
+            "unchanged": unchanged,
+            "new": new,
+            "changed": changed,
+            "removed": len(removed),
+            "resubmitted": resubmitted,
+            "in_progress": in_progress,
+            "submitted": len(submit),
+            "job_id": None,
+            "scan_seconds": round(time.monotonic() - started, 3)
+        }
+        if not submit:
+            return result
+        
+        paths = [entry["path"] for entry in submit]
+        task = None
+        if QUEUE_ENABLED:
+            job_id = await asyncio.to_thread(enqueue_job, "file", paths, enable_ocr, preflight,
+                                             client=client_key(ctx), priority=priority)
+        else:
+            job_id, task = start_file_job(paths, enable_ocr, ProgressReporter(ctx, len(paths)), preflight=preflight,
+                                          content_hashes={entry["path"]: entry["hash"] for entry in submit},
+                                          client=client_key(ctx), priority=priority)
+        submitted = {
+            entry["path"]: dict(entry, state=SYNC_SUBMITTED, job_id=job_id, extract_dir=None, error=None)
+            for entry in submit
+        }
+        await asyncio.to_thread(manifest.record, list(submitted.values()))
+        result["job_id"] = job_id
+        if not wait:
+            return result
+        
+        if task is not None:
+            await asyncio.shield(task)
+        else:
+            await collect_queued_job(job_id)
+        await reconcile_manifest(manifest, submitted)
+        result["converted"] = sum(1 for entry in submitted.values() if entry["state"] == SYNC_CONVERTED)
+        result["failed_files"] = [
+            {"file_name": entry["path"], "error": entry["error"]}
+            for entry in submitted.values() if entry["state"] == SYNC_FAILED
+        ]
+        result["pending_files"] = [entry["path"] for entry in submitted.values() if entry["state"] == SYNC_SUBMITTED]
+        return result
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+@mcp.tool()
+async def get_conversion_status(job_id: str) -> Dict[str, Any]:
+    """
+    Get the status of a conversion job and each of its files
+    
+    Args:
+        job_id: Job ID returned by a conversion tool
+
+    Returns:
+        dict: Job status information
+    """
+    job = get_job_store().get_job(job_id)
+    if job is None:
+        return {"success": False, "error": f"Job not found: {job_id}"}
+    
+    status = {
+        "success": True,
+        "job_id": job_id,
+        "kind": job["kind"],
+        "status": job["status"],
+        "in_progress": job_id in _job_tasks,
+        "batches": job["batches"],
+        "files": [
+            {key: f[key] for key in ("name", "source", "state", "extract_dir", "error")}
+            for f in job["files"]
+        ]
+    }
+    entry = get_work_queue().get(job_id) if QUEUE_ENABLED else None
+    if entry is not None:
+        status["queue"] = {key: entry[key] for key in ("state", "attempts", "worker", "error")}
+        status["in_progress"] = entry["state"] in (QUEUE_QUEUED, QUEUE_LEASED)
+    return status
+
+@mcp.tool()
+async def collect_conversion(job_id: str, wait: bool = True) -> Dict[str, Any]:
+    """
+    Collect the results of a conversion job without resubmitting it
+    
+    Unfinished batches of the job are polled again and converted files that
+    were not downloaded yet are downloaded.
+    
+    Args:
+        job_id: Job ID returned by a conversion tool
+        wait: Whether to wait until the job has finished (default: True)
+
+    Returns:
+        dict: Conversion result information
+    """
+    store = get_job_store()
+    job = store.get_job(job_id)
+    if job is None:
+        return {"success": False, "error": f"Job not found: {job_id}"}
+    
+    entry = get_work_queue().get(job_id) if QUEUE_ENABLED else None
+    if entry is not None and entry["state"] in (QUEUE_QUEUED, QUEUE_LEASED):
+        # A worker owns the job, resuming it here would run it twice
+        return await collect_queued_job(job_id, wait)
+    
+    resume_stalled_job(job)
+    task = _job_tasks.get(job_id)
+    
+    if task is not None and wait:
+        try:
+            await asyncio.shield(task)
+        except Exception as e:
+            return {"success": False, "job_id": job_id, "error": str(e)}
+    
+    return summarize_job(store.get_job(job_id))
+
+@mcp.tool()
+async def search_converted(query: str, limit: int = 10) -> Dict[str, Any]:
+    """
+    Search the Markdown of all converted documents
+    
+    Documents are indexed section by section as they are extracted, so this
+    only needs PDF2MD_INDEX_ENABLED to be set while converting.
+    
+    Args:
+        query: Words to search for, every word must appear in a matching section
+        limit: Maximum number of sections returned (default: 10)
+
+    Returns:
+        dict: Matching sections with document name, Markdown path, heading, line and snippet, best first
+    """
+    if not INDEX_ENABLED:
+        return {"success": False, "error": "Search index is disabled, set PDF2MD_INDEX_ENABLED=true before converting"}
+    
+    started = time.monotonic()
+    try:
+        results = await asyncio.to_thread(get_chunk_index().search, query, limit)
+    except Exception as e:
+        return {"success": False, "error": f"Search failed: {e}"}
+    took = time.monotonic() - started
+    _metrics.observe("search", took)
+    
+    return {
+        "success": True,
+        "query": query,
+        "results": results,
+        "took_ms": round(took * 1000, 2)
+    }
 
 @mcp.prompt()
 def default_prompt() -> str:
@@ -539,7 +2925,67 @@ def get_api_status() -> str:
     """Get API status information"""
     if not MINERU_API_KEY:
         return "API status: Not configured (missing API key)"
-    return f"API status: Configured\nAPI base URL: {MINERU_API_BASE}\nAPI key: {MINERU_API_KEY[:10]}..."
+    stats = get_connection_stats()
+    status = (
+        f"API status: Configured\nAPI base URL: {MINERU_API_BASE}\nAPI key: {MINERU_API_KEY[:10]}...\n"
+        f"HTTP requests: {stats['requests']}, connections opened: {stats['connections_opened']}, "
+        f"reuse ratio: {stats['reuse_ratio']}, HTTP/2 requests: {stats['http2_requests']}"
+    )
+    for endpoint, guard_stats in get_endpoint_stats().items():
+        circuit = guard_stats["circuit"]
+        if circuit == "open":
+            circuit += f" (retry in {guard_stats['retry_in_seconds']}s)"
+        status += (
+            f"\nEndpoint {endpoint}: circuit {circuit}, "
+            f"requests: {guard_stats['requests']}, throttled: {guard_stats['throttled']}, "
+            f"rejected: {guard_stats['rejected']}, failures: {guard_stats['failures']}, "
+            f"paused for: {guard_stats['paused_seconds']}s"
+        )
+    try:
+        unfinished = get_job_store().list_jobs(status=JOB_RUNNING, limit=None)
+    except Exception as e:
+        unfinished = []
+    if unfinished:
+        status += f"\nUnfinished jobs: {len(unfinished)}, collect them with collect_conversion: " + ", ".join(
+            job["job_id"] for job in unfinished[:10]
+        ) + (", ..." if len(unfinished) > 10 else "")
+    return status
+
+@mcp.resource("metrics://pipeline")
+def get_pipeline_metrics() -> str:
+    """Get phase timings and counters of the conversion pipeline"""
+    return json.dumps({
+        **get_metrics(),
+        "connection_stats": get_connection_stats(),
+        "poll_scheduler": get_poll_scheduler().stats(),
+        "batch_scheduler": get_batch_scheduler().stats(),
+        "queue": get_work_queue().stats() if QUEUE_ENABLED else None,
+        "cache": get_conversion_cache().stats() if CACHE_ENABLED else None,
+        "index": get_chunk_index().stats() if INDEX_ENABLED else None
+    }, indent=2)
+
+@mcp.resource("archive://{name}/{member}")
+def get_archive_member(name: str, member: str):
+    """Read a member of a kept result archive, e.g. archive://paper/layout.json or archive://paper/images%2Ffig.jpg"""
+    name, member = unquote(name), unquote(member)
+    content = read_archive_member(os.path.join(OUTPUT_DIR, os.path.basename(name)), member)
+    if content is None:
+        raise ValueError(f"No kept archive member {member} for {name}")
+    if member.lower().endswith((".md", ".json", ".txt")):
+        return content.decode("utf-8", errors="replace")
+    return content
+
+@mcp.resource("pdf2md://{job}/{file}/markdown/{part}")
+def get_markdown_part(job: str, file: str, part: str) -> str:
+    """Read one part of the Markdown of a converted file, parts are about PDF2MD_RESOURCE_PART_SIZE bytes"""
+    if not part.isdigit():
+        raise ValueError(f"Invalid part number: {part}")
+    return read_markdown_resource(job, file, int(part))
+
+@mcp.resource("pdf2md://{job}/{file}/markdown")
+def get_markdown(job: str, file: str) -> str:
+    """Read the Markdown of a converted file; large files return their first part with a link to the next"""
+    return read_markdown_resource(job, file, 1)
 
 @mcp.resource("help://usage")
 def get_usage_help() -> str:
@@ -553,16 +2999,60 @@ def get_usage_help() -> str:
    - Parameters:
      - url: PDF file URL or URL list, can be separated by spaces, commas, or newlines
      - enable_ocr: Whether to enable OCR (default: True)
+     - priority: Scheduling class: interactive, normal or bulk (default: interactive for one document, normal otherwise)
 
 2. **convert_pdf_file** - Convert local PDF file to Markdown, supports single or multiple file paths
    - Parameters:
-     - file_path: PDF file local path or path list, can be separated by spaces, commas, or newlines
+     - file_path: PDF file local path or path list, can be separated by spaces, commas, or newlines; quote paths that contain spaces
+     - enable_ocr: Whether to enable OCR (default: True)
+     - preflight: Inspect files before uploading: reject broken or encrypted ones and skip OCR for files that already have a text layer (default: True)
+     - split_pages: Convert PDFs longer than this many pages as chunks in parallel and stitch the results (default: server setting, 0 disables)
+     - priority: Scheduling class: interactive, normal or bulk (default: interactive for one file, normal otherwise)
+
+3. **convert_pdf_directory** - Convert the new and changed PDFs of a directory or glob, skipping files converted before
+   - Parameters:
+     - path: Directory, or glob such as /data/papers/**/*.pdf
+     - pattern: File name pattern used when path is a directory (default: *.pdf)
+     - recursive: Whether to include subdirectories (default: True)
      - enable_ocr: Whether to enable OCR (default: True)
+     - wait: Whether to wait until the submitted files are converted (default: True)
+     - retry_failed: Submit unchanged files again whose conversion failed (default: False)
+     - priority: Scheduling class: interactive, normal or bulk (default: bulk)
+
+4. **submit_conversion** - Start converting PDF URLs or local PDF files and return a job ID right away
+   - Parameters:
+     - source: PDF URLs or local PDF file paths, can be separated by spaces, commas, or newlines
+     - enable_ocr: Whether to enable OCR (default: True)
+     - preflight: Inspect local files before uploading them (default: True)
+     - priority: Scheduling class: interactive, normal or bulk (default: normal)
+
+5. **get_conversion_status** - Get the status of a conversion job and each of its files
+   - Parameters:
+     - job_id: Job ID returned by a conversion tool
+
+6. **collect_conversion** - Collect the results of a conversion job without resubmitting it
+   - Parameters:
+     - job_id: Job ID returned by a conversion tool
+     - wait: Whether to wait until the job has finished (default: True)
+
+7. **search_converted** - Search the Markdown of all converted documents
+   - Parameters:
+     - query: Words to search for, every word must appear in a matching section
+     - limit: Maximum number of sections returned (default: 10)
 
 ## Tool functions:
 
 - **convert_pdf_url**: Specifically designed for handling URL links, suitable for single or multiple URL inputs
 - **convert_pdf_file**: Specifically designed for handling local files, suitable for single or multiple file path inputs
+- **convert_pdf_directory**: For folders of PDFs that are synced again and again; only new and changed files are uploaded
+
+- **submit_conversion**: For long or large conversions; returns immediately so many documents can be started and collected later with collect_conversion
+
+- **search_converted**: Full-text search over the sections of all converted documents, needs PDF2MD_INDEX_ENABLED=true
+
+Batches of all conversions share one scheduler: interactive batches go first, then normal, then bulk, and within a class each client gets a fair share of the pages in flight. Queue depth and wait times are reported in metrics://pipeline.
+
+The Markdown of every converted file can be read inline through the resource_uri given in the result (pdf2md://{job}/{file}/markdown). Long documents are returned in parts; the end of each part names the URI of the next one.
 
 ## Mixed input handling:
 
@@ -594,6 +3084,11 @@ C:/Documents/document2.pdf
 C:/Documents/document3.pdf
 ''')
 
+# Start a conversion without waiting, then collect it later
+job = await submit_conversion("https://example.com/doc1.pdf https://example.com/doc2.pdf")
+status = await get_conversion_status(job["job_id"])
+result = await collect_conversion(job["job_id"])
+
 # Mixed input handling (URLs and local files)
 url_result = await convert_pdf_url('''
 https://example.com/doc1.pdf
@@ -607,6 +3102,10 @@ C:/Documents/doc2.pdf
 
 ## Conversion results:
 Successful conversion returns a dictionary containing conversion result information, and the converted Markdown files will be saved in the specified output directory, with temporary downloaded ZIP files automatically deleted after unzipping to save space.
+
+Every conversion is recorded as a job, and its `job_id` is part of the result. Jobs survive server restarts: unfinished jobs are resumed when the server starts, and `collect_conversion` returns the results of a job without converting the files again.
+
+Each file is downloaded as soon as it has been converted, and progress is reported through MCP progress notifications. If some files fail or are still converting when polling gives up, the result is marked `partial` and lists them under `failed_files` and `pending_files`, while the finished files are still returned.
 """
 
 if __name__ == "__main__":
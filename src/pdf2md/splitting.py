@@ -0,0 +1,224 @@
+"""
+Page-range splitting of large PDFs and stitching of the converted chunks
+
+A long document is cut locally into page-range chunks that MinerU converts
+in parallel as separate files of one batch. The Markdown, images and
+content list of the chunks are then merged back into one result directory,
+as if the document had been converted in one piece.
+
+Splitting needs the optional pypdf package (pip install "pdf2md[split]").
+"""
+import os
+import re
+import json
+import shutil
+
+from .cache import hash_file
+
+_HEADING_RE = re.compile(r"^(#{1,6})(\s+.*)$", re.MULTILINE)
+_IMAGE_REF_RE = re.compile(r"(!\[[^\]]*\]\()(images/[^)\s]+)(\))")
+# A paragraph ending without closing punctuation continues on the next page
+_OPEN_ENDING_RE = re.compile(r"[^\s.!?:;。！？：；\"'”’)\]>|`*_$]$")
+
+
+def splitting_available():
+    """Check whether the optional pypdf package needed for splitting is installed"""
+    try:
+        import pypdf  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def split_pdf(path, chunk_pages, output_dir):
+    """
+    Write page-range chunks of a PDF
+
+    Args:
+        path: PDF file path
+        chunk_pages: Pages per chunk
+        output_dir: Directory the chunk files are written to
+
+    Returns:
+        list: Chunks with path, first_page and last_page (1-based), or an
+            empty list if the document has no more than chunk_pages pages
+
+    Raises:
+        Exception: If the document cannot be split; chunk files already
+            written are removed
+    """
+    from pypdf import PdfReader, PdfWriter
+
+    reader = PdfReader(path)
+    total = len(reader.pages)
+    if total <= chunk_pages:
+        return []
+
+    os.makedirs(output_dir, exist_ok=True)
+    base_name = os.path.splitext(os.path.basename(path))[0]
+    chunks = []
+    try:
+        for start in range(0, total, chunk_pages):
+            end = min(total, start + chunk_pages)
+            writer = PdfWriter()
+            for index in range(start, end):
+                writer.add_page(reader.pages[index])
+            chunk_path = os.path.join(output_dir, f"{base_name}_p{start + 1:04d}-{end:04d}.pdf")
+            chunks.append({"path": chunk_path, "first_page": start + 1, "last_page": end})
+            with open(chunk_path, "wb") as f:
+                writer.write(f)
+    except Exception:
+        remove_chunk_files(chunks, output_dir)
+        raise
+    return chunks
+
+
+def remove_chunk_files(chunks, output_dir):
+    """
+    Remove the chunk files of a split document
+
+    The chunk directory, and the directory above it, are removed as well
+    once they are empty.
+
+    Args:
+        chunks: Chunks with their path, from split_pdf
+        output_dir: Directory the chunk files were written to
+    """
+    for chunk in chunks:
+        try:
+            os.remove(chunk["path"])
+        except OSError as e:
+            pass
+    for directory in (output_dir, os.path.dirname(output_dir)):
+        try:
+            os.rmdir(directory)
+        except OSError as e:
+            break
+
+
+def _find_file(directory, suffix):
+    for root, _, files in os.walk(directory):
+        for name in sorted(files):
+            if name.endswith(suffix):
+                return os.path.join(root, name)
+    return None
+
+
+def _heading_levels(markdown):
+    return [len(match.group(1)) for match in _HEADING_RE.finditer(markdown)]
+
+
+def _section_level(markdown):
+    """Heading level used for sections, ignoring a single leading title"""
+    levels = _heading_levels(markdown)
+    if len(levels) > 1 and levels[0] == min(levels) and levels.count(levels[0]) == 1:
+        return min(levels[1:])
+    return min(levels) if levels else 1
+
+
+def _shift_headings(markdown, shift):
+    if shift <= 0:
+        return markdown
+    return _HEADING_RE.sub(lambda m: "#" * min(6, len(m.group(1)) + shift) + m.group(2), markdown)
+
+
+def _join(parts):
+    """Join chunk Markdown, merging a paragraph that was cut at a chunk boundary"""
+    text = ""
+    for part in parts:
+        part = part.strip("\n")
+        if not text:
+            text = part
+        elif _OPEN_ENDING_RE.search(text) and part and part[0].islower():
+            text = text + " " + part
+        else:
+            text = text + "\n\n" + part
+    return text + "\n"
+
+
+def _same_file(first, second):
+    # Images are often named by position, so equal sizes do not mean equal content
+    if os.path.getsize(first) != os.path.getsize(second):
+        return False
+    return hash_file(first) == hash_file(second)
+
+
+def stitch_chunks(chunks, output_dir):
+    """
+    Merge the converted chunks of one document into a single result directory
+
+    Images are copied into one images/ directory; an image whose name is
+    already taken by different content is renamed and its references are
+    rewritten. Content list page indexes are shifted to document pages.
+    Headings of later chunks are demoted when the chunk would otherwise
+    restart the document's heading hierarchy, and a paragraph split at a
+    chunk boundary is joined again. Chunks that failed leave a comment
+    marking the missing pages.
+
+    Args:
+        chunks: Chunks in page order with first_page, last_page and the
+            extract_dir of the converted chunk, or None if it failed
+        output_dir: Directory the merged result is written to
+
+    Returns:
+        list: Page ranges (first, last) that are missing from the result
+    """
+    images_dir = os.path.join(output_dir, "images")
+    os.makedirs(images_dir, exist_ok=True)
+    base_name = os.path.basename(os.path.normpath(output_dir))
+
+    parts = []
+    content_list = []
+    missing = []
+    section_level = None
+    for index, chunk in enumerate(chunks):
+        extract_dir = chunk.get("extract_dir")
+        if not extract_dir or not os.path.isdir(extract_dir):
+            missing.append((chunk["first_page"], chunk["last_page"]))
+            parts.append(f"<!-- pages {chunk['first_page']}-{chunk['last_page']} could not be converted -->")
+            continue
+
+        renamed = {}
+        chunk_images = os.path.join(extract_dir, "images")
+        if os.path.isdir(chunk_images):
+            for name in sorted(os.listdir(chunk_images)):
+                source = os.path.join(chunk_images, name)
+                target_name = name
+                target = os.path.join(images_dir, target_name)
+                if os.path.exists(target) and not _same_file(target, source):
+                    target_name = f"p{chunk['first_page']:04d}_{name}"
+                    target = os.path.join(images_dir, target_name)
+                    renamed[f"images/{name}"] = f"images/{target_name}"
+                if not os.path.exists(target):
+                    shutil.copyfile(source, target)
+
+        markdown_path = _find_file(extract_dir, ".md")
+        markdown = ""
+        if markdown_path:
+            with open(markdown_path, "r", encoding="utf-8") as f:
+                markdown = f.read()
+        if renamed:
+            markdown = _IMAGE_REF_RE.sub(lambda m: m.group(1) + renamed.get(m.group(2), m.group(2)) + m.group(3), markdown)
+        if section_level is None:
+            if _heading_levels(markdown):
+                section_level = _section_level(markdown)
+        elif _heading_levels(markdown):
+            markdown = _shift_headings(markdown, section_level - min(_heading_levels(markdown)))
+        parts.append(markdown)
+
+        content_list_path = _find_file(extract_dir, "content_list.json")
+        if content_list_path:
+            with open(content_list_path, "r", encoding="utf-8") as f:
+                blocks = json.load(f)
+            for block in blocks:
+                if isinstance(block.get("page_idx"), int):
+                    block["page_idx"] += chunk["first_page"] - 1
+                if block.get("img_path") in renamed:
+                    block["img_path"] = renamed[block["img_path"]]
+            content_list.extend(blocks)
+
+    with open(os.path.join(output_dir, "full.md"), "w", encoding="utf-8") as f:
+        f.write(_join(parts))
+    with open(os.path.join(output_dir, f"{base_name}_content_list.json"), "w", encoding="utf-8") as f:
+        json.dump(content_list, f, ensure_ascii=False, indent=2)
+    return missing
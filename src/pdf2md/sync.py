@@ -0,0 +1,189 @@
+"""
+Directory scanning and the manifest behind incremental directory sync
+
+A directory tree, or the part of it matched by a glob, is scanned with
+os.scandir. The manifest remembers the size, modification time and content
+hash of every PDF that was submitted, so a repeated sync only stats the
+files: unchanged ones are neither hashed nor uploaded again, and a file
+that was touched without changing is recognised by its hash.
+"""
+import os
+import re
+import time
+import sqlite3
+import threading
+from typing import Dict, Any
+
+# Manifest entry states
+SYNC_SUBMITTED = "submitted"
+SYNC_CONVERTED = "converted"
+SYNC_FAILED = "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    hash TEXT,
+    state TEXT,
+    job_id TEXT,
+    extract_dir TEXT,
+    error TEXT,
+    updated REAL NOT NULL
+);
+"""
+
+_GLOB_CHARS = re.compile(r"[*?\[]")
+
+
+def has_glob(path):
+    """Check whether a path contains glob wildcards"""
+    return bool(_GLOB_CHARS.search(path))
+
+
+def split_glob(path):
+    """
+    Split a glob into the directory to scan and the pattern below it
+
+    Args:
+        path: Glob such as "/data/papers/**/*.pdf"
+
+    Returns:
+        tuple: (directory without wildcards, pattern relative to it)
+    """
+    parts = re.split(r"[\\/]", path)
+    for i, part in enumerate(parts):
+        if has_glob(part):
+            root = os.sep.join(parts[:i]) or (os.sep if path[:1] in "\\/" else ".")
+            return root, "/".join(parts[i:])
+    return os.path.dirname(path) or ".", os.path.basename(path)
+
+
+def glob_to_regex(pattern):
+    """
+    Compile a glob pattern matched against "/"-separated relative paths
+
+    "*" and "?" stay within one directory level, "**/" matches any number of
+    levels including none. Matching ignores case, so "*.pdf" finds ".PDF".
+
+    Args:
+        pattern: Glob pattern
+
+    Returns:
+        re.Pattern: Compiled expression
+    """
+    out = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            out.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            out.append("[^/]")
+            i += 1
+        elif pattern[i] == "[" and pattern.find("]", i + 2) > 0:
+            end = pattern.find("]", i + 2)
+            body = pattern[i + 1:end]
+            out.append("[" + ("^" + body[1:] if body.startswith("!") else body) + "]")
+            i = end + 1
+        else:
+            out.append(re.escape(pattern[i]))
+            i += 1
+    return re.compile("".join(out) + r"\Z", re.IGNORECASE)
+
+
+def scan_files(root, pattern, recursive=True, exclude=()):
+    """
+    List the files below a directory that match a pattern
+
+    Hidden directories, such as the output's own .pdf2md_* folders, and the
+    excluded ones are not descended into.
+
+    Args:
+        root: Directory to scan
+        pattern: Compiled pattern from glob_to_regex, matched against paths
+            relative to root
+        recursive: Whether to descend into subdirectories
+        exclude: Directories to skip, e.g. the output directory
+
+    Yields:
+        tuple: (absolute path, size in bytes, modification time in ns)
+    """
+    exclude = {os.path.abspath(path) for path in exclude}
+    stack = [(os.path.abspath(root), "")]
+    while stack:
+        directory, prefix = stack.pop()
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            continue
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if recursive and not entry.name.startswith(".") and entry.path not in exclude:
+                        stack.append((entry.path, prefix + entry.name + "/"))
+                elif entry.is_file() and pattern.match(prefix + entry.name):
+                    stat = entry.stat()
+                    yield entry.path, stat.st_size, stat.st_mtime_ns
+            except OSError:
+                continue
+
+
+class SyncManifest:
+    """
+    SQLite-backed record of the files submitted by directory syncs
+
+    Args:
+        db_path: Path of the SQLite database file
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30.0)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def entries_under(self, root) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the entries of all files below a directory
+
+        Args:
+            root: Directory
+
+        Returns:
+            dict: Entries by absolute path
+        """
+        prefix = os.path.join(os.path.abspath(root), "")
+        with self._lock, self._connect() as conn:
+            rows = conn.execute(
+                "SELECT * FROM files WHERE substr(path, 1, ?) = ?", (len(prefix), prefix)
+            ).fetchall()
+        return {row["path"]: dict(row) for row in rows}
+
+    def record(self, entries):
+        """Insert or replace entries, each a dict with the columns of the files table"""
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO files (path, size, mtime_ns, hash, state, job_id, extract_dir, error, updated) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(e["path"], e["size"], e["mtime_ns"], e.get("hash"), e.get("state"), e.get("job_id"),
+                  e.get("extract_dir"), e.get("error"), now) for e in entries]
+            )
+
+    def remove(self, paths):
+        """Forget files that no longer exist"""
+        with self._lock, self._connect() as conn:
+            conn.executemany("DELETE FROM files WHERE path = ?", [(path,) for path in paths])
@@ -0,0 +1,181 @@
+"""
+Shared job queue for worker processes
+
+Front-end MCP servers push conversion jobs onto an SQLite queue, and worker
+processes on the same machine or on nodes sharing the volume lease them.
+A lease expires unless the worker renews it, so the jobs of a worker that
+crashed are picked up again by another one.
+"""
+import json
+import time
+import sqlite3
+import threading
+from typing import Optional, Dict, Any
+
+# Queue entry states
+QUEUE_QUEUED = "queued"
+QUEUE_LEASED = "leased"
+QUEUE_DONE = "done"
+QUEUE_FAILED = "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS queue (
+    job_id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    state TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    lease_expires REAL,
+    error TEXT,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_queue_state ON queue (state, created);
+"""
+
+
+class WorkQueue:
+    """
+    SQLite-backed queue of conversion jobs with leases
+
+    Args:
+        db_path: Path of the SQLite database file
+        max_attempts: Leases granted per job before it is marked failed
+    """
+
+    def __init__(self, db_path, max_attempts=3):
+        self.db_path = db_path
+        self.max_attempts = max(1, max_attempts)
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30.0)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def enqueue(self, job_id, kind, payload):
+        """
+        Add a job to the queue
+
+        Args:
+            job_id: Job ID, already recorded in the job store
+            kind: Job kind, "url" or "file"
+            payload: Arguments needed to run the job
+        """
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT INTO queue (job_id, kind, payload, state, created, updated) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, kind, json.dumps(payload), QUEUE_QUEUED, now, now)
+            )
+
+    def lease(self, worker_id, lease_seconds) -> Optional[Dict[str, Any]]:
+        """
+        Take the oldest queued job, or a job whose lease has expired
+
+        Args:
+            worker_id: ID of the worker taking the job
+            lease_seconds: Seconds the lease lasts unless renewed
+
+        Returns:
+            dict: Queue entry with job_id, kind, payload and attempts, or None
+                if there is nothing to do
+        """
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            # Jobs whose worker died after its last attempt are not retried again
+            conn.execute(
+                "UPDATE queue SET state = ?, error = COALESCE(error, 'Worker lease expired'), updated = ? "
+                "WHERE state = ? AND lease_expires < ? AND attempts >= ?",
+                (QUEUE_FAILED, now, QUEUE_LEASED, now, self.max_attempts)
+            )
+            row = conn.execute(
+                "SELECT * FROM queue WHERE state = ? OR (state = ? AND lease_expires < ?) "
+                "ORDER BY created LIMIT 1",
+                (QUEUE_QUEUED, QUEUE_LEASED, now)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE queue SET state = ?, worker = ?, lease_expires = ?, attempts = attempts + 1, updated = ? "
+                "WHERE job_id = ?",
+                (QUEUE_LEASED, worker_id, now + lease_seconds, now, row["job_id"])
+            )
+        entry = dict(row)
+        entry["payload"] = json.loads(entry["payload"])
+        entry["attempts"] += 1
+        return entry
+
+    def renew(self, job_id, worker_id, lease_seconds):
+        """
+        Extend the lease of a job
+
+        Returns:
+            bool: Whether the worker still holds the lease
+        """
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE queue SET lease_expires = ?, updated = ? WHERE job_id = ? AND worker = ? AND state = ?",
+                (now + lease_seconds, now, job_id, worker_id, QUEUE_LEASED)
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, job_id, worker_id, error=None):
+        """Mark a leased job as done, or as failed if an error is given"""
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "UPDATE queue SET state = ?, error = ?, lease_expires = NULL, updated = ? "
+                "WHERE job_id = ? AND worker = ?",
+                (QUEUE_FAILED if error else QUEUE_DONE, error, time.time(), job_id, worker_id)
+            )
+
+    def retry(self, job_id, worker_id, error):
+        """Put a job that failed unexpectedly back in the queue, or fail it after its last attempt"""
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "UPDATE queue SET state = CASE WHEN attempts >= ? THEN ? ELSE ? END, error = ?, "
+                "worker = NULL, lease_expires = NULL, updated = ? WHERE job_id = ? AND worker = ?",
+                (self.max_attempts, QUEUE_FAILED, QUEUE_QUEUED, error, time.time(), job_id, worker_id)
+            )
+
+    def release(self, job_id, worker_id):
+        """Give a job back without counting the attempt, for workers shutting down"""
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "UPDATE queue SET state = ?, worker = NULL, lease_expires = NULL, "
+                "attempts = MAX(0, attempts - 1), updated = ? WHERE job_id = ? AND worker = ? AND state = ?",
+                (QUEUE_QUEUED, time.time(), job_id, worker_id, QUEUE_LEASED)
+            )
+
+    def get(self, job_id) -> Optional[Dict[str, Any]]:
+        """Get the queue entry of a job, or None if it was never queued"""
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT job_id, kind, state, attempts, worker, lease_expires, error, created, updated "
+                "FROM queue WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the number of jobs in each state and the workers holding leases"""
+        with self._lock, self._connect() as conn:
+            counts = {row["state"]: row["count"] for row in conn.execute(
+                "SELECT state, COUNT(*) AS count FROM queue GROUP BY state"
+            )}
+            workers = [row["worker"] for row in conn.execute(
+                "SELECT DISTINCT worker FROM queue WHERE state = ? AND lease_expires >= ?",
+                (QUEUE_LEASED, time.time())
+            )]
+        return {
+            "queued": counts.get(QUEUE_QUEUED, 0),
+            "leased": counts.get(QUEUE_LEASED, 0),
+            "done": counts.get(QUEUE_DONE, 0),
+            "failed": counts.get(QUEUE_FAILED, 0),
+            "active_workers": workers
+        }
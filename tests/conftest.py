@@ -0,0 +1,59 @@
+import httpx
+import pytest
+
+from mock_mineru import MockMinerU
+
+
+@pytest.fixture
+def mineru():
+    """Fast fake MinerU API"""
+    return MockMinerU(processing_time=0.05, archive_size=4096, seed=0)
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch, mineru):
+    """
+    The server module talking to the fake API, with every store under tmp_path
+
+    Settings are read when the module is imported, so they are patched on
+    the module, and the process-wide singletons are reset for each test.
+    """
+    from pdf2md import server
+    from pdf2md.metrics import Metrics
+    from pdf2md.client import ConnectionStats
+
+    settings = {
+        "MINERU_API_KEY": "test-key",
+        "OUTPUT_DIR": str(tmp_path / "out"),
+        "CACHE_ENABLED": True,
+        "CACHE_DIR": "",
+        "JOB_DB_PATH": "",
+        "INDEX_ENABLED": False,
+        "INDEX_DB_PATH": "",
+        "MANIFEST_DB_PATH": "",
+        "QUEUE_ENABLED": False,
+        "QUEUE_DB_PATH": "",
+        "SPLIT_PAGES": 0,
+        "POLL_MIN_INTERVAL": 0.01,
+        "POLL_MAX_INTERVAL": 0.05,
+        "POLL_BASE_TIMEOUT": 30.0,
+        "POLL_SECONDS_PER_PAGE": 0.0,
+        "POLL_MAX_REQUESTS_PER_SECOND": 1000.0,
+        "_conversion_cache": None,
+        "_job_store": None,
+        "_chunk_index": None,
+        "_work_queue": None,
+        "_sync_manifest": None,
+        "_job_tasks": {},
+        "_output_dir_claims": {},
+        "_url_flights": {},
+        "_poll_scheduler": None,
+        "_batch_scheduler": None,
+        "_endpoint_guards": {},
+        "_metrics": Metrics(),
+        "_connection_stats": ConnectionStats(),
+        "_http_client": httpx.AsyncClient(transport=mineru.transport),
+    }
+    for name, value in settings.items():
+        monkeypatch.setattr(server, name, value)
+    return server
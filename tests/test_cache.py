@@ -0,0 +1,46 @@
+import os
+
+from pdf2md.cache import ConversionCache, make_cache_key
+
+
+def write_result(directory, text, padding=0):
+    os.makedirs(directory)
+    with open(os.path.join(directory, "full.md"), "w", encoding="utf-8") as f:
+        f.write(text + "x" * padding)
+    return str(directory)
+
+
+def test_cache_keeps_its_own_copy(tmp_path):
+    cache = ConversionCache(str(tmp_path / "cache"), max_bytes=0, max_age_seconds=0)
+    key = make_cache_key("a" * 64, {"is_ocr": True})
+    result_dir = write_result(tmp_path / "out" / "paper", "# Paper")
+
+    assert cache.get(key) is None
+    cache.put(key, result_dir)
+    # A later conversion overwriting the output directory does not change the cached copy
+    with open(os.path.join(result_dir, "full.md"), "w", encoding="utf-8") as f:
+        f.write("# Other document")
+    cached_dir = cache.get(key)
+    assert cached_dir != result_dir
+    with open(os.path.join(cached_dir, "full.md"), encoding="utf-8") as f:
+        assert f.read() == "# Paper"
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_eviction_never_deletes_results_in_the_output_directory(tmp_path):
+    cache = ConversionCache(str(tmp_path / "cache"), max_bytes=1500, max_age_seconds=0)
+    first = write_result(tmp_path / "out" / "first", "# First", padding=1000)
+    second = write_result(tmp_path / "out" / "second", "# Second", padding=1000)
+
+    cache.put("k1", first)
+    cache.put("k2", second)
+
+    assert cache.get("k1") is None
+    assert cache.get("k2") is not None
+    assert os.path.isfile(os.path.join(first, "full.md"))
+    assert cache.stats()["entries"] == 1
+
+
+def test_options_are_part_of_the_key():
+    assert make_cache_key("a" * 64, {"is_ocr": True}) != make_cache_key("a" * 64, {"is_ocr": False})
+    assert make_cache_key("a" * 64, {"x": 1, "y": 2}) == make_cache_key("a" * 64, {"y": 2, "x": 1})
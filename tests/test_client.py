@@ -0,0 +1,78 @@
+import time
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from pdf2md.client import ConnectionStats, create_http_client
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        time.sleep(0.05)
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def local_url():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}/"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_sequential_requests_reuse_one_connection(local_url):
+    stats = ConnectionStats()
+
+    async def fetch_three_times():
+        async with create_http_client(stats, http2=False) as client:
+            for _ in range(3):
+                assert (await client.get(local_url)).text == "ok"
+
+    asyncio.run(fetch_three_times())
+
+    assert stats.as_dict() == {
+        "requests": 3,
+        "connections_opened": 1,
+        "tls_handshakes": 0,
+        "http2_requests": 0,
+        "reused_requests": 2,
+        "reuse_ratio": 0.667
+    }
+
+
+def test_concurrent_requests_are_bounded_by_the_pool(local_url):
+    stats = ConnectionStats()
+
+    async def fetch_concurrently():
+        async with create_http_client(stats, max_connections=2, max_keepalive_connections=2, http2=False) as client:
+            await asyncio.gather(*(client.get(local_url) for _ in range(6)))
+
+    asyncio.run(fetch_concurrently())
+
+    assert stats.requests == 6
+    assert stats.connections_opened == 2
+
+
+def test_shared_client_uses_the_configured_limits(server, monkeypatch):
+    monkeypatch.setattr(server, "_http_client", None)
+    monkeypatch.setattr(server, "HTTP_MAX_CONNECTIONS", 7)
+    monkeypatch.setattr(server, "HTTP_MAX_KEEPALIVE_CONNECTIONS", 3)
+
+    client = server.get_http_client()
+    assert server.get_http_client() is client
+    pool = client._transport._pool
+    assert (pool._max_connections, pool._max_keepalive_connections) == (7, 3)
+
+    asyncio.run(server.close_http_client())
+    assert server.get_http_client() is not client
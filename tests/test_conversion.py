@@ -0,0 +1,218 @@
+"""End-to-end conversions against the fake MinerU API"""
+import os
+import asyncio
+
+import httpx
+
+from mock_mineru import MockMinerU
+from bench_throughput import write_sample_pdfs
+
+
+class FailingMinerU(MockMinerU):
+    """Fails every task whose file name contains "broken" """
+
+    def _create_batch(self, request, upload):
+        response = super()._create_batch(request, upload)
+        for task in self._batches[response.json()["data"]["batch_id"]]:
+            task["fails"] = "broken" in task["file_name"]
+        return response
+
+
+class _BrokenStream(httpx.AsyncByteStream):
+    def __init__(self, data):
+        self.data = data
+
+    async def __aiter__(self):
+        yield self.data
+        raise httpx.ReadError("connection reset")
+
+
+class InterruptedMinerU(MockMinerU):
+    """Drops the connection halfway through the first download"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.ranges = []
+
+    def _download(self, request):
+        self.ranges.append(request.headers.get("Range"))
+        if len(self.ranges) == 1:
+            data = self.archive()
+            return httpx.Response(200, headers={"Content-Length": str(len(data))},
+                                  stream=_BrokenStream(data[:len(data) // 2]))
+        return super()._download(request)
+
+
+def use_mock(server, monkeypatch, mock):
+    monkeypatch.setattr(server, "_http_client", httpx.AsyncClient(transport=mock.transport))
+    return mock
+
+
+def test_url_conversion_downloads_every_file(server, mineru):
+    result = asyncio.run(server.convert_pdf_url("https://a.test/one.pdf https://a.test/two.pdf"))
+
+    assert result["success"] and not result["partial"]
+    assert [f["file_name"] for f in result["downloaded_files"]] == ["one.pdf", "two.pdf"]
+    for f in result["downloaded_files"]:
+        assert os.path.isfile(os.path.join(f["extract_dir"], "full.md"))
+    assert mineru.stats()["requests"]["batch"] == 1
+    assert server.get_job_store().get_job(result["job_id"])["status"] == "completed"
+
+
+def test_failed_task_gives_partial_result(server, monkeypatch):
+    use_mock(server, monkeypatch, FailingMinerU(processing_time=0.05, archive_size=4096))
+
+    result = asyncio.run(server.convert_pdf_url("https://a.test/good.pdf https://a.test/broken.pdf"))
+
+    assert result["success"] and result["partial"]
+    assert [f["file_name"] for f in result["downloaded_files"]] == ["good.pdf"]
+    assert [f["file_name"] for f in result["failed_files"]] == ["broken.pdf"]
+    assert server.get_job_store().get_job(result["job_id"])["status"] == "partial"
+
+
+def test_interrupted_download_resumes_with_range(server, monkeypatch):
+    mock = use_mock(server, monkeypatch, InterruptedMinerU(processing_time=0.05, archive_size=4096))
+
+    result = asyncio.run(server.convert_pdf_url("https://a.test/paper.pdf"))
+
+    assert result["success"]
+    half = len(mock.archive()) // 2
+    assert mock.ranges == [None, f"bytes={half}-"]
+    assert os.path.isfile(os.path.join(result["downloaded_files"][0]["extract_dir"], "full.md"))
+
+
+def test_concurrent_identical_requests_share_one_job(server, mineru):
+    async def convert_twice():
+        return await asyncio.gather(
+            server.convert_pdf_url("https://a.test/paper.pdf"),
+            server.convert_pdf_url("https://a.test/paper.pdf")
+        )
+
+    first, second = asyncio.run(convert_twice())
+
+    assert first["success"] and second["success"]
+    assert first["job_id"] == second["job_id"]
+    assert mineru.stats()["requests"]["batch"] == 1
+    assert mineru.stats()["requests"]["download"] == 1
+
+
+def test_same_file_names_get_separate_directories(server, mineru):
+    result = asyncio.run(server.convert_pdf_url("https://a.test/x/paper.pdf https://b.test/y/paper.pdf"))
+
+    dirs = [f["extract_dir"] for f in result["downloaded_files"]]
+    assert [os.path.basename(d) for d in dirs] == ["paper", "paper_2"]
+    assert mineru.stats()["requests"]["download"] == 2
+
+
+def test_cache_hit_skips_upload(server, mineru, tmp_path):
+    paths = write_sample_pdfs(str(tmp_path), "doc", 2, 2000)
+
+    first = asyncio.run(server.convert_pdf_file(" ".join(paths)))
+    assert first["success"]
+    assert first["cache"] == {"hits": 0, "misses": 2}
+
+    second = asyncio.run(server.convert_pdf_file(" ".join(paths)))
+    assert second["cache"] == {"hits": 2, "misses": 0}
+    assert all(f.get("cached") for f in second["downloaded_files"])
+    assert mineru.stats()["requests"]["upload"] == 2
+    for f in second["downloaded_files"]:
+        assert f["extract_dir"].startswith(server.OUTPUT_DIR)
+        assert os.path.isfile(os.path.join(f["extract_dir"], "full.md"))
+
+    with open(paths[0], "ab") as f:
+        f.write(b"% changed\n")
+    third = asyncio.run(server.convert_pdf_file(" ".join(paths)))
+    assert third["cache"] == {"hits": 1, "misses": 1}
+    assert mineru.stats()["requests"]["upload"] == 3
+
+
+def test_timed_out_batch_is_collected_later(server, monkeypatch):
+    use_mock(server, monkeypatch, MockMinerU(processing_time=0.5, archive_size=4096))
+    monkeypatch.setattr(server, "POLL_BASE_TIMEOUT", 0.1)
+
+    result = asyncio.run(server.convert_pdf_url("https://a.test/slow.pdf"))
+    assert result["pending_files"] == ["slow.pdf"]
+    job = server.get_job_store().get_job(result["job_id"])
+    assert job["status"] == "running"
+    assert server.needs_resume(job)
+
+    monkeypatch.setattr(server, "POLL_BASE_TIMEOUT", 30.0)
+
+    async def collect_later():
+        await asyncio.sleep(0.5)
+        return await server.collect_conversion(result["job_id"])
+
+    collected = asyncio.run(collect_later())
+    assert collected["status"] == "completed"
+    assert [f["file_name"] for f in collected["downloaded_files"]] == ["slow.pdf"]
+
+
+def test_resume_submits_files_never_submitted(server, mineru):
+    store = server.get_job_store()
+    urls = ["https://a.test/1.pdf", "https://a.test/2.pdf", "https://a.test/3.pdf"]
+    entries = server.job_file_entries("url", urls, "crashed")
+    # The process that created the job stopped after submitting the first file
+    store.create_job("url", entries, {"is_ocr": True}, job_id="crashed")
+    first = {"url": urls[0], "is_ocr": True, "data_id": entries[0]["data_id"]}
+    asyncio.run(server.convert_url_batch(server.get_http_client(), [first], job_id="crashed"))
+
+    status = asyncio.run(server.resume_job("crashed"))
+
+    assert status == "completed"
+    assert mineru.stats()["requests"]["batch"] == 2
+    assert mineru.stats()["requests"]["download"] == 3
+
+
+def write_long_pdf(path, pages):
+    from pypdf import PdfWriter
+
+    writer = PdfWriter()
+    for _ in range(pages):
+        writer.add_blank_page(width=612, height=792)
+    with open(path, "wb") as f:
+        writer.write(f)
+    return str(path)
+
+
+def test_split_file_is_stitched_from_its_chunks_after_a_crash(server, mineru, tmp_path, monkeypatch):
+    monkeypatch.setattr(server, "SPLIT_PAGES", 2)
+    mineru.processing_time = 0.3
+    path = write_long_pdf(tmp_path / "long.pdf", 5)
+
+    async def crash_after_submitting():
+        job_id, task = server.start_file_job([path], True)
+        while mineru.stats()["requests"].get("upload", 0) < 3:
+            await asyncio.sleep(0.01)
+        task.cancel()
+        return job_id
+
+    job_id = asyncio.run(crash_after_submitting())
+    job = server.get_job_store().get_job(job_id)
+    assert [chunk["state"] for chunk in job["chunks"]] == ["submitted"] * 3
+    assert server.needs_resume(job)
+
+    status = asyncio.run(server.resume_job(job_id))
+
+    assert status == "completed"
+    assert mineru.stats()["requests"]["upload"] == 3
+    job = server.get_job_store().get_job(job_id)
+    assert [f["state"] for f in job["files"]] == ["downloaded"]
+    # Neither the chunk files nor the converted chunks are left behind
+    assert sorted(name for name in os.listdir(server.OUTPUT_DIR) if not name.endswith(".db")) == [
+        ".pdf2md_cache", "long"
+    ]
+    assert os.path.isfile(os.path.join(job["files"][0]["extract_dir"], "full.md"))
+
+
+def test_only_identical_url_lists_are_coalesced(server, mineru):
+    async def convert_overlapping():
+        return await asyncio.gather(
+            server.convert_pdf_url("https://a.test/one.pdf https://a.test/two.pdf"),
+            server.convert_pdf_url("https://a.test/one.pdf")
+        )
+
+    both, one = asyncio.run(convert_overlapping())
+
+    assert both["success"] and one["success"]
+    assert both["job_id"] != one["job_id"]
+    assert mineru.stats()["requests"]["batch"] == 2
@@ -0,0 +1,58 @@
+import os
+import asyncio
+import zipfile
+
+
+def write_archive(path):
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("full.md", "# Paper\n")
+        zf.writestr("content_list.json", "[]")
+        zf.writestr("images/figure.jpg", b"JPEG")
+        zf.writestr("layout.pdf", b"%PDF-1.4")
+    return str(path)
+
+
+def extracted_files(directory):
+    return sorted(
+        os.path.relpath(os.path.join(root, name), directory).replace(os.sep, "/")
+        for root, _, names in os.walk(directory) for name in names
+    )
+
+
+def test_profiles_select_members(server):
+    assert server.is_member_selected("full.md", "markdown")
+    assert not server.is_member_selected("images/figure.jpg", "markdown")
+    assert server.is_member_selected("images/figure.jpg", "markdown_images")
+    assert not server.is_member_selected("content_list.json", "markdown_images")
+    assert server.is_member_selected("content_list.json", "all")
+
+
+def test_skipped_members_stay_in_the_kept_archive(server, tmp_path):
+    extract_dir = tmp_path / "paper"
+    server.extract_zip_file(write_archive(tmp_path / "result.zip"), str(extract_dir), profile="markdown_images",
+                            keep_archive=True)
+
+    assert extracted_files(extract_dir) == [server.ARCHIVE_NAME, "full.md", "images/figure.jpg"]
+    assert not os.path.exists(tmp_path / "result.zip")
+    assert server.read_archive_member(str(extract_dir), "content_list.json") == b"[]"
+    assert server.read_archive_member(str(extract_dir), "missing.json") is None
+    assert server.get_metrics()["counters"]["archive_members_skipped"] == 2
+
+
+def test_archive_is_removed_unless_kept(server, tmp_path):
+    extract_dir = tmp_path / "paper"
+    server.extract_zip_file(write_archive(tmp_path / "result.zip"), str(extract_dir), profile="markdown",
+                            keep_archive=False)
+
+    assert extracted_files(extract_dir) == ["full.md"]
+    assert not os.path.exists(tmp_path / "result.zip")
+    assert server.read_archive_member(str(extract_dir), "content_list.json") is None
+
+
+def test_conversion_uses_the_configured_profile(server, monkeypatch):
+    monkeypatch.setattr(server, "EXTRACT_PROFILE", "markdown")
+    monkeypatch.setattr(server, "KEEP_ARCHIVE", False)
+
+    result = asyncio.run(server.convert_pdf_url("https://a.test/paper.pdf"))
+
+    assert extracted_files(result["downloaded_files"][0]["extract_dir"]) == ["full.md"]
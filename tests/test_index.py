@@ -0,0 +1,74 @@
+import asyncio
+
+from pdf2md.index import ChunkIndex, chunk_markdown, build_match_query
+
+
+def test_chunks_follow_headings_outside_code_fences():
+    lines = [
+        "# Methods\n", "\n", "Intro.\n",
+        "## Data\n", "Rows.\n", "```\n", "# not a heading\n", "```\n",
+        "# Results\n", "Numbers.\n",
+    ]
+    chunks = list(chunk_markdown(lines))
+    assert [(heading, line) for heading, _, line in chunks] == [
+        ("Methods", 2), ("Methods > Data", 5), ("Results", 10)
+    ]
+    assert "# not a heading" in chunks[1][1]
+
+
+def test_long_sections_are_cut_at_blank_lines():
+    lines = ["# Long\n"] + ["word " * 10 + "\n", "\n"] * 10
+    chunks = list(chunk_markdown(lines, max_chars=100))
+    assert len(chunks) > 1
+    assert all(heading == "Long" for heading, _, _ in chunks)
+
+
+def test_query_terms_are_quoted():
+    assert build_match_query('cell "growth" OR rate') == '"cell" "growth" "OR" "rate"'
+    assert build_match_query("!?") == ""
+
+
+def test_reindexing_replaces_a_document(tmp_path):
+    index = ChunkIndex(str(tmp_path / "index.db"))
+    path = tmp_path / "paper" / "full.md"
+    path.parent.mkdir()
+    path.write_text("# Methods\n\nWe measured cell growth.\n", encoding="utf-8")
+    assert index.add_file(str(path), "paper") == 1
+
+    results = index.search("cell growth")
+    assert [(r["name"], r["heading"], r["line"]) for r in results] == [("paper", "Methods", 2)]
+    assert "**cell**" in results[0]["snippet"]
+
+    path.write_text("# Results\n\nNothing grew.\n", encoding="utf-8")
+    index.add_file(str(path), "paper")
+    assert index.search("cell growth") == []
+    assert index.stats()["documents"] == 1 and index.stats()["chunks"] == 1
+
+
+def test_removed_documents_leave_the_index(tmp_path):
+    index = ChunkIndex(str(tmp_path / "index.db"))
+    for name in ("a", "b"):
+        path = tmp_path / name / "full.md"
+        path.parent.mkdir()
+        path.write_text("# Title\n\nshared words\n", encoding="utf-8")
+        index.add_file(str(path), name)
+
+    index.remove_under(str(tmp_path / "a"))
+    assert [r["name"] for r in index.search("shared")] == ["b"]
+
+    (tmp_path / "b" / "full.md").unlink()
+    assert index.search("shared") == []
+    assert index.stats()["documents"] == 0
+
+
+def test_search_converted_finds_extracted_markdown(server, monkeypatch):
+    disabled = asyncio.run(server.search_converted("lorem"))
+    assert not disabled["success"]
+
+    monkeypatch.setattr(server, "INDEX_ENABLED", True)
+    asyncio.run(server.convert_pdf_url("https://a.test/paper.pdf"))
+    found = asyncio.run(server.search_converted("lorem ipsum", limit=2))
+
+    assert found["success"]
+    assert [(r["name"], r["heading"]) for r in found["results"]] == [("paper", "Mock document")]
+    assert found["results"][0]["markdown_path"].endswith("full.md")
@@ -0,0 +1,46 @@
+from pdf2md.jobs import (
+    JobStore, FILE_DONE, FILE_DOWNLOADED, FILE_FAILED, BATCH_TIMEOUT, BATCH_FINISHED,
+    JOB_RUNNING, JOB_PARTIAL, JOB_COMPLETED, JOB_FAILED
+)
+
+
+def make_job(tmp_path, count=2):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    files = [{"data_id": f"d{i}", "name": f"f{i}.pdf", "source": f"/in/f{i}.pdf"} for i in range(count)]
+    return store, store.create_job("file", files, {"is_ocr": True}, job_id="job", owner="host:1")
+
+
+def test_job_status_follows_its_files(tmp_path):
+    store, job_id = make_job(tmp_path)
+    store.update_file("d0", FILE_DOWNLOADED, extract_dir="/out/f0")
+    store.update_file("d1", FILE_FAILED, error="Conversion failed")
+    assert store.finish_job(job_id) == JOB_PARTIAL
+    store.update_file("d1", FILE_DOWNLOADED, extract_dir="/out/f1")
+    assert store.finish_job(job_id) == JOB_COMPLETED
+
+
+def test_job_with_pending_files_is_not_failed(tmp_path):
+    store, job_id = make_job(tmp_path)
+    store.add_batch(job_id, "b1", ["d0", "d1"])
+    store.update_file("d0", FILE_DONE, zip_url="https://cdn.test/0.zip")
+    assert store.finish_job(job_id) == JOB_RUNNING
+    store.update_file("d0", FILE_FAILED, error="Download failed")
+    store.update_file("d1", FILE_FAILED, error="Conversion failed")
+    assert store.finish_job(job_id) == JOB_FAILED
+
+
+def test_timed_out_batches_are_unfinished(tmp_path):
+    store, job_id = make_job(tmp_path)
+    store.add_batch(job_id, "b1", ["d0"])
+    store.add_batch(job_id, "b2", ["d1"])
+    store.finish_batch("b1", BATCH_TIMEOUT)
+    store.finish_batch("b2", BATCH_FINISHED)
+    assert [batch["batch_id"] for batch in store.unfinished_batches(job_id)] == ["b1"]
+
+
+def test_claim_job_only_succeeds_for_the_expected_owner(tmp_path):
+    store, job_id = make_job(tmp_path)
+    assert store.claim_job(job_id, "host:2", "host:1")
+    assert not store.claim_job(job_id, "host:3", "host:1")
+    assert store.get_job(job_id)["owner"] == "host:2"
+    assert [job["job_id"] for job in store.list_jobs(status=JOB_RUNNING, limit=None)] == [job_id]
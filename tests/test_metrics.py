@@ -0,0 +1,66 @@
+import os
+import json
+import asyncio
+import urllib.request
+
+from pdf2md.metrics import Metrics, serve_prometheus
+from bench_throughput import write_sample_pdfs
+
+
+def test_phases_are_sorted_by_total_time():
+    metrics = Metrics()
+    metrics.observe("upload", 0.2)
+    metrics.observe("download", 1.0)
+    metrics.observe("upload", 0.4)
+    with metrics.span("extraction"):
+        pass
+    metrics.inc("files", 3)
+
+    snapshot = metrics.snapshot()
+    assert list(snapshot["phases"]) == ["download", "upload", "extraction"]
+    assert snapshot["dominant_phase"] == "download"
+    assert snapshot["phases"]["upload"] == {
+        "count": 2, "total_seconds": 0.6, "mean_seconds": 0.3, "max_seconds": 0.4
+    }
+    assert snapshot["counters"] == {"files": 3}
+
+
+def test_prometheus_endpoint_serves_histograms():
+    metrics = Metrics()
+    metrics.observe("download", 0.3)
+    metrics.inc("bytes_downloaded", 100)
+    httpd = serve_prometheus(metrics, 0)
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{httpd.server_address[1]}/metrics") as response:
+            text = response.read().decode("utf-8")
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+    assert 'pdf2md_phase_seconds_bucket{phase="download",le="0.25"} 0' in text
+    assert 'pdf2md_phase_seconds_bucket{phase="download",le="0.5"} 1' in text
+    assert 'pdf2md_phase_seconds_count{phase="download"} 1' in text
+    assert "pdf2md_bytes_downloaded_total 100" in text
+
+
+def test_pipeline_resource_reports_every_conversion_phase(server, mineru):
+    asyncio.run(server.convert_pdf_url("https://a.test/paper.pdf"))
+
+    metrics = json.loads(server.get_pipeline_metrics())
+    for phase in ("batch_submit", "queue_wait", "processing", "download", "extraction"):
+        assert metrics["phases"][phase]["count"] == 1
+    assert metrics["counters"]["bytes_downloaded"] == len(mineru.archive())
+    assert metrics["poll_scheduler"]["status_requests"] == mineru.stats()["requests"]["batch_results"]
+    assert metrics["cache"]["entries"] == 0
+    assert metrics["queue"] is None and metrics["index"] is None
+
+
+def test_file_conversions_time_preflight_and_upload(server, tmp_path):
+    paths = write_sample_pdfs(str(tmp_path), "doc", 2, 4096)
+    asyncio.run(server.convert_pdf_file(" ".join(paths)))
+
+    metrics = json.loads(server.get_pipeline_metrics())
+    assert metrics["phases"]["preflight"]["count"] == 2
+    assert metrics["phases"]["upload_url_request"]["count"] == 1
+    assert metrics["phases"]["upload"]["count"] == 2
+    assert metrics["counters"]["bytes_uploaded"] == sum(os.path.getsize(path) for path in paths)
@@ -0,0 +1,29 @@
+from pdf2md.paging import part_offsets, read_part
+
+
+def test_parts_end_at_line_breaks():
+    data = b"one\ntwo\nthree\nfour\n"
+    offsets = part_offsets(data, 11)
+    assert offsets == [0, 8, 19]
+    assert [data[start:end] for start, end in zip(offsets, offsets[1:])] == [b"one\ntwo\n", b"three\nfour\n"]
+
+
+def test_long_line_is_not_cut_inside_a_character():
+    data = ("é" * 10).encode("utf-8")
+    offsets = part_offsets(data, 5)
+    for start, end in zip(offsets, offsets[1:]):
+        data[start:end].decode("utf-8")
+    assert offsets[-1] == len(data)
+
+
+def test_empty_content_has_one_empty_part():
+    assert part_offsets(b"", 10) == [0, 0]
+
+
+def test_read_part(tmp_path):
+    path = tmp_path / "full.md"
+    path.write_text("# Title\n\nFirst paragraph.\n\nSecond paragraph.\n", encoding="utf-8")
+    first, total = read_part(str(path), 1, 20)
+    assert total > 1
+    assert first == "# Title\n\n"
+    assert read_part(str(path), total + 1, 20) == (None, total)
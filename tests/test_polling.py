@@ -0,0 +1,42 @@
+from pdf2md.polling import AdaptivePoller
+
+
+def running(extracted, total):
+    return {"state": "running", "extract_progress": {"extracted_pages": extracted, "total_pages": total}}
+
+
+def test_timeout_grows_with_known_pages():
+    poller = AdaptivePoller(base_timeout=60, seconds_per_page=2, jitter=0)
+    assert poller.timeout == 60
+    poller.next_delay([running(0, 50)])
+    assert poller.timeout == 160
+
+
+def test_timeout_is_seeded_and_never_lowered_by_polls():
+    poller = AdaptivePoller(base_timeout=60, seconds_per_page=2, jitter=0, total_pages=100)
+    assert poller.timeout == 260
+    poller.next_delay([{"state": "pending"}])
+    assert poller.timeout == 260
+
+
+def test_timeout_is_capped():
+    poller = AdaptivePoller(base_timeout=60, seconds_per_page=10, max_timeout=120, total_pages=1000)
+    assert poller.timeout == 120
+
+
+def test_delay_backs_off_while_nothing_changes():
+    poller = AdaptivePoller(min_interval=1, max_interval=8, backoff=2, jitter=0)
+    delays = [poller.next_delay([{"state": "pending"}]) for _ in range(5)]
+    assert delays == [2, 4, 8, 8, 8]
+
+
+def test_delay_resets_when_a_file_finishes():
+    poller = AdaptivePoller(min_interval=1, max_interval=30, backoff=2, jitter=0)
+    for _ in range(3):
+        poller.next_delay([{"state": "pending"}, {"state": "pending"}])
+    assert poller.next_delay([{"state": "done"}, {"state": "pending"}]) == 1
+
+
+def test_failed_poll_backs_off():
+    poller = AdaptivePoller(min_interval=1, max_interval=30, backoff=3, jitter=0)
+    assert poller.next_delay(None) == 3
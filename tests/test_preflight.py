@@ -0,0 +1,67 @@
+import time
+
+from pdf2md.preflight import inspect_pdf
+
+FONT_RESOURCES = b"/Resources << /Font << /F1 5 0 R >> >>"
+IMAGE_RESOURCES = b"/Resources << /XObject << /Im1 6 0 R >> >>"
+
+
+def write_pdf(path, page_resources, tree_resources=b""):
+    """Write a minimal PDF with one page object per entry of page_resources"""
+    objects = {
+        1: b"<< /Type /Catalog /Pages 2 0 R >>",
+        5: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+        7: b"<< /Font << /F1 5 0 R >> >>",
+    }
+    kids = []
+    for i, resources in enumerate(page_resources):
+        objects[10 + i] = b"<< /Type /Page /Parent 2 0 R " + resources + b" >>"
+        kids.append(b"%d 0 R" % (10 + i))
+    objects[2] = b"<< /Type /Pages /Kids [" + b" ".join(kids) + b"] /Count %d " % len(kids) + tree_resources + b" >>"
+    body = b"".join(b"%d 0 obj\n%s\nendobj\n" % (number, obj) for number, obj in sorted(objects.items()))
+    path.write_bytes(b"%PDF-1.4\n" + body + b"trailer << /Root 1 0 R >>\n%%EOF\n")
+    return str(path)
+
+
+def test_text_document(tmp_path):
+    info = inspect_pdf(write_pdf(tmp_path / "text.pdf", [FONT_RESOURCES, b"/Resources 7 0 R", FONT_RESOURCES]))
+    assert info["valid"] and info["pages"] == 3
+    assert info["text_pages"] == 3 and info["has_text"] is True
+
+
+def test_scan_with_a_typed_cover_page_still_needs_ocr(tmp_path):
+    info = inspect_pdf(write_pdf(tmp_path / "scan.pdf", [FONT_RESOURCES] + [IMAGE_RESOURCES] * 3))
+    assert info["text_pages"] == 1 and info["has_text"] is False
+
+
+def test_resources_inherited_from_the_page_tree(tmp_path):
+    info = inspect_pdf(write_pdf(tmp_path / "inherited.pdf", [b""] * 2, tree_resources=b"/Resources 7 0 R"))
+    assert info["text_pages"] == 2 and info["has_text"] is True
+
+
+def test_object_streams_leave_the_text_layer_unknown(tmp_path):
+    path = tmp_path / "compressed.pdf"
+    path.write_bytes(b"%PDF-1.5\n1 0 obj\n<< /Type /ObjStm /N 3 >>\nendobj\n/Font << >>\n%%EOF\n")
+    info = inspect_pdf(str(path))
+    assert info["valid"] and info["has_text"] is None
+
+
+def test_broken_files_are_rejected(tmp_path):
+    empty = tmp_path / "empty.pdf"
+    empty.write_bytes(b"")
+    truncated = tmp_path / "truncated.pdf"
+    truncated.write_bytes(b"%PDF-1.4\n1 0 obj\n<< >>\n")
+    encrypted = tmp_path / "encrypted.pdf"
+    encrypted.write_bytes(b"%PDF-1.4\ntrailer << /Encrypt 3 0 R >>\n%%EOF\n")
+    assert inspect_pdf(str(empty))["error"] == "File is empty"
+    assert "truncated" in inspect_pdf(str(truncated))["error"]
+    assert inspect_pdf(str(encrypted))["encrypted"]
+
+
+def test_long_digit_runs_are_scanned_in_linear_time(tmp_path):
+    path = tmp_path / "digits.pdf"
+    path.write_bytes(b"%PDF-1.4\n" + b"0" * 256 * 1024 + b" 0 obj\n<< /Type /Page >>\nendobj\n%%EOF\n")
+    started = time.monotonic()
+    info = inspect_pdf(str(path))
+    assert time.monotonic() - started < 1.0
+    assert info["valid"] and info["text_pages"] is None
@@ -0,0 +1,78 @@
+import re
+import asyncio
+
+import pytest
+
+NEXT_PART_RE = re.compile(r"\n<!-- pdf2md: part \d+ of \d+(?:, next: (\S+))? -->\n$")
+
+
+def read_uri(server, uri):
+    job, file, _, *part = uri[len("pdf2md://"):].split("/")
+    return server.get_markdown_part(job, file, part[0]) if part else server.get_markdown(job, file)
+
+
+def test_markdown_is_served_in_parts_linked_to_each_other(server, monkeypatch):
+    monkeypatch.setattr(server, "RESOURCE_PART_SIZE", 1024)
+    result = asyncio.run(server.convert_pdf_url("https://a.test/paper.pdf"))
+    converted = result["downloaded_files"][0]
+    with open(server.find_markdown_file(converted["extract_dir"]), encoding="utf-8") as f:
+        markdown = f.read()
+
+    parts = []
+    uri = converted["resource_uri"]
+    while uri:
+        text = read_uri(server, uri)
+        footer = NEXT_PART_RE.search(text)
+        parts.append(text[:footer.start()])
+        uri = footer.group(1)
+
+    assert len(parts) == 2
+    assert "".join(parts) == markdown
+
+
+def test_files_are_found_by_name_data_id_or_position(server, monkeypatch):
+    monkeypatch.setattr(server, "RESOURCE_PART_SIZE", 1 << 20)
+    result = asyncio.run(server.convert_pdf_url("https://a.test/one.pdf https://a.test/two.pdf"))
+    job_id = result["job_id"]
+    second = result["downloaded_files"][1]
+
+    by_name = server.get_markdown(job_id, "two.pdf")
+    assert by_name == server.get_markdown(job_id, second["data_id"]) == server.get_markdown(job_id, "2")
+    assert by_name.startswith("# Mock document")
+    assert "<!-- pdf2md" not in by_name
+
+
+def test_missing_jobs_files_and_parts_are_errors(server, monkeypatch):
+    monkeypatch.setattr(server, "RESOURCE_PART_SIZE", 1 << 20)
+    job_id = asyncio.run(server.convert_pdf_url("https://a.test/paper.pdf"))["job_id"]
+
+    with pytest.raises(ValueError, match="Job not found"):
+        server.get_markdown("nope", "paper.pdf")
+    with pytest.raises(ValueError, match="File not found"):
+        server.get_markdown(job_id, "other.pdf")
+    with pytest.raises(ValueError, match="has 1 part"):
+        server.get_markdown_part(job_id, "paper.pdf", "2")
+    with pytest.raises(ValueError, match="Invalid part"):
+        server.get_markdown_part(job_id, "paper.pdf", "x")
+
+
+def test_pending_file_is_not_served(server, monkeypatch):
+    monkeypatch.setattr(server, "POLL_BASE_TIMEOUT", 0.0)
+    result = asyncio.run(server.convert_pdf_url("https://a.test/slow.pdf"))
+
+    with pytest.raises(ValueError, match="not been converted yet"):
+        server.get_markdown(result["job_id"], "slow.pdf")
+
+
+def test_kept_archive_members_are_served(server, monkeypatch):
+    monkeypatch.setattr(server, "EXTRACT_PROFILE", "markdown")
+    monkeypatch.setattr(server, "KEEP_ARCHIVE", True)
+    asyncio.run(server.convert_pdf_url("https://a.test/paper.pdf"))
+
+    content_list = server.get_archive_member("paper", "content_list.json")
+    image = server.get_archive_member("paper", "images%2Ffigure.jpg")
+
+    assert isinstance(content_list, str) and "Mock document" in content_list
+    assert isinstance(image, bytes) and len(image) > 0
+    with pytest.raises(ValueError, match="No kept archive member"):
+        server.get_archive_member("paper", "missing.json")
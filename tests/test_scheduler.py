@@ -0,0 +1,81 @@
+import asyncio
+
+from pdf2md.scheduler import BatchScheduler, pack_batches, DEFAULT_DOCUMENT_PAGES
+
+
+def entries(*data_ids):
+    return [{"data_id": data_id} for data_id in data_ids]
+
+
+def test_pack_batches_bounds_files_and_pages():
+    pages = {"a": 300, "b": 150, "c": 150, "d": 20, "e": 20}
+    batches = pack_batches(entries("a", "b", "c", "d", "e"), pages, batch_size=3, batch_pages=320)
+    assert [[item["data_id"] for item in batch] for batch in batches] == [["a"], ["b", "c", "d"], ["e"]]
+
+
+def test_pack_batches_gives_long_documents_their_own_batch():
+    batches = pack_batches(entries("long", "x", "y"), {"long": 900, "x": 5, "y": 5}, batch_size=10, batch_pages=100)
+    assert [[item["data_id"] for item in batch] for batch in batches] == [["long"], ["x", "y"]]
+
+
+def test_pack_batches_counts_unknown_documents_with_the_default():
+    batches = pack_batches(entries("a", "b", "c"), {}, batch_size=10, batch_pages=2 * DEFAULT_DOCUMENT_PAGES)
+    assert [len(batch) for batch in batches] == [2, 1]
+
+
+def run_schedule(scheduler, requests, hold):
+    """Queue requests behind one held slot and return the order they are granted in"""
+    order = []
+
+    async def submit(name, client, priority, pages):
+        async with scheduler.slot(client, priority, pages):
+            order.append(name)
+            await asyncio.sleep(0)
+
+    async def main():
+        await scheduler.acquire("holder", "normal", hold)
+        tasks = [asyncio.ensure_future(submit(*request)) for request in requests]
+        await asyncio.sleep(0)
+        scheduler.release(hold)
+        await asyncio.gather(*tasks)
+
+    asyncio.run(main())
+    return order
+
+
+def test_scheduler_grants_higher_priority_first():
+    scheduler = BatchScheduler(max_inflight_pages=0, max_inflight_batches=1, aging_seconds=0)
+    order = run_schedule(scheduler, [
+        ("bulk", "a", "bulk", 10),
+        ("normal", "a", "normal", 10),
+        ("interactive", "b", "interactive", 10),
+    ], hold=10)
+    assert order == ["interactive", "normal", "bulk"]
+
+
+def test_scheduler_shares_fairly_between_clients():
+    scheduler = BatchScheduler(max_inflight_pages=0, max_inflight_batches=1, aging_seconds=0)
+    order = run_schedule(scheduler, [
+        ("big-1", "big", "normal", 100),
+        ("big-2", "big", "normal", 100),
+        ("big-3", "big", "normal", 100),
+        ("small-1", "small", "normal", 5),
+    ], hold=10)
+    assert order.index("small-1") < order.index("big-2")
+
+
+def test_scheduler_caps_pages_in_flight():
+    scheduler = BatchScheduler(max_inflight_pages=100, max_inflight_batches=0, aging_seconds=0)
+
+    async def main():
+        await scheduler.acquire("a", "normal", 80)
+        second = asyncio.ensure_future(scheduler.acquire("b", "normal", 50))
+        await asyncio.sleep(0)
+        waiting = scheduler.stats()["queued_batches"]
+        scheduler.release(80)
+        await second
+        return waiting, scheduler.inflight_pages
+
+    waiting, inflight = asyncio.run(main())
+    assert waiting == 1
+    assert inflight == 50
@@ -0,0 +1,50 @@
+import os
+
+from pdf2md.splitting import stitch_chunks
+
+
+def write_chunk(directory, markdown, images):
+    os.makedirs(os.path.join(directory, "images"))
+    with open(os.path.join(directory, "full.md"), "w", encoding="utf-8") as f:
+        f.write(markdown)
+    for name, data in images.items():
+        with open(os.path.join(directory, "images", name), "wb") as f:
+            f.write(data)
+    return str(directory)
+
+
+def test_same_sized_images_with_different_content_are_both_kept(tmp_path):
+    chunks = [
+        {"first_page": 1, "last_page": 10,
+         "extract_dir": write_chunk(tmp_path / "c1", "First.\n\n![](images/0.jpg)\n", {"0.jpg": b"AAAA"})},
+        {"first_page": 11, "last_page": 20,
+         "extract_dir": write_chunk(tmp_path / "c2", "Second.\n\n![](images/0.jpg)\n", {"0.jpg": b"BBBB"})},
+    ]
+    output_dir = tmp_path / "out"
+
+    assert stitch_chunks(chunks, str(output_dir)) == []
+
+    assert sorted(os.listdir(output_dir / "images")) == ["0.jpg", "p0011_0.jpg"]
+    assert (output_dir / "images" / "p0011_0.jpg").read_bytes() == b"BBBB"
+    markdown = (output_dir / "full.md").read_text(encoding="utf-8")
+    assert "![](images/0.jpg)" in markdown and "![](images/p0011_0.jpg)" in markdown
+
+
+def test_identical_images_are_stored_once(tmp_path):
+    chunks = [
+        {"first_page": 1, "last_page": 1,
+         "extract_dir": write_chunk(tmp_path / "c1", "A\n\n![](images/logo.png)\n", {"logo.png": b"LOGO"})},
+        {"first_page": 2, "last_page": 2,
+         "extract_dir": write_chunk(tmp_path / "c2", "B\n\n![](images/logo.png)\n", {"logo.png": b"LOGO"})},
+    ]
+    stitch_chunks(chunks, str(tmp_path / "out"))
+    assert os.listdir(tmp_path / "out" / "images") == ["logo.png"]
+
+
+def test_failed_chunk_is_reported_missing(tmp_path):
+    chunks = [
+        {"first_page": 1, "last_page": 5, "extract_dir": write_chunk(tmp_path / "c1", "Start.\n", {})},
+        {"first_page": 6, "last_page": 10, "extract_dir": None},
+    ]
+    assert stitch_chunks(chunks, str(tmp_path / "out")) == [(6, 10)]
+    assert "pages 6-10 could not be converted" in (tmp_path / "out" / "full.md").read_text(encoding="utf-8")
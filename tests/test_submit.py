@@ -0,0 +1,59 @@
+import os
+import asyncio
+
+from bench_throughput import write_sample_pdfs
+
+
+def test_submitted_job_is_followed_and_collected(server, mineru):
+    async def submit_and_collect():
+        handle = await server.submit_conversion("https://a.test/one.pdf https://a.test/two.pdf")
+        status = await server.get_conversion_status(handle["job_id"])
+        early = await server.collect_conversion(handle["job_id"], wait=False)
+        result = await server.collect_conversion(handle["job_id"])
+        return handle, status, early, result
+
+    handle, status, early, result = asyncio.run(submit_and_collect())
+
+    assert handle["success"] and handle["kind"] == "url" and handle["status"] == "running"
+    assert handle["total_files"] == 2
+    assert status["in_progress"] and status["status"] == "running"
+    assert [f["name"] for f in status["files"]] == ["one.pdf", "two.pdf"]
+    assert early["status"] == "running" and early["pending_files"] == ["one.pdf", "two.pdf"]
+    assert result["status"] == "completed"
+    assert [f["file_name"] for f in result["downloaded_files"]] == ["one.pdf", "two.pdf"]
+    assert all(f["resource_uri"].startswith(f"pdf2md://{handle['job_id']}/") for f in result["downloaded_files"])
+    assert mineru.stats()["requests"]["batch"] == 1
+
+
+def test_local_files_are_submitted_as_a_file_job(server, tmp_path):
+    paths = write_sample_pdfs(str(tmp_path), "doc", 2, 2000)
+
+    async def submit_and_collect():
+        handle = await server.submit_conversion(",".join(paths))
+        return handle, await server.collect_conversion(handle["job_id"])
+
+    handle, result = asyncio.run(submit_and_collect())
+
+    assert handle["kind"] == "file"
+    assert result["status"] == "completed"
+    for f in result["downloaded_files"]:
+        assert os.path.isfile(os.path.join(f["extract_dir"], "full.md"))
+
+    status = asyncio.run(server.get_conversion_status(handle["job_id"]))
+    assert not status["in_progress"]
+    assert [f["state"] for f in status["files"]] == ["downloaded", "downloaded"]
+
+
+def test_invalid_submissions_are_rejected(server, tmp_path):
+    mixed = asyncio.run(server.submit_conversion(f"https://a.test/one.pdf {tmp_path / 'two.pdf'}"))
+    missing = asyncio.run(server.submit_conversion(str(tmp_path / "missing.pdf")))
+    unknown_priority = asyncio.run(server.submit_conversion("https://a.test/one.pdf", priority="urgent"))
+
+    assert "Mixed" in mixed["error"]
+    assert not missing["success"]
+    assert "Unknown priority" in unknown_priority["error"]
+
+
+def test_unknown_jobs_are_reported(server):
+    assert asyncio.run(server.get_conversion_status("nope"))["error"] == "Job not found: nope"
+    assert asyncio.run(server.collect_conversion("nope"))["error"] == "Job not found: nope"
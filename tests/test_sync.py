@@ -0,0 +1,36 @@
+from pdf2md.sync import glob_to_regex, split_glob
+
+
+def matches(pattern, path):
+    return glob_to_regex(pattern).match(path) is not None
+
+
+def test_star_stays_in_one_directory():
+    assert matches("*.pdf", "report.pdf")
+    assert not matches("*.pdf", "sub/report.pdf")
+
+
+def test_double_star_matches_any_depth():
+    assert matches("**/*.pdf", "report.pdf")
+    assert matches("**/*.pdf", "a/b/report.pdf")
+    assert matches("papers/**/draft_?.pdf", "papers/2024/q1/draft_3.pdf")
+    assert not matches("papers/**/draft_?.pdf", "papers/draft_10.pdf")
+
+
+def test_matching_ignores_case():
+    assert matches("*.pdf", "SCAN.PDF")
+
+
+def test_character_classes():
+    assert matches("v[12].pdf", "v1.pdf")
+    assert not matches("v[!12].pdf", "v2.pdf")
+    assert matches("v[!12].pdf", "v3.pdf")
+
+
+def test_special_characters_are_literal():
+    assert matches("a+b (1).pdf", "a+b (1).pdf")
+    assert not matches("a.pdf", "axpdf")
+
+
+def test_split_glob_separates_the_root():
+    assert split_glob("/data/papers/**/*.pdf") == ("/data/papers", "**/*.pdf")
@@ -0,0 +1,89 @@
+import asyncio
+
+import httpx
+
+
+class UploadHost(httpx.AsyncBaseTransport):
+    """Records the chunks of every upload, answering the first `failures` of them with `status`"""
+
+    def __init__(self, failures=0, status=500, delay=0.0):
+        self.failures = failures
+        self.status = status
+        self.delay = delay
+        self.uploads = []
+        self.active = 0
+        self.max_active = 0
+
+    async def handle_async_request(self, request):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            chunks = [chunk async for chunk in request.stream]
+            await asyncio.sleep(self.delay)
+        finally:
+            self.active -= 1
+        self.uploads.append({"length": request.headers.get("Content-Length"), "chunks": chunks})
+        if len(self.uploads) <= self.failures:
+            return httpx.Response(self.status)
+        return httpx.Response(200)
+
+
+def upload(server, host, paths, **kwargs):
+    async def run():
+        async with httpx.AsyncClient(transport=host) as client:
+            return await server.upload_files(client, paths, [f"https://upload.test/{i}" for i in range(len(paths))],
+                                              **kwargs)
+    return asyncio.run(run())
+
+
+def test_file_is_streamed_in_chunks_with_its_length(server, tmp_path):
+    data = bytes(range(256)) * (server.UPLOAD_CHUNK_SIZE // 256 * 2 + 10)
+    path = tmp_path / "big.pdf"
+    path.write_bytes(data)
+    host = UploadHost()
+
+    result, = upload(server, host, [str(path)])
+
+    assert result["success"] and result["bytes"] == len(data)
+    sent = host.uploads[0]
+    assert sent["length"] == str(len(data))
+    assert [len(chunk) for chunk in sent["chunks"]] == [server.UPLOAD_CHUNK_SIZE] * 2 + [2560]
+    assert b"".join(sent["chunks"]) == data
+
+
+def test_failed_upload_is_retried_with_the_whole_body(server, tmp_path):
+    path = tmp_path / "paper.pdf"
+    path.write_bytes(b"%PDF-1.4 body")
+    host = UploadHost(failures=1, status=500)
+
+    result, = upload(server, host, [str(path)])
+
+    assert result["success"] and result["attempts"] == 2
+    assert [b"".join(sent["chunks"]) for sent in host.uploads] == [b"%PDF-1.4 body"] * 2
+    assert server.get_metrics()["counters"]["upload_retries"] == 1
+
+
+def test_rejected_upload_url_is_not_retried(server, tmp_path):
+    path = tmp_path / "paper.pdf"
+    path.write_bytes(b"%PDF-1.4")
+    host = UploadHost(failures=1, status=403)
+
+    result, = upload(server, host, [str(path)])
+
+    assert not result["success"] and result["attempts"] == 1
+    assert result["error"] == "Upload failed: 403"
+
+
+def test_concurrent_uploads_are_bounded(server, tmp_path):
+    paths = []
+    for i in range(6):
+        path = tmp_path / f"doc_{i}.pdf"
+        path.write_bytes(b"%PDF-1.4")
+        paths.append(str(path))
+    host = UploadHost(delay=0.02)
+
+    results = upload(server, host, paths, concurrency=2)
+
+    assert all(result["success"] for result in results)
+    assert [result["file"] for result in results] == [f"doc_{i}.pdf" for i in range(6)]
+    assert host.max_active == 2
@@ -0,0 +1,56 @@
+import time
+
+from pdf2md.workqueue import WorkQueue, QUEUE_LEASED, QUEUE_DONE, QUEUE_FAILED
+
+
+def make_queue(tmp_path, max_attempts=3):
+    return WorkQueue(str(tmp_path / "queue.db"), max_attempts=max_attempts)
+
+
+def expire_lease(queue, job_id):
+    with queue._connect() as conn:
+        conn.execute("UPDATE queue SET lease_expires = ? WHERE job_id = ?", (time.time() - 1, job_id))
+
+
+def test_leased_job_is_not_handed_out_twice(tmp_path):
+    queue = make_queue(tmp_path)
+    queue.enqueue("job1", "url", {"sources": ["https://a.test/a.pdf"]})
+    entry = queue.lease("w1", 60)
+    assert entry["job_id"] == "job1" and entry["attempts"] == 1
+    assert entry["payload"] == {"sources": ["https://a.test/a.pdf"]}
+    assert queue.lease("w2", 60) is None
+
+
+def test_expired_lease_goes_to_another_worker(tmp_path):
+    queue = make_queue(tmp_path)
+    queue.enqueue("job1", "file", {})
+    queue.lease("w1", 60)
+    expire_lease(queue, "job1")
+
+    entry = queue.lease("w2", 60)
+    assert entry["job_id"] == "job1" and entry["attempts"] == 2
+    assert queue.get("job1")["worker"] == "w2"
+    # The first worker lost the job and cannot renew or complete it
+    assert not queue.renew("job1", "w1", 60)
+    queue.complete("job1", "w1")
+    assert queue.get("job1")["state"] == QUEUE_LEASED
+    queue.complete("job1", "w2")
+    assert queue.get("job1")["state"] == QUEUE_DONE
+
+
+def test_job_fails_once_its_attempts_are_used_up(tmp_path):
+    queue = make_queue(tmp_path, max_attempts=2)
+    queue.enqueue("job1", "file", {})
+    for worker in ("w1", "w2"):
+        assert queue.lease(worker, 60) is not None
+        expire_lease(queue, "job1")
+    assert queue.lease("w3", 60) is None
+    assert queue.get("job1")["state"] == QUEUE_FAILED
+
+
+def test_release_does_not_count_the_attempt(tmp_path):
+    queue = make_queue(tmp_path)
+    queue.enqueue("job1", "file", {})
+    queue.lease("w1", 60)
+    queue.release("job1", "w1")
+    assert queue.lease("w2", 60)["attempts"] == 1